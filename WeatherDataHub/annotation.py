@@ -1,72 +1,137 @@
 import pandas as pd
 import csv
-from typing import List, Tuple
-
-
-def create_annotation_file(file_path: str, output_path: str) -> None:
+import os
+from datetime import date
+from typing import Callable, List, Optional, Tuple
+from manifest import load_manifest
+from streaming_stats import (
+    DEFAULT_CHUNK_SIZE, SKETCH_SUFFIX, DatasetStats, cached_file_stats, load_sketch, merge_stats, save_sketch
+)
+
+
+def create_annotation_file(file_path: str, output_path: str,
+                           progress_callback: Optional[Callable[[int], None]] = None,
+                           chunksize: int = DEFAULT_CHUNK_SIZE) -> None:
     """
     Создает файл аннотации для заданного CSV файла.
 
+    Статистика собирается за один проход по файлу фрагментами (streaming_stats),
+    поэтому память не зависит от размера файла, а примеры значений и число
+    уникальных значений (приближенное) одинаковы при каждом запуске. Рядом с
+    аннотацией сохраняется набросок (<имя>.sketch), из которого merge_annotations
+    собирает аннотации объединений без чтения данных.
+
     Args:
         file_path (str): Путь к исходному CSV файлу.
         output_path (str): Путь для сохранения файла аннотации.
+        progress_callback (Optional[Callable[[int], None]]): Получает процент прочитанного файла.
+        chunksize (int): Число строк в одном фрагменте.
+    """
+    stats = cached_file_stats(file_path, chunksize, progress_callback)
+    write_annotation(stats, os.path.basename(file_path), output_path)
+
+
+def create_partitions_annotation(folder: str, output_path: str, start: Optional[date] = None,
+                                 end: Optional[date] = None,
+                                 progress_callback: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Создает аннотацию для недельных или годовых разделов папки, объединяя их статистику.
+
+    Статистика каждого файла-раздела собирается один раз и сохраняется (cached_file_stats),
+    поэтому повторные аннотации любого набора разделов не читают данные. В объединенном
+    файле partitions.csv статистика собирается для файла целиком.
+
+    Args:
+        folder (str): Папка с разделами (dataset/weekly_data/<имя> или dataset/yearly_data/<имя>).
+        output_path (str): Путь для сохранения файла аннотации.
+        start (Optional[date]): Первая дата интервала разделов.
+        end (Optional[date]): Последняя дата интервала разделов.
+        progress_callback (Optional[Callable[[int], None]]): Получает процент обработанных разделов.
+
+    Returns:
+        int: Число объединенных файлов.
+    """
+    files = list(dict.fromkeys(entry['file'] for entry in load_manifest(folder).overlapping(start, end)))
+    parts = []
+    for i, file in enumerate(files, 1):
+        parts.append(cached_file_stats(os.path.join(folder, file)))
+        if progress_callback is not None:
+            progress_callback(i * 100 // len(files))
+    write_annotation(merge_stats(parts), os.path.basename(os.path.normpath(folder)), output_path)
+    return len(files)
+
+
+def merge_annotations(annotation_paths: List[str], output_path: str, name: Optional[str] = None) -> None:
+    """
+    Создает аннотацию объединения данных по наброскам уже созданных аннотаций.
+
+    Args:
+        annotation_paths (List[str]): Пути к файлам аннотаций частей (рядом с ними должны быть .sketch).
+        output_path (str): Путь для сохранения файла аннотации.
+        name (Optional[str]): Имя набора данных для общей информации.
+    """
+    stats = merge_stats(load_sketch(sketch_path_for(path)) for path in annotation_paths)
+    if name is None:
+        name = ', '.join(os.path.basename(path) for path in annotation_paths)
+    write_annotation(stats, name, output_path)
+
+
+def sketch_path_for(annotation_path: str) -> str:
+    """Возвращает путь к наброску, сохраненному рядом с файлом аннотации."""
+    return os.path.splitext(annotation_path)[0] + SKETCH_SUFFIX
+
+
+def write_annotation(stats: DatasetStats, file_name: str, output_path: str) -> None:
+    """
+    Записывает файл аннотации по собранной статистике и набросок статистики рядом с ним.
+
+    Args:
+        stats (DatasetStats): Статистика набора данных.
+        file_name (str): Имя файла набора данных для общей информации.
+        output_path (str): Путь для сохранения файла аннотации.
     """
-    df = pd.read_csv(file_path)
-    
     with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
         writer = csv.writer(csvfile, quoting=csv.QUOTE_ALL)
-        write_general_info(writer, file_path, df)
-        write_column_info(writer, df)
+        write_general_info(writer, file_name, stats)
+        write_column_info(writer, stats)
+    save_sketch(stats, sketch_path_for(output_path))
 
 
-def write_general_info(writer: csv.writer, file_path: str, df: pd.DataFrame) -> None:
+def write_general_info(writer: csv.writer, file_name: str, stats: DatasetStats) -> None:
     """
     Записывает общую информацию о датасете в файл аннотации.
 
     Args:
         writer (csv.writer): Объект для записи в CSV.
-        file_path (str): Путь к исходному CSV файлу.
-        df (pd.DataFrame): DataFrame с данными.
+        file_name (str): Имя исходного CSV файла.
+        stats (DatasetStats): Статистика набора данных.
     """
     general_info: List[Tuple[str, str]] = [
         ("Параметр", "Значение"),
-        ("Имя файла", file_path.split("/")[-1]),
-        ("Количество строк", str(len(df))),
-        ("Количество столбцов", str(len(df.columns))),
-        ("Начальная дата", str(df['Дата'].min())),
-        ("Конечная дата", str(df['Дата'].max()))
+        ("Имя файла", file_name),
+        ("Количество строк", str(stats.rows)),
+        ("Количество столбцов", str(len(stats.columns))),
+        ("Начальная дата", format_date(stats.first_date)),
+        ("Конечная дата", format_date(stats.last_date))
     ]
     writer.writerows(general_info)
 
 
-def write_column_info(writer: csv.writer, df: pd.DataFrame) -> None:
+def write_column_info(writer: csv.writer, stats: DatasetStats) -> None:
     """
     Записывает информацию о каждом столбце датасета в файл аннотации.
 
     Args:
         writer (csv.writer): Объект для записи в CSV.
-        df (pd.DataFrame): DataFrame с данными.
+        stats (DatasetStats): Статистика набора данных.
     """
-    for col in df.columns:
-        col_info = get_column_info(df, col)
-        writer.writerow([col, col_info])
+    for name, column in stats.columns.items():
+        writer.writerow([name, column.describe()])
 
 
-def get_column_info(df: pd.DataFrame, col: str) -> str:
-    """
-    Формирует строку с информацией о заданном столбце.
-
-    Args:
-        df (pd.DataFrame): DataFrame с данными.
-        col (str): Имя столбца.
-
-    Returns:
-        str: Строка с информацией о столбце.
-    """
-    dtype = df[col].dtype
-    unique_count = df[col].nunique()
-    samples = ', '.join(map(str, df[col].sample(min(5, unique_count)).tolist()))
-    return f"Тип: {dtype}, Уникальных значений: {unique_count}, Примеры: {samples}"
+def format_date(value: Optional[pd.Timestamp]) -> str:
+    """Форматирует дату как ГГГГ-ММ-ДД; пустая строка, если дат в файле нет."""
+    return value.strftime('%Y-%m-%d') if value is not None else ''
 
 
 def read_annotation_file(file_path: str) -> pd.DataFrame:
@@ -0,0 +1,266 @@
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from annotation import create_annotation_file
+from data_preprocessing import preprocess_file_chunked
+from manifest import MANIFEST_FILE
+from page_cache import PageCache
+from scraper import DATASET_FOLDER, STATION_ID, WeatherScraper
+from split_csv import split_by_week, split_by_year, split_csv
+
+DEFAULT_PATTERNS = [os.path.join(DATASET_FOLDER, '*.csv')]
+PREPROCESSED_PREFIX = 'предобр_'
+# Префиксы предобработанных файлов: текущий и встречающийся в dataset/ более короткий
+DERIVED_PREFIXES = (PREPROCESSED_PREFIX, 'пред_')
+ANNOTATION_SUFFIX = '_annotation.csv'
+SPLIT_KINDS = ('xy', 'week', 'year')
+
+# Коды завершения: 0 - все файлы обработаны или уже актуальны, 1 - часть заданий завершилась
+# ошибкой, 2 - неверные аргументы или нет входных файлов, 130 - прервано пользователем
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+
+def is_derived(file_path: str) -> bool:
+    """Проверяет, является ли файл результатом обработки (предобработанный файл или аннотация)."""
+    name = os.path.basename(file_path)
+    return name.startswith(DERIVED_PREFIXES) or name.endswith(ANNOTATION_SUFFIX)
+
+
+def expand_inputs(patterns: Sequence[str], include_derived: bool = False) -> List[str]:
+    """
+    Раскрывает шаблоны путей (glob, в том числе **) в список CSV файлов без повторов.
+
+    Args:
+        patterns (Sequence[str]): Пути и шаблоны.
+        include_derived (bool): Оставить ли предобработанные файлы и аннотации.
+
+    Returns:
+        List[str]: Файлы в порядке шаблонов, внутри шаблона - по имени.
+    """
+    files: Dict[str, None] = {}
+    for pattern in patterns:
+        for file_path in sorted(glob.glob(pattern, recursive=True)):
+            if os.path.isfile(file_path) and file_path.endswith('.csv') \
+                    and (include_derived or not is_derived(file_path)):
+                files.setdefault(os.path.normpath(file_path))
+    return list(files)
+
+
+def is_up_to_date(inputs: Sequence[str], outputs: Sequence[str]) -> bool:
+    """Проверяет, что все выходные файлы существуют и изменены не раньше всех входных."""
+    try:
+        newest_input = max(os.path.getmtime(path) for path in inputs)
+        return all(os.path.getmtime(path) >= newest_input for path in outputs)
+    except (OSError, ValueError):
+        return False
+
+
+def preprocessed_path(file_path: str) -> str:
+    folder, name = os.path.split(file_path)
+    return os.path.join(folder, PREPROCESSED_PREFIX + name)
+
+
+def annotation_path(file_path: str) -> str:
+    return file_path.rsplit('.', 1)[0] + ANNOTATION_SUFFIX
+
+
+def split_outputs(file_path: str, kind: str) -> List[str]:
+    """Возвращает файлы, по которым проверяется актуальность разделения (см. split_csv.py)."""
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    if kind == 'xy':
+        folder = os.path.join(DATASET_FOLDER, 'split_csv', name)
+        return [os.path.join(folder, 'X.csv'), os.path.join(folder, 'Y.csv')]
+    folder_name = 'weekly_data' if kind == 'week' else 'yearly_data'
+    return [os.path.join(DATASET_FOLDER, folder_name, name, MANIFEST_FILE)]
+
+
+def run_step(step: str, file_path: str, force: bool) -> bool:
+    """
+    Выполняет один шаг обработки файла, если его результат устарел.
+
+    Args:
+        step (str): 'preprocess', 'annotate' или 'split-xy', 'split-week', 'split-year'.
+        file_path (str): Исходный CSV файл.
+        force (bool): Выполнить шаг, даже если результат актуален.
+
+    Returns:
+        bool: True, если шаг выполнялся, и False, если результат уже был актуален.
+    """
+    if step == 'preprocess':
+        outputs = [preprocessed_path(file_path)]
+    elif step == 'annotate':
+        outputs = [annotation_path(file_path)]
+    else:
+        outputs = split_outputs(file_path, step.split('-', 1)[1])
+    if not force and is_up_to_date([file_path], outputs):
+        return False
+
+    if step == 'preprocess':
+        preprocess_file_chunked(file_path, outputs[0])
+    elif step == 'annotate':
+        create_annotation_file(file_path, outputs[0])
+    elif step == 'split-xy':
+        if split_csv(file_path) is None:
+            raise ValueError("файл не удалось разделить на X и Y")
+    else:
+        split = split_by_week if step == 'split-week' else split_by_year
+        if split(file_path, incremental=True) is None:
+            raise ValueError(f"файл {file_path} не найден")
+        # Без изменений разделов манифест не перезаписывается: отмечаем, что результат проверен
+        os.utime(outputs[0])
+    return True
+
+
+def run_job(file_path: str, steps: Sequence[str], force: bool, verbose: bool) -> Tuple[str, List[str], float]:
+    """
+    Выполняет шаги для одного файла; вызывается в процессе пула.
+
+    Вывод функций обработки (print) подавляется, если verbose не задан.
+
+    Returns:
+        Tuple[str, List[str], float]: Файл, выполненные шаги и время в секундах.
+    """
+    started = time.perf_counter()
+    done = []
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        for step in steps:
+            if run_step(step, file_path, force):
+                done.append(step)
+    return file_path, done, time.perf_counter() - started
+
+
+def run_jobs(files: Sequence[str], steps: Sequence[str], jobs: Optional[int] = None,
+             force: bool = False, verbose: bool = False) -> int:
+    """
+    Выполняет шаги для каждого файла в пуле процессов: файлы обрабатываются независимо.
+
+    Args:
+        files (Sequence[str]): Исходные CSV файлы.
+        steps (Sequence[str]): Шаги, выполняемые по порядку для каждого файла.
+        jobs (Optional[int]): Число процессов (по умолчанию - число ядер).
+        force (bool): Выполнять шаги, даже если результаты актуальны.
+        verbose (bool): Показывать вывод функций обработки.
+
+    Returns:
+        int: Код завершения (EXIT_OK или EXIT_FAILED).
+    """
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(files)))
+    failed = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(run_job, file_path, steps, force, verbose): file_path for file_path in files}
+        for finished, future in enumerate(as_completed(futures), 1):
+            file_path = futures[future]
+            prefix = f"[{finished}/{len(files)}]"
+            try:
+                _, done, seconds = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"{prefix} ошибка    {file_path}: {e}", file=sys.stderr)
+                continue
+            if done:
+                print(f"{prefix} выполнено {file_path}: {', '.join(done)} ({seconds:.1f} с)")
+            else:
+                print(f"{prefix} актуально {file_path}")
+
+    print(f"Файлов: {len(files)}, с ошибками: {failed}, процессов: {jobs}, "
+          f"время: {time.perf_counter() - started:.1f} с")
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def run_scrape(args: argparse.Namespace) -> int:
+    """Собирает данные с сайта: одну станцию в файл dataset/, несколько - в хранилище станций."""
+    try:
+        if datetime.strptime(args.start, "%m.%Y") > datetime.strptime(args.end, "%m.%Y"):
+            raise ValueError("начальная дата позже конечной")
+    except ValueError as e:
+        print(f"Неверный период: {e}. Используйте формат ММ.ГГГГ", file=sys.stderr)
+        return EXIT_USAGE
+
+    stations = args.stations or [STATION_ID]
+    scraper = WeatherScraper(max_workers=args.workers, page_cache=PageCache(),
+                             parse_workers=args.parse_workers, station_id=stations[0], stations=stations)
+    progress = (lambda percent: None) if not args.verbose else (lambda percent: print(f"{percent}%"))
+    if len(stations) > 1:
+        result = scraper.run_stations(args.start, args.end, progress, print)
+    else:
+        result = os.path.join(DATASET_FOLDER, scraper.run(args.start, args.end, progress, print))
+    print(f"Данные сохранены в {result}")
+    return EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Пакетная обработка WeatherDataHub без графического интерфейса",
+        epilog="Коды завершения: 0 - успешно, 1 - есть ошибки в заданиях, 2 - неверные аргументы "
+               "или нет входных файлов, 130 - прервано.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_file_options(subparser: argparse.ArgumentParser) -> None:
+        subparser.add_argument('files', nargs='*', default=DEFAULT_PATTERNS,
+                               help="CSV файлы или шаблоны (по умолчанию dataset/*.csv без "
+                                    "предобработанных файлов и аннотаций)")
+        subparser.add_argument('-j', '--jobs', type=int, help="число процессов (по умолчанию - число ядер)")
+        subparser.add_argument('--force', action='store_true', help="обработать и актуальные файлы")
+        subparser.add_argument('-v', '--verbose', action='store_true', help="показывать вывод обработки")
+
+    scrape = subparsers.add_parser('scrape', help="сбор данных с сайта")
+    scrape.add_argument('--start', required=True, help="начальный месяц ММ.ГГГГ")
+    scrape.add_argument('--end', required=True, help="конечный месяц ММ.ГГГГ")
+    scrape.add_argument('--stations', type=int, nargs='*', help="номера станций gismeteo")
+    scrape.add_argument('--workers', type=int, default=4, help="число одновременных загрузок")
+    scrape.add_argument('--parse-workers', type=int, default=0, help="процессов для разбора страниц")
+    scrape.add_argument('-v', '--verbose', action='store_true', help="показывать процент выполнения")
+
+    add_file_options(subparsers.add_parser('preprocess', help="предобработка в dataset/предобр_<имя>.csv"))
+    split = subparsers.add_parser('split', help="разделение на X/Y, по неделям и по годам")
+    add_file_options(split)
+    split.add_argument('--kind', nargs='+', choices=SPLIT_KINDS, default=list(SPLIT_KINDS),
+                       help="виды разделения (по умолчанию все)")
+    add_file_options(subparsers.add_parser('annotate', help="аннотация <имя>_annotation.csv рядом с файлом"))
+    add_file_options(subparsers.add_parser('all', help="предобработка, все виды разделения и аннотация"))
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == 'scrape':
+            return run_scrape(args)
+
+        files = expand_inputs(args.files)
+        if not files:
+            print(f"Нет входных файлов: {' '.join(args.files)}", file=sys.stderr)
+            return EXIT_USAGE
+        if args.jobs is not None and args.jobs < 1:
+            print("--jobs должен быть не меньше 1", file=sys.stderr)
+            return EXIT_USAGE
+
+        if args.command == 'preprocess':
+            steps = ['preprocess']
+        elif args.command == 'annotate':
+            steps = ['annotate']
+        elif args.command == 'split':
+            steps = [f"split-{kind}" for kind in SPLIT_KINDS if kind in args.kind]
+        else:
+            steps = ['preprocess', *(f"split-{kind}" for kind in SPLIT_KINDS), 'annotate']
+        return run_jobs(files, steps, args.jobs, args.force, args.verbose)
+    except KeyboardInterrupt:
+        print("Прервано", file=sys.stderr)
+        return EXIT_INTERRUPTED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,580 @@
+import argparse
+import contextlib
+import glob
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from annotation import create_annotation_file
+from csv_cache import CACHE_DIR_NAME, cache_path_for, read_csv_cached
+from data_preprocessing import preprocess_data, preprocess_file_chunked, preprocess_frame, preprocess_frame_legacy
+from data_retrieval import (WeatherIterator, get_data_by_date_original, get_data_by_date_split,
+                            get_data_by_date_weekly, get_data_by_date_yearly)
+from frame_cache import frame_cache
+from profiling import enable, registry
+from schema import memory_report
+from split_csv import split_by_week, split_by_year, split_csv
+from synthetic_data import generate_dataset, layout_for_rows
+
+DEFAULT_FILE = 'dataset/samara_weather_199901-202410.csv'
+SUITE_SIZES = [10_000, 1_000_000, 10_000_000]
+# Размер фрагмента при проверке preprocess_file_chunked: меньше файла, чтобы границы фрагментов были внутри данных
+EQUIVALENCE_CHUNK_SIZE = 500
+SUITE_STAGES = [
+    'preprocess', 'split-xy', 'split-week', 'split-year', 'lookup-original', 'lookup-split',
+    'lookup-yearly', 'lookup-weekly', 'iterator-rows', 'iterator-batches', 'annotation', 'table',
+]
+STARTUP_MODULES = ['main_window', 'main']
+# Модули, которые не должны загружаться до первого действия: pandas, NumPy, requests и
+# BeautifulSoup вместе занимают около 0,7 с из 0,8 с прежнего импорта main_window
+STARTUP_FORBIDDEN = [
+    'pandas', 'numpy', 'requests', 'bs4', 'lxml', 'scraper', 'data_preprocessing', 'split_csv',
+    'annotation', 'data_retrieval', 'csv_cache', 'frame_cache', 'rollups', 'station_store',
+]
+# Допустимое время импорта в миллисекундах с запасом для медленных машин CI
+# (после отложенных импортов main_window импортируется примерно за 70 мс, main - за 5 мс)
+STARTUP_BUDGET_MS = {'main_window': 300, 'main': 50}
+
+
+def time_call(func: Callable, *args, repeat: int = 3) -> float:
+    """
+    Замеряет время выполнения функции.
+
+    Args:
+        func (Callable): Замеряемая функция.
+        *args: Аргументы функции.
+        repeat (int): Число запусков.
+
+    Returns:
+        float: Лучшее время одного запуска в секундах.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def benchmark_preprocessing(file_path: str, scale: int = 1, repeat: int = 3) -> Dict[str, float]:
+    """
+    Сравнивает векторизованную и исходную предобработку на одних и тех же данных.
+
+    Args:
+        file_path (str): Путь к исходному CSV файлу.
+        scale (int): Во сколько раз размножить строки файла.
+        repeat (int): Число запусков каждой реализации.
+
+    Returns:
+        Dict[str, float]: Число строк, время обеих реализаций и ускорение.
+    """
+    df = pd.read_csv(file_path)
+    if scale > 1:
+        df = pd.concat([df] * scale, ignore_index=True)
+
+    legacy_output = preprocess_frame_legacy(df.copy()).to_csv(index=False)
+    vectorized_output = preprocess_frame(df.copy()).to_csv(index=False)
+    if legacy_output != vectorized_output:
+        raise AssertionError("Результаты векторизованной и исходной предобработки различаются")
+    check_chunked_preprocessing(file_path)
+
+    legacy = time_call(lambda: preprocess_frame_legacy(df.copy()), repeat=repeat)
+    vectorized = time_call(lambda: preprocess_frame(df.copy()), repeat=repeat)
+    return {
+        'rows': len(df),
+        'legacy_seconds': legacy,
+        'vectorized_seconds': vectorized,
+        'speedup': legacy / vectorized,
+    }
+
+
+def check_chunked_preprocessing(file_path: str, chunksize: int = EQUIVALENCE_CHUNK_SIZE) -> None:
+    """
+    Проверяет, что preprocess_file_chunked записывает тот же файл, что preprocess_data с сохранением
+    через to_csv (так сохраняет кнопка «Предобработка»).
+
+    Raises:
+        AssertionError: Если файлы различаются.
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        single_path = os.path.join(folder, 'single.csv')
+        chunked_path = os.path.join(folder, 'chunked.csv')
+        preprocess_data(file_path).to_csv(single_path, index=False)
+        preprocess_file_chunked(file_path, chunked_path, chunksize=chunksize)
+        with open(single_path, 'rb') as single, open(chunked_path, 'rb') as chunked:
+            if single.read() != chunked.read():
+                raise AssertionError(f"Предобработка по фрагментам ({chunksize} строк) дает другой результат, "
+                                     f"чем предобработка файла целиком")
+
+
+def scaled_copy(file_path: str, rows: int, output_folder: str) -> str:
+    """Записывает в output_folder файл из строк file_path, повторенных до нужного числа строк."""
+    df = pd.read_csv(file_path)
+    df = pd.concat([df] * (rows // len(df) + 1), ignore_index=True).iloc[:rows]
+    output_path = os.path.join(output_folder, f"scaled_{rows}.csv")
+    df.to_csv(output_path, index=False)
+    return output_path
+
+
+def benchmark_csv_cache(file_path: str, repeat: int = 3) -> Dict[str, float]:
+    """
+    Сравнивает pd.read_csv с чтением через бинарную копию (csv_cache).
+
+    Args:
+        file_path (str): Путь к CSV файлу.
+        repeat (int): Число запусков.
+
+    Returns:
+        Dict[str, float]: Число строк, время чтения CSV, первого чтения с записью копии,
+        повторного чтения из копии и ускорение.
+    """
+    read_options = {'parse_dates': ['Дата']}
+    cache_path = cache_path_for(file_path, read_options)
+    if os.path.exists(cache_path):
+        os.remove(cache_path)
+
+    started = time.perf_counter()
+    df = read_csv_cached(file_path, **read_options)
+    first_read = time.perf_counter() - started
+
+    csv_read = time_call(lambda: pd.read_csv(file_path, **read_options), repeat=repeat)
+    cached_read = time_call(lambda: read_csv_cached(file_path, **read_options), repeat=repeat)
+    return {
+        'rows': len(df),
+        'csv_seconds': csv_read,
+        'first_cached_seconds': first_read,
+        'cached_seconds': cached_read,
+        'speedup': csv_read / cached_read,
+    }
+
+
+@contextlib.contextmanager
+def working_directory(path: str) -> Iterator[None]:
+    """Временно делает path текущей папкой: функции разделения пишут в dataset/ относительно нее."""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def drop_caches(file_path: str) -> None:
+    """Удаляет бинарные копии файла (папку __cache__ рядом с ним) и очищает кэш таблиц в памяти."""
+    shutil.rmtree(os.path.join(os.path.dirname(os.path.abspath(file_path)), CACHE_DIR_NAME), ignore_errors=True)
+    frame_cache.clear()
+
+
+def time_stage(func: Callable[[], Any], repeat: int = 1,
+               setup: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """
+    Замеряет этап набора: каждый запуск предваряется setup (не входит в замер).
+
+    Returns:
+        Dict[str, Any]: Лучшее время ('seconds') и время каждого запуска ('runs').
+    """
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - started)
+    return {'seconds': min(runs), 'runs': runs}
+
+
+def time_lookups(lookup: Callable[[Any], Any], dates: List[Any]) -> Dict[str, Any]:
+    """
+    Замеряет поиск по дате: первый запрос (с загрузкой индексов и файлов) и остальные.
+
+    Returns:
+        Dict[str, Any]: Время первого запроса, среднее время остальных и число найденных дат.
+    """
+    frame_cache.clear()
+    started = time.perf_counter()
+    found = lookup(dates[0]) is not None
+    first = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for d in dates[1:]:
+        found += lookup(d) is not None
+    rest = time.perf_counter() - started
+    return {
+        'seconds': first + rest,
+        'first_seconds': first,
+        'per_lookup_seconds': rest / max(1, len(dates) - 1),
+        'lookups': len(dates),
+        'found': int(found),
+    }
+
+
+def benchmark_table(file_path: str, repeat: int = 1) -> Dict[str, Any]:
+    """Замеряет OptimizedTableWidget.load_data на предобработанных данных файла (Qt без экрана)."""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication
+    from optimized_table import OptimizedTableWidget
+
+    app = QApplication.instance() or QApplication([])
+    df = preprocess_data(file_path)
+    table = OptimizedTableWidget()
+    result = time_stage(lambda: table.load_data(df), repeat)
+    table.clear()
+    app.processEvents()
+    return result
+
+
+def benchmark_suite(rows: int, folder: str, repeat: int = 1, lookups: int = 100,
+                    skip: Optional[List[str]] = None, seed: int = 0) -> Dict[str, Any]:
+    """
+    Замеряет все этапы обработки на синтетическом файле из rows строк.
+
+    Файл создается synthetic_data в формате скрапера (несколько десятилетий, для
+    больших размеров - много станций). Этапы, читающие файл, запускаются без
+    бинарных копий и кэша в памяти, то есть замеряется первая обработка файла.
+
+    Args:
+        rows (int): Число строк синтетического файла.
+        folder (str): Рабочая папка; файл и результаты разделения создаются в ней.
+        repeat (int): Число запусков каждого этапа.
+        lookups (int): Число случайных дат для поиска.
+        skip (Optional[List[str]]): Этапы из SUITE_STAGES, которые нужно пропустить.
+        seed (int): Начальное значение генераторов данных и дат.
+
+    Returns:
+        Dict[str, Any]: Параметры файла и результаты этапов ('stages').
+    """
+    skip = set(skip or [])
+    start_year, end_year, stations = layout_for_rows(rows)
+    file_path = os.path.join(folder, 'dataset', f"synthetic_{rows}.csv")
+    file_name = os.path.splitext(os.path.basename(file_path))[0]
+
+    started = time.perf_counter()
+    generate_dataset(file_path, start_year, end_year, stations, max_rows=rows, seed=seed)
+    result: Dict[str, Any] = {
+        'rows': rows,
+        'years': [start_year, end_year],
+        'stations': stations,
+        'file_bytes': os.path.getsize(file_path),
+        'generate_seconds': time.perf_counter() - started,
+        'stages': {},
+    }
+    stages = result['stages']
+
+    def reset() -> None:
+        drop_caches(file_path)
+
+    with working_directory(folder):
+        if 'preprocess' not in skip:
+            stages['preprocess'] = time_stage(lambda: preprocess_data(file_path), repeat, reset)
+        # Результаты разделения нужны для поиска по дате, поэтому оно выполняется всегда
+        stages['split-xy'] = time_stage(lambda: split_csv(file_path), repeat, reset)
+        stages['split-week'] = time_stage(lambda: split_by_week(file_path), repeat, reset)
+        stages['split-year'] = time_stage(lambda: split_by_year(file_path), repeat, reset)
+
+        dates = pd.to_datetime(pd.read_csv(file_path, usecols=['Дата'])['Дата'], format='%Y-%m-%d')
+        rng = np.random.default_rng(seed)
+        sample = [d.date() for d in dates.iloc[rng.integers(0, len(dates), max(1, lookups))]]
+        split_folder = os.path.join('dataset', 'split_csv', file_name)
+        x_file, y_file = os.path.join(split_folder, 'X.csv'), os.path.join(split_folder, 'Y.csv')
+        lookup_functions = {
+            'lookup-original': lambda d: get_data_by_date_original(d, file_path),
+            'lookup-split': lambda d: get_data_by_date_split(d, x_file, y_file),
+            'lookup-yearly': lambda d: get_data_by_date_yearly(d, os.path.join('dataset', 'yearly_data', file_name)),
+            'lookup-weekly': lambda d: get_data_by_date_weekly(d, os.path.join('dataset', 'weekly_data', file_name)),
+        }
+        for stage, lookup in lookup_functions.items():
+            if stage not in skip:
+                stages[stage] = time_lookups(lookup, sample)
+
+        if 'iterator-rows' not in skip:
+            stages['iterator-rows'] = time_stage(lambda: sum(1 for _ in WeatherIterator(file_path)), repeat)
+        if 'iterator-batches' not in skip:
+            stages['iterator-batches'] = time_stage(
+                lambda: sum(len(batch) for batch in WeatherIterator(file_path).iter_batches()), repeat)
+        if 'annotation' not in skip:
+            annotation_path = os.path.join(folder, f"{file_name}_annotation.csv")
+            stages['annotation'] = time_stage(lambda: create_annotation_file(file_path, annotation_path),
+                                              repeat, reset)
+        if 'table' not in skip:
+            stages['table'] = benchmark_table(file_path, repeat)
+
+    for stage in stages.values():
+        stage['rows_per_second'] = rows / stage['seconds'] if stage['seconds'] > 0 else None
+    return result
+
+
+def environment_info() -> Dict[str, Any]:
+    """Возвращает сведения о системе и версиях библиотек для сравнения запусков."""
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+
+def run_suite(sizes: List[int], output_path: str, repeat: int = 1, lookups: int = 100,
+              skip: Optional[List[str]] = None, keep: Optional[str] = None,
+              profile: bool = False) -> Dict[str, Any]:
+    """
+    Выполняет benchmark_suite для каждого размера и записывает результаты в JSON.
+
+    Файл результатов дописывается после каждого размера, поэтому прерванный запуск
+    сохраняет уже полученные замеры.
+
+    Args:
+        sizes (List[int]): Размеры синтетических файлов в строках.
+        output_path (str): Путь к JSON файлу результатов.
+        repeat (int): Число запусков каждого этапа.
+        lookups (int): Число случайных дат для поиска.
+        skip (Optional[List[str]]): Пропускаемые этапы.
+        keep (Optional[str]): Папка для синтетических файлов; по умолчанию - временная,
+            удаляемая после замеров.
+        profile (bool): Добавить к результатам каждого размера замеры этапов profiling ('profile').
+
+    Returns:
+        Dict[str, Any]: Сведения о системе ('environment') и результаты по размерам ('results').
+    """
+    report: Dict[str, Any] = {'environment': environment_info(), 'repeat': repeat, 'results': []}
+    if profile:
+        enable()
+    with contextlib.ExitStack() as stack:
+        folder = keep or stack.enter_context(tempfile.TemporaryDirectory())
+        os.makedirs(folder, exist_ok=True)
+        for rows in sizes:
+            registry.reset()
+            result = benchmark_suite(rows, os.path.abspath(folder), repeat, lookups, skip)
+            if profile:
+                result['profile'] = registry.snapshot()
+            report['results'].append(result)
+            print_suite(result)
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+def compare_reports(baseline_path: str, current_path: str) -> None:
+    """Печатает отношение времени этапов двух JSON отчетов run_suite для одинаковых размеров."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {result['rows']: result for result in json.load(f)['results']}
+    with open(current_path, encoding='utf-8') as f:
+        current = json.load(f)['results']
+
+    for result in current:
+        previous = baseline.get(result['rows'])
+        if previous is None:
+            continue
+        print(f"Строк: {result['rows']}")
+        for stage, values in result['stages'].items():
+            before = previous['stages'].get(stage)
+            if before is None:
+                continue
+            ratio = before['seconds'] / values['seconds'] if values['seconds'] > 0 else float('inf')
+            print(f"  {stage:<18} {before['seconds']:>10.3f} с -> {values['seconds']:>10.3f} с  ({ratio:.2f}x)")
+
+
+def parse_importtime(output: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Разбирает вывод python -X importtime.
+
+    Returns:
+        Dict[str, Tuple[int, int]]: Для каждого импортированного модуля собственное
+        и накопленное (с вложенными импортами) время в микросекундах.
+    """
+    modules: Dict[str, Tuple[int, int]] = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        # Первая строка вывода - заголовок столбцов
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        modules[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return modules
+
+
+def measure_startup(module: str, repeat: int = 5) -> Dict[str, Any]:
+    """
+    Замеряет импорт модуля в новом процессе python -X importtime.
+
+    Каждый запуск - отдельный процесс, поэтому уже загруженные модули не искажают замер;
+    берется лучший запуск, так как первый еще компилирует .pyc.
+
+    Args:
+        module (str): Импортируемый модуль (например, 'main_window').
+        repeat (int): Число запусков.
+
+    Returns:
+        Dict[str, Any]: Время импорта модуля ('import_ms'), время всего процесса ('process_ms'),
+        загруженные запрещенные модули ('forbidden') и модули с наибольшим собственным временем ('slowest').
+    """
+    folder = os.path.dirname(os.path.abspath(__file__))
+    best: Optional[Dict[str, Any]] = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                                   cwd=folder, capture_output=True, text=True)
+        process_ms = (time.perf_counter() - started) * 1000
+        if completed.returncode != 0:
+            raise RuntimeError(f"Не удалось импортировать {module}:\n{completed.stderr[-2000:]}")
+        modules = parse_importtime(completed.stderr)
+        import_ms = modules[module][1] / 1000
+        if best is None or import_ms < best['import_ms']:
+            slowest = sorted(modules.items(), key=lambda item: -item[1][0])[:10]
+            best = {
+                'import_ms': import_ms,
+                'process_ms': process_ms,
+                'modules': len(modules),
+                'forbidden': [name for name in STARTUP_FORBIDDEN if name in modules],
+                'slowest': [{'module': name, 'self_ms': own / 1000} for name, (own, _) in slowest],
+            }
+    return {'module': module, 'repeat': repeat, **best}
+
+
+def run_startup(modules: List[str], repeat: int = 5, output_path: Optional[str] = None,
+                budget_ms: Optional[float] = None) -> int:
+    """
+    Замеряет запуск модулей и проверяет, что он не стал медленнее: для проверки в CI.
+
+    Запуск считается регрессией, если загружается модуль из STARTUP_FORBIDDEN
+    или время импорта превышает бюджет.
+
+    Args:
+        modules (List[str]): Проверяемые модули.
+        repeat (int): Число запусков каждого модуля.
+        output_path (Optional[str]): JSON файл результатов.
+        budget_ms (Optional[float]): Бюджет для всех модулей вместо STARTUP_BUDGET_MS.
+
+    Returns:
+        int: 0, если все модули уложились в ограничения, иначе 1.
+    """
+    results = []
+    failures = []
+    for module in modules:
+        result = measure_startup(module, repeat)
+        result['budget_ms'] = budget_ms if budget_ms is not None else STARTUP_BUDGET_MS.get(module)
+        results.append(result)
+        print(f"Импорт {module}: {result['import_ms']:.1f} мс (процесс {result['process_ms']:.1f} мс, "
+              f"модулей: {result['modules']})")
+        for slow in result['slowest'][:5]:
+            print(f"  {slow['module']:<32} {slow['self_ms']:>8.1f} мс")
+        if result['forbidden']:
+            failures.append(f"{module} загружает при запуске: {', '.join(result['forbidden'])}")
+        if result['budget_ms'] is not None and result['import_ms'] > result['budget_ms']:
+            failures.append(f"{module} импортируется {result['import_ms']:.1f} мс, "
+                            f"бюджет {result['budget_ms']:.0f} мс")
+
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump({'environment': environment_info(), 'results': results}, f, ensure_ascii=False, indent=2)
+    for failure in failures:
+        print(f"Регрессия запуска: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def print_suite(result: Dict[str, Any]) -> None:
+    print(f"Набор замеров, строк: {result['rows']} "
+          f"({result['years'][0]}-{result['years'][1]}, станций: {result['stations']})")
+    for stage, values in result['stages'].items():
+        line = f"  {stage:<18} {values['seconds']:>10.3f} с"
+        if 'per_lookup_seconds' in values:
+            line += f"  (первый {values['first_seconds']:.3f} с, далее {values['per_lookup_seconds'] * 1000:.3f} мс)"
+        print(line)
+
+
+def print_preprocessing(result: Dict[str, float]) -> None:
+    print(f"Предобработка, строк: {result['rows']}")
+    print(f"  исходная реализация:      {result['legacy_seconds']:.3f} с")
+    print(f"  векторизованная:          {result['vectorized_seconds']:.3f} с")
+    print(f"  ускорение:                {result['speedup']:.1f}x")
+
+
+def print_csv_cache(result: Dict[str, float]) -> None:
+    print(f"Чтение CSV, строк: {result['rows']}")
+    print(f"  pd.read_csv:              {result['csv_seconds']:.3f} с")
+    print(f"  первое чтение с записью:  {result['first_cached_seconds']:.3f} с")
+    print(f"  из бинарной копии:        {result['cached_seconds']:.3f} с")
+    print(f"  ускорение:                {result['speedup']:.1f}x")
+
+
+def print_memory(file_path: str) -> None:
+    report = memory_report(pd.read_csv(file_path))
+    print(f"Память, {file_path}:")
+    for column, usage in report.items():
+        print(f"  {column:<42} {usage['before'] / 1024:>10.1f} КБ -> {usage['after'] / 1024:>10.1f} КБ")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Замеры производительности WeatherDataHub")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    preprocessing = subparsers.add_parser('preprocessing', help="векторизованная и исходная предобработка")
+    preprocessing.add_argument('--file', default=DEFAULT_FILE, help="исходный CSV файл")
+    preprocessing.add_argument('--scale', type=int, default=1, help="во сколько раз размножить строки файла")
+    preprocessing.add_argument('--repeat', type=int, default=3, help="число запусков каждой реализации")
+
+    csv_cache = subparsers.add_parser('csv-cache', help="чтение CSV и чтение через бинарную копию")
+    csv_cache.add_argument('--file', default=DEFAULT_FILE, help="исходный CSV файл")
+    csv_cache.add_argument('--rows', type=int, nargs='*', default=[1_000_000],
+                           help="размеры синтетических файлов (строки исходного файла повторяются)")
+    csv_cache.add_argument('--repeat', type=int, default=3, help="число запусков")
+
+    memory = subparsers.add_parser('memory', help="память до и после приведения к схеме типов")
+    memory.add_argument('files', nargs='*', default=sorted(glob.glob('dataset/*.csv')), help="CSV файлы")
+
+    suite = subparsers.add_parser('suite', help="все этапы на синтетических файлах, результаты в JSON")
+    suite.add_argument('--rows', type=int, nargs='*', default=SUITE_SIZES, help="размеры синтетических файлов")
+    suite.add_argument('--repeat', type=int, default=1, help="число запусков каждого этапа")
+    suite.add_argument('--lookups', type=int, default=100, help="число случайных дат для поиска")
+    suite.add_argument('--skip', nargs='*', default=[], choices=SUITE_STAGES, help="пропускаемые этапы")
+    suite.add_argument('--output', default='benchmark_results.json', help="JSON файл результатов")
+    suite.add_argument('--keep', help="папка для синтетических файлов (по умолчанию - временная)")
+    suite.add_argument('--profile', action='store_true', help="добавить замеры этапов (profiling.py)")
+
+    compare = subparsers.add_parser('compare', help="сравнение двух JSON файлов набора замеров")
+    compare.add_argument('baseline', help="результаты предыдущего запуска")
+    compare.add_argument('current', help="результаты нового запуска")
+
+    startup = subparsers.add_parser('startup', help="время импорта окна и меню (-X importtime), проверка для CI")
+    startup.add_argument('modules', nargs='*', default=STARTUP_MODULES, help="проверяемые модули")
+    startup.add_argument('--repeat', type=int, default=5, help="число запусков каждого модуля")
+    startup.add_argument('--budget-ms', type=float, help="бюджет импорта для всех модулей, мс")
+    startup.add_argument('--output', help="JSON файл результатов")
+
+    args = parser.parse_args()
+
+    if args.benchmark == 'preprocessing':
+        print_preprocessing(benchmark_preprocessing(args.file, args.scale, args.repeat))
+    elif args.benchmark == 'csv-cache':
+        print_csv_cache(benchmark_csv_cache(args.file, args.repeat))
+        with tempfile.TemporaryDirectory() as folder:
+            for rows in args.rows:
+                print_csv_cache(benchmark_csv_cache(scaled_copy(args.file, rows, folder), args.repeat))
+    elif args.benchmark == 'memory':
+        for file_path in args.files:
+            print_memory(file_path)
+    elif args.benchmark == 'suite':
+        run_suite(args.rows, args.output, args.repeat, args.lookups, args.skip, args.keep, args.profile)
+        print(f"Результаты записаны в {args.output}")
+    elif args.benchmark == 'compare':
+        compare_reports(args.baseline, args.current)
+    elif args.benchmark == 'startup':
+        return run_startup(args.modules, args.repeat, args.output, args.budget_ms)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+import hashlib
+import json
+import os
+import struct
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from profiling import span
+from schema import SCHEMA_VERSION, apply_schema
+
+CACHE_DIR_NAME = '__cache__'
+CACHE_SUFFIX = '.cache'
+# Формат копии: MAGIC, длина заголовка (8 байт), заголовок JSON и массивы NumPy подряд.
+# Файл только описывает данные и не содержит кода, поэтому чтение чужой копии безопасно
+MAGIC = b'WDHCACHE'
+FORMAT_VERSION = 1
+ARRAY_ALIGNMENT = 64
+# Виды массивов, которые хранятся как есть: логические, числа, даты и интервалы
+ARRAY_KINDS = 'biufcmM'
+# Классы, объекты которых можно сохранять (см. register_type)
+SERIALIZABLE_TYPES: Dict[str, type] = {}
+
+
+def cache_path_for(file_path: str, read_options: dict) -> str:
+    """
+    Возвращает путь к бинарной копии CSV файла для заданных параметров чтения.
+
+    Копии хранятся в папке __cache__ рядом с CSV файлом; параметры чтения входят в имя,
+    поэтому один файл, прочитанный по-разному, получает разные копии.
+    """
+    options_key = hashlib.sha1(repr(sorted(read_options.items())).encode('utf-8')).hexdigest()[:12]
+    folder, name = os.path.split(os.path.abspath(file_path))
+    return os.path.join(folder, CACHE_DIR_NAME, f"{name}.{options_key}{CACHE_SUFFIX}")
+
+
+def file_signature(file_path: str) -> Tuple[int, int]:
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def register_type(cls: type) -> type:
+    """
+    Разрешает сохранять объекты класса в бинарных копиях (используется как декоратор).
+
+    Объект сохраняется своим состоянием (__getstate__ или __dict__) и восстанавливается
+    без вызова __init__ через __setstate__ или обновление __dict__.
+    """
+    SERIALIZABLE_TYPES[cls.__name__] = cls
+    return cls
+
+
+def array_dtype(spec: str) -> np.dtype:
+    """Возвращает тип массива из заголовка, допуская только типы без объектов Python."""
+    dtype = np.dtype(spec)
+    if dtype.hasobject or dtype.kind not in ARRAY_KINDS:
+        raise ValueError(f"Недопустимый тип массива: {spec}")
+    return dtype
+
+
+def encode_values(values: Any, arrays: List[np.ndarray]) -> Dict[str, Any]:
+    """Описывает значения столбца, Series или Index: массив, категории или коды уникальных значений."""
+    if isinstance(values, (pd.Series, pd.Index)):
+        if isinstance(values.dtype, pd.StringDtype):
+            # Строковый тип pandas хранится как объекты; тип восстанавливается по имени
+            return {**encode_values(values.to_numpy(dtype=object), arrays), 'dtype': str(values.dtype)}
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.array
+        elif isinstance(values.dtype, np.dtype):
+            values = values.to_numpy()
+    if isinstance(values, pd.Categorical):
+        return {'$': 'categorical', 'codes': encode(values.codes, arrays),
+                'categories': encode_values(values.categories, arrays), 'ordered': bool(values.ordered)}
+    if not isinstance(values, np.ndarray):
+        raise TypeError(f"Тип {values.dtype} нельзя сохранить в бинарной копии")
+    if values.dtype == object:
+        # Строки (и пропуски) хранятся кодами и списком уникальных значений
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        return {'$': 'factorized', 'codes': encode(codes.astype(np.int32), arrays),
+                'uniques': [encode(value, arrays) for value in uniques]}
+    return encode(values, arrays)
+
+
+def decode_values(node: Dict[str, Any], arrays: List[np.ndarray]) -> Any:
+    if node['$'] == 'categorical':
+        return pd.Categorical.from_codes(decode(node['codes'], arrays), decode_values(node['categories'], arrays),
+                                         ordered=node['ordered'])
+    if node['$'] == 'factorized':
+        codes = decode(node['codes'], arrays)
+        uniques = np.empty(len(node['uniques']) + 1, dtype=object)
+        uniques[:-1] = [decode(value, arrays) for value in node['uniques']]
+        uniques[-1] = np.nan
+        # Код -1 (пропуск) выбирает последний элемент - NaN
+        values = uniques[codes]
+        if 'dtype' not in node:
+            return values
+        dtype = pd.api.types.pandas_dtype(node['dtype'])
+        if not isinstance(dtype, pd.StringDtype):
+            raise ValueError(f"Недопустимый тип значений: {node['dtype']}")
+        return pd.array(values, dtype=dtype)
+    return decode(node, arrays)
+
+
+def encode(value: Any, arrays: List[np.ndarray]) -> Any:
+    """
+    Преобразует значение в описание для заголовка JSON, складывая массивы в arrays.
+
+    Поддерживаются числа, строки, списки, словари, массивы NumPy, даты, Index, Series,
+    DataFrame и объекты зарегистрированных классов; для остального - TypeError.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.datetime64):
+        return {'$': 'datetime64', 'value': str(value)}
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is pd.NaT:
+        return {'$': 'nat'}
+    if isinstance(value, pd.Timestamp):
+        return {'$': 'timestamp', 'value': value.isoformat()}
+    if isinstance(value, (list, tuple)):
+        return [encode(item, arrays) for item in value]
+    if isinstance(value, dict):
+        return {'$': 'dict', 'items': [[encode(key, arrays), encode(item, arrays)] for key, item in value.items()]}
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return {'$': 'objects', 'items': [encode(item, arrays) for item in value.tolist()]}
+        array_dtype(value.dtype.str)
+        arrays.append(np.ascontiguousarray(value))
+        return {'$': 'array', 'index': len(arrays) - 1}
+    if isinstance(value, pd.RangeIndex):
+        return {'$': 'range', 'start': value.start, 'stop': value.stop, 'step': value.step,
+                'name': encode(value.name, arrays)}
+    if isinstance(value, pd.MultiIndex):
+        raise TypeError("MultiIndex нельзя сохранить в бинарной копии")
+    if isinstance(value, pd.Index):
+        return {'$': 'index', 'values': encode_values(value, arrays), 'name': encode(value.name, arrays)}
+    if isinstance(value, pd.Series):
+        return {'$': 'series', 'values': encode_values(value, arrays), 'index': encode(value.index, arrays),
+                'name': encode(value.name, arrays)}
+    if isinstance(value, pd.DataFrame):
+        values = [encode_values(value.iloc[:, position], arrays) for position in range(value.shape[1])]
+        return {'$': 'frame', 'values': values, 'columns': encode(value.columns, arrays),
+                'index': encode(value.index, arrays)}
+    name = type(value).__name__
+    if SERIALIZABLE_TYPES.get(name) is type(value):
+        state = value.__getstate__() if hasattr(value, '__getstate__') else vars(value)
+        return {'$': 'object', 'type': name, 'state': encode(state, arrays)}
+    raise TypeError(f"Тип {name} нельзя сохранить в бинарной копии")
+
+
+def decode(node: Any, arrays: List[np.ndarray]) -> Any:
+    """Восстанавливает значение по описанию encode."""
+    if isinstance(node, list):
+        return [decode(item, arrays) for item in node]
+    if not isinstance(node, dict):
+        return node
+    kind = node['$']
+    if kind == 'array':
+        return arrays[node['index']]
+    if kind == 'objects':
+        values = np.empty(len(node['items']), dtype=object)
+        values[:] = [decode(item, arrays) for item in node['items']]
+        return values
+    if kind == 'datetime64':
+        return np.datetime64(node['value'])
+    if kind == 'nat':
+        return pd.NaT
+    if kind == 'timestamp':
+        return pd.Timestamp(node['value'])
+    if kind == 'dict':
+        return {decode(key, arrays): decode(item, arrays) for key, item in node['items']}
+    if kind == 'range':
+        return pd.RangeIndex(node['start'], node['stop'], node['step'], name=decode(node['name'], arrays))
+    if kind == 'index':
+        return pd.Index(decode_values(node['values'], arrays), name=decode(node['name'], arrays))
+    if kind == 'series':
+        return pd.Series(decode_values(node['values'], arrays), index=decode(node['index'], arrays),
+                         name=decode(node['name'], arrays), copy=False)
+    if kind == 'frame':
+        data = {position: decode_values(values, arrays) for position, values in enumerate(node['values'])}
+        df = pd.DataFrame(data, index=decode(node['index'], arrays), copy=False)
+        df.columns = decode(node['columns'], arrays)
+        return df
+    if kind == 'object':
+        cls = SERIALIZABLE_TYPES.get(node['type'])
+        if cls is None:
+            raise ValueError(f"Неизвестный тип объекта: {node['type']}")
+        obj = cls.__new__(cls)
+        state = decode(node['state'], arrays)
+        if hasattr(obj, '__setstate__'):
+            obj.__setstate__(state)
+        else:
+            obj.__dict__.update(state)
+        return obj
+    raise ValueError(f"Неизвестный вид значения: {kind}")
+
+
+def write_data(path: str, data: Any, signature: Optional[Tuple[int, int]] = None) -> None:
+    """
+    Атомарно записывает данные в файл бинарной копии.
+
+    Args:
+        path (str): Путь к файлу.
+        data (Any): Данные (см. encode).
+        signature (Optional[Tuple[int, int]]): Сигнатура исходного файла, для которого создана копия.
+
+    Raises:
+        TypeError: Если данные содержат значения, которые нельзя сохранить.
+    """
+    arrays: List[np.ndarray] = []
+    node = encode(data, arrays)
+    specs = []
+    offset = 0
+    for array in arrays:
+        offset += -offset % ARRAY_ALIGNMENT
+        specs.append({'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset})
+        offset += array.nbytes
+    header = json.dumps({'version': FORMAT_VERSION, 'signature': list(signature) if signature else None,
+                         'arrays': specs, 'payload_bytes': offset, 'data': node},
+                        ensure_ascii=False).encode('utf-8')
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+            position = 0
+            for spec, array in zip(specs, arrays):
+                f.write(b'\0' * (spec['offset'] - position))
+                f.write(array.reshape(-1).view(np.uint8).data)
+                position = spec['offset'] + array.nbytes
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_header(f: BinaryIO) -> Dict[str, Any]:
+    """Читает заголовок бинарной копии, не трогая массивы данных."""
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Файл не является бинарной копией")
+    (length,) = struct.unpack('<Q', f.read(8))
+    header = json.loads(f.read(length).decode('utf-8'))
+    if header.get('version') != FORMAT_VERSION:
+        raise ValueError("Бинарная копия создана другой версией формата")
+    return header
+
+
+def read_payload(f: BinaryIO, header: Dict[str, Any]) -> Any:
+    """Читает массивы, следующие за заголовком, и восстанавливает данные."""
+    payload = bytearray(header['payload_bytes'])
+    if f.readinto(payload) != len(payload):
+        raise ValueError("Бинарная копия обрезана")
+    arrays = []
+    for spec in header['arrays']:
+        dtype = array_dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        # Массивы ссылаются на общий буфер без копирования и доступны для записи
+        arrays.append(np.frombuffer(payload, dtype=dtype, count=count, offset=spec['offset']).reshape(spec['shape']))
+    return decode(header['data'], arrays)
+
+
+def read_data(path: str) -> Any:
+    """
+    Читает данные, записанные write_data.
+
+    Raises:
+        ValueError: Если файл поврежден или не является бинарной копией.
+    """
+    with open(path, 'rb') as f:
+        try:
+            return read_payload(f, read_header(f))
+        except (KeyError, TypeError, IndexError, struct.error, UnicodeDecodeError) as e:
+            raise ValueError(f"Файл {path} поврежден: {e}") from e
+
+
+def load_cached(cache_path: str, signature: Tuple[int, int]) -> Any:
+    """
+    Читает бинарную копию, если она создана для файла с той же сигнатурой.
+
+    Сигнатура сверяется по заголовку до чтения данных. Возвращает None, если копии нет,
+    она устарела или повреждена.
+    """
+    try:
+        with open(cache_path, 'rb') as f:
+            header = read_header(f)
+            if tuple(header.get('signature') or ()) != tuple(signature):
+                return None
+            return read_payload(f, header)
+    except (OSError, ValueError, KeyError, TypeError, IndexError, struct.error, UnicodeDecodeError):
+        return None
+
+
+def store_cached(cache_path: str, signature: Tuple[int, int], data: Any) -> None:
+    """Атомарно записывает бинарную копию данных. Ошибки записи не мешают чтению данных."""
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        write_data(cache_path, data, signature)
+    except (OSError, TypeError):
+        pass
+
+
+def remove_cached(file_path: str) -> None:
+    """Удаляет все бинарные копии CSV файла (для любых параметров чтения)."""
+    folder, name = os.path.split(os.path.abspath(file_path))
+    cache_folder = os.path.join(folder, CACHE_DIR_NAME)
+    if not os.path.isdir(cache_folder):
+        return
+    for cache_file in os.listdir(cache_folder):
+        if cache_file.startswith(name + '.') and cache_file.endswith(CACHE_SUFFIX):
+            try:
+                os.remove(os.path.join(cache_folder, cache_file))
+            except OSError:
+                pass
+
+
+def read_csv_cached(file_path: str, compact: bool = False, **read_options: Any) -> pd.DataFrame:
+    """
+    Читает CSV файл так же, как pd.read_csv, но через бинарную копию.
+
+    При первом чтении результат pd.read_csv сохраняется в __cache__/<имя>.<ключ>.cache
+    (столбцы хранятся как непрерывные массивы NumPy, строки - кодами уникальных значений,
+    поэтому чтение не требует разбора текста и угадывания типов). Следующие чтения с теми же параметрами берут
+    данные из копии, пока у CSV файла не изменятся время модификации или размер.
+    Чтение по фрагментам (chunksize, iterator) и частичное чтение (nrows) идут мимо кэша.
+
+    Args:
+        file_path (str): Путь к CSV файлу.
+        compact (bool): Привести столбцы к компактным типам схемы (schema.apply_schema).
+            Копия хранится уже в компактных типах.
+        **read_options: Параметры pd.read_csv.
+
+    Returns:
+        pd.DataFrame: Данные файла.
+    """
+    if not isinstance(file_path, (str, os.PathLike)) or {'chunksize', 'iterator', 'nrows'} & set(read_options):
+        with span('csv.read'):
+            df = pd.read_csv(file_path, **read_options)
+        return apply_schema(df) if compact and isinstance(df, pd.DataFrame) else df
+
+    signature = file_signature(file_path)
+    cache_path = cache_path_for(file_path, {**read_options, 'compact': SCHEMA_VERSION} if compact else read_options)
+    with span('csv.cache_load'):
+        df = load_cached(cache_path, signature)
+    if df is None:
+        with span('csv.read'):
+            df = pd.read_csv(file_path, **read_options)
+        if compact:
+            with span('csv.schema'):
+                df = apply_schema(df)
+        with span('csv.cache_store'):
+            store_cached(cache_path, signature, df)
+    return df
@@ -1,15 +1,261 @@
+import os
 import pandas as pd
 import numpy as np
+from typing import Callable, Dict, Iterable, List, Optional
+from csv_cache import read_csv_cached
+from profiling import span
+from schema import FLAG_DTYPE, MEASUREMENT_DTYPE, WHOLE_MEASUREMENT_DTYPE
 
-def preprocess_data(file_path):
-    # Чтение CSV файла
-    df = pd.read_csv(file_path)
+VALID_CLOUD_TYPES = ['Ясно', 'Малооблачно', 'Переменная облачность', 'Пасмурно']
+WIND_DIRECTIONS = ['С', 'СВ', 'В', 'ЮВ', 'Ю', 'ЮЗ', 'З', 'СЗ']
+# Первое слово строки ветра - направление, последнее - скорость («СЗ 3м/с»)
+WIND_PATTERN = r'^\s*(?P<direction>\S+)(?:.*?(?P<last>\S+))?\s*$'
+ENGINES = ('vectorized', 'legacy')
+DEFAULT_CHUNK_SIZE = 100_000
+# Целое число без дробной части: так pd.read_csv решает, что столбец можно хранить как int64
+INTEGER_PATTERN = r'[+-]?\d+'
 
+
+def preprocess_data(file_path, engine='vectorized', progress_callback=None, chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    Читает CSV файл и преобразует его к числовому виду.
+
+    Args:
+        file_path (str): Путь к исходному CSV файлу.
+        engine (str): 'vectorized' (по умолчанию) или 'legacy' - исходная построчная реализация.
+            Оба варианта дают одинаковый набор и порядок столбцов.
+        progress_callback (Optional[Callable[[int], None]]): Получает процент выполнения
+            после чтения файла и после каждого обработанного фрагмента.
+        chunksize (int): Число строк, обрабатываемых за один шаг.
+
+    Returns:
+        pd.DataFrame: Предобработанные данные в типах output_schema - тех же, что
+        у файла, который записывает preprocess_file_chunked.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Неизвестный способ обработки: {engine}. Доступны: {', '.join(ENGINES)}")
+
+    # Чтение CSV файла: температура и давление остаются строками до parse_temperature/parse_pressure,
+    # иначе «−5» с типографским минусом стало бы NaN. Исходная реализация читает файл как раньше.
+    df = read_csv_cached(file_path) if engine == 'legacy' else read_csv_cached(file_path, dtype=str)
+    if progress_callback is not None:
+        progress_callback(30)
+
+    schema = output_schema(list(df.columns), integer_columns(df))
+    process = preprocess_frame_legacy if engine == 'legacy' else preprocess_frame
+    parts = []
+    for start in range(0, len(df), chunksize):
+        chunk = process(df.iloc[start:start + chunksize])
+        parts.append(chunk.reindex(columns=list(schema)).astype(schema))
+        if progress_callback is not None:
+            progress_callback(30 + 60 * min(len(df), start + chunksize) // len(df))
+
+    with span('preprocess.merge'):
+        if not parts:
+            return pd.DataFrame(columns=list(schema)).astype(schema)
+        return pd.concat(parts) if len(parts) > 1 else parts[0]
+
+
+def preprocess_frame(df):
+    """Векторизованная предобработка DataFrame: каждый столбец разбирается за один проход."""
+    cloud_columns = [col for col in df.columns if 'Облачность' in col]
+    wind_columns = [col for col in df.columns if 'Ветер' in col]
+    base = df.drop(columns=cloud_columns + wind_columns)
+
+    # Облачность: по одному столбцу-индикатору на каждый тип
+    cloud_block = {}
+    with span('preprocess.cloudiness'):
+        for col in cloud_columns:
+            codes, uniques = factorize(df[col])
+            for cloud_type in VALID_CLOUD_TYPES:
+                cloud_block[f"{col}-{cloud_type}"] = indicator(uniques == cloud_type, codes)
+
+    # Ветер: каждое уникальное значение разбирается одним регулярным выражением,
+    # результат раскладывается по строкам через коды factorize
+    wind_block = {}
+    with span('preprocess.wind'):
+        for col in wind_columns:
+            codes, uniques = factorize(df[col])
+            parts = uniques.str.extract(WIND_PATTERN)
+            direction = parts['direction'].to_numpy(dtype=object)
+            has_speed = uniques.str.contains('м/с', regex=False).to_numpy(dtype=bool)
+            if has_speed.any():
+                last = parts['last'].fillna(parts['direction'])
+                speed_by_value = last.where(has_speed).str.replace('м/с', '', regex=False).astype(float).fillna(0)
+                speed = np.append(speed_by_value.to_numpy(dtype=float), 0.0)[codes]
+            else:
+                speed = np.zeros(len(df), dtype=int)
+            wind_block[f"{col} (м/с)"] = speed
+            for direction_name in WIND_DIRECTIONS:
+                wind_block[f"{col}-{direction_name}"] = indicator(direction == direction_name, codes)
+
+    # Преобразование температуры в числовой формат
+    with span('preprocess.temperature'):
+        for col in [col for col in base.columns if 'Температура' in col]:
+            base[col] = parse_temperature(base[col])
+
+    # Преобразование давления в числовой формат
+    with span('preprocess.pressure'):
+        for col in [col for col in base.columns if 'Давление' in col]:
+            base[col] = parse_pressure(base[col])
+
+    with span('preprocess.concat'):
+        df = pd.concat([base, pd.DataFrame(cloud_block, index=df.index), pd.DataFrame(wind_block, index=df.index)],
+                       axis=1)
+
+        # Заполнение оставшихся NaN значений нулями
+        return df.fillna(0)
+
+
+def output_schema(columns: List[str], whole_columns: Iterable[str] = ()) -> Dict[str, str]:
+    """
+    Возвращает столбцы и типы результата предобработки для заданного заголовка исходного файла.
+
+    Типы компактные (schema.py) и записываются в CSV так же, как исходная реализация:
+    индикаторы - целыми («1»), температура и скорость ветра - с дробной частью («-20.0»),
+    давление - целым («765»), только если весь исходный столбец состоит из целых чисел
+    без пропусков (см. integer_columns), иначе с дробной частью («765.0»).
+
+    Args:
+        columns (List[str]): Заголовок исходного файла.
+        whole_columns (Iterable[str]): Столбцы давления, которые записываются целыми.
+
+    Returns:
+        Dict[str, str]: Столбцы результата и их типы.
+    """
+    whole_columns = set(whole_columns)
+    base: Dict[str, str] = {}
+    cloud: Dict[str, str] = {}
+    wind: Dict[str, str] = {}
+    for col in columns:
+        if 'Облачность' in col:
+            for cloud_type in VALID_CLOUD_TYPES:
+                cloud[f"{col}-{cloud_type}"] = FLAG_DTYPE
+        elif 'Ветер' in col:
+            wind[f"{col} (м/с)"] = MEASUREMENT_DTYPE
+            for direction in WIND_DIRECTIONS:
+                wind[f"{col}-{direction}"] = FLAG_DTYPE
+        elif 'Давление' in col and col in whole_columns:
+            base[col] = WHOLE_MEASUREMENT_DTYPE
+        elif 'Температура' in col or 'Давление' in col:
+            base[col] = MEASUREMENT_DTYPE
+        else:
+            base[col] = 'object'
+    return {**base, **cloud, **wind}
+
+
+def integer_columns(df: pd.DataFrame) -> List[str]:
+    """Возвращает столбцы давления, все значения которых - целые числа без пропусков."""
+    columns = []
+    for col in [col for col in df.columns if 'Давление' in col]:
+        values = df[col]
+        if values.notna().all() and values.astype(str).str.fullmatch(INTEGER_PATTERN).all():
+            columns.append(col)
+    return columns
+
+
+def file_integer_columns(file_path: str, chunksize: int = DEFAULT_CHUNK_SIZE) -> List[str]:
+    """
+    integer_columns для всего файла; читаются только столбцы давления, по фрагментам.
+
+    Столбец остается целым, только если проходит проверку в каждом фрагменте.
+    """
+    header = list(pd.read_csv(file_path, nrows=0).columns)
+    candidates = [col for col in header if 'Давление' in col]
+    if not candidates:
+        return []
+    for chunk in pd.read_csv(file_path, usecols=candidates, chunksize=chunksize, encoding='utf-8', dtype=str):
+        candidates = [col for col in integer_columns(chunk) if col in candidates]
+        if not candidates:
+            break
+    return candidates
+
+
+def preprocess_file_chunked(file_path: str, output_path: str, chunksize: int = DEFAULT_CHUNK_SIZE,
+                            progress_callback: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Предобрабатывает CSV файл по фрагментам и дописывает результат в выходной файл.
+
+    В памяти одновременно находится только один фрагмент из chunksize строк, поэтому
+    так можно обработать файл, который не помещается в оперативную память. Результат
+    сначала пишется во временный файл и заменяет output_path только после успешной обработки.
+
+    Args:
+        file_path (str): Путь к исходному CSV файлу.
+        output_path (str): Путь для сохранения предобработанных данных.
+        chunksize (int): Число строк в одном фрагменте.
+        progress_callback (Optional[Callable[[int], None]]): Получает процент обработанного файла.
+            Исключение из него прерывает обработку; output_path при этом не меняется.
+
+    Returns:
+        int: Число обработанных строк.
+    """
+    total_bytes = os.path.getsize(file_path) or 1
+    tmp_path = output_path + '.tmp'
+    rows = 0
+    schema = None
+    # Тип столбца давления зависит от всего файла, поэтому определяется до записи первого фрагмента
+    whole_columns = file_integer_columns(file_path, chunksize)
+
+    try:
+        with open(file_path, 'rb') as source:
+            # Все столбцы читаются как строки: тип не угадывается заново для каждого фрагмента
+            for chunk in pd.read_csv(source, chunksize=chunksize, encoding='utf-8', dtype=str):
+                if schema is None:
+                    schema = output_schema(list(chunk.columns), whole_columns)
+                result = preprocess_frame(chunk).reindex(columns=list(schema)).astype(schema)
+                result.to_csv(tmp_path, mode='a' if rows else 'w', header=not rows, index=False)
+                rows += len(chunk)
+                if progress_callback is not None:
+                    progress_callback(min(100, int(source.tell() * 100 / total_bytes)))
+    except BaseException:
+        # Прерванная обработка (в том числе отмена через progress_callback) не оставляет временный файл
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    if schema is None:
+        pd.DataFrame(columns=list(output_schema(list(pd.read_csv(file_path, nrows=0).columns)))).to_csv(
+            tmp_path, index=False)
+    os.replace(tmp_path, output_path)
+    return rows
+
+
+def factorize(values):
+    """
+    Кодирует столбец целыми числами.
+
+    Returns:
+        Tuple[np.ndarray, pd.Series]: Коды строк (-1 для пропусков) и уникальные строковые значения.
+    """
+    codes, uniques = pd.factorize(values.astype(object))
+    return codes, pd.Series(uniques, dtype=object).astype(str)
+
+
+def indicator(matches_by_value, codes):
+    """Раскладывает признак уникальных значений по строкам; пропуски получают 0."""
+    return np.append(np.asarray(matches_by_value, dtype=bool), False)[codes].astype(int)
+
+
+def parse_pressure(values):
+    """Преобразует столбец давления в число; нечисловые значения («−», «Неизвестно») становятся 0."""
+    return pd.to_numeric(values, errors='coerce').fillna(0)
+
+
+def parse_temperature(values):
+    """Преобразует столбец температуры («+5», «−3», «Неизвестно») в float."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    values = values.astype(object).str.replace('+', '', regex=False).str.replace('−', '-', regex=False)
+    return values.replace('Неизвестно', '0').astype(float)
+
+
+def preprocess_frame_legacy(df):
+    """Исходная построчная предобработка; сохранена для сравнения производительности."""
     # Обработка столбца "Облачность"
     cloud_columns = [col for col in df.columns if 'Облачность' in col]
-    valid_cloud_types = ['Ясно', 'Малооблачно', 'Переменная облачность', 'Пасмурно']
     for col in cloud_columns:
-        for cloud_type in valid_cloud_types:
+        for cloud_type in VALID_CLOUD_TYPES:
             df[f"{col}-{cloud_type}"] = (df[col] == cloud_type).astype(int)
         df = df.drop(columns=[col])
 
@@ -18,12 +264,11 @@ def preprocess_data(file_path):
     for col in wind_columns:
         # Создаем столбец для скорости ветра
         df[f"{col} (м/с)"] = df[col].apply(lambda x: float(x.split()[-1].replace('м/с', '')) if isinstance(x, str) and 'м/с' in x else 0)
-        
+
         # Создаем столбцы для направлений ветра
-        directions = ['С', 'СВ', 'В', 'ЮВ', 'Ю', 'ЮЗ', 'З', 'СЗ']
-        for direction in directions:
+        for direction in WIND_DIRECTIONS:
             df[f"{col}-{direction}"] = (df[col].str.split().str[0] == direction).astype(int)
-        
+
         # Удаляем исходный столбец
         df = df.drop(columns=[col])
 
@@ -40,4 +285,4 @@ def preprocess_data(file_path):
     # Заполнение оставшихся NaN значений нулями
     df = df.fillna(0)
 
-    return df
\ No newline at end of file
+    return df
@@ -1,90 +1,227 @@
 import pandas as pd
+import numpy as np
 from datetime import date
 import os
-from typing import Dict, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from frame_cache import IndexedFrame, frame_cache
+from manifest import load_manifest
+from row_index import open_row_index, read_row
+from csv_cache import read_csv_cached
+from profiling import span
+from schema import apply_schema
+from station_store import StationStore, Stations, station_store
+
+DEFAULT_CHUNK_SIZE = 65536
+# Результаты is_sorted_by_date: путь -> ((mtime_ns, размер), упорядочен ли файл)
+_sorted_files: Dict[str, Tuple[Tuple[int, int], bool]] = {}
 
 def format_date(d: date) -> str:
     """Преобразует дату в строку формата YYYY-MM-DD."""
     return d.strftime("%Y-%m-%d")
 
-def get_data_by_date_original(date: date, file_path: str) -> Optional[Dict[str, str]]:
-    """Возвращает данные для указанной даты из оригинального CSV файла."""
-    df: pd.DataFrame = pd.read_csv(file_path, parse_dates=['Дата'])
-    df['Дата'] = df['Дата'].dt.date
-    row: pd.DataFrame = df[df['Дата'] == date]
-    if row.empty:
+def find_row(frame: IndexedFrame, date: date) -> Optional[Dict[str, str]]:
+    """Ищет строку с указанной датой в загруженном файле бинарным поиском."""
+    position = frame.find(date)
+    if position is None:
         return None
-    data = row.iloc[0].to_dict()
+    data = frame.record(position)
     data['Дата'] = format_date(data['Дата'])
     return data
 
+def is_sorted_by_date(file_path: str, chunksize: int = DEFAULT_CHUNK_SIZE) -> bool:
+    """
+    Проверяет, что даты строк файла не убывают (пустые и нераспознанные даты не учитываются).
+
+    Читается только столбец 'Дата'; результат запоминается до изменения файла.
+    """
+    stat = os.stat(file_path)
+    key, signature = os.path.abspath(file_path), (stat.st_mtime_ns, stat.st_size)
+    cached = _sorted_files.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    result = True
+    last = None
+    for chunk in pd.read_csv(file_path, usecols=['Дата'], chunksize=chunksize):
+        dates = pd.to_datetime(chunk['Дата'], format='%Y-%m-%d', errors='coerce').dropna()
+        if dates.empty:
+            continue
+        if not dates.is_monotonic_increasing or (last is not None and dates.iloc[0] < last):
+            result = False
+            break
+        last = dates.iloc[-1]
+    _sorted_files[key] = (signature, result)
+    return result
+
+def get_data_by_date_original(date: date, file_path: str) -> Optional[Dict[str, str]]:
+    """Возвращает данные для указанной даты из оригинального CSV файла."""
+    return find_row(frame_cache.get(file_path), date)
+
+def get_data_for_range(start: date, end: date, file_path: str) -> pd.DataFrame:
+    """Возвращает строки файла с датами из интервала [start, end], упорядоченные по дате."""
+    frame = frame_cache.get(file_path)
+    left, right = frame.date_range(start, end)
+    return frame.df.iloc[left:right]
+
 def get_data_by_date_split(date: date, x_file: str, y_file: str) -> Optional[Dict[str, str]]:
     """Возвращает данные для указанной даты из разделенных X.csv и Y.csv файлов."""
-    x_df: pd.DataFrame = pd.read_csv(x_file, parse_dates=['Date'])
-    x_df['Date'] = x_df['Date'].dt.date
-    y_df: pd.DataFrame = pd.read_csv(y_file)
-
-    row_index = x_df.index[x_df['Date'] == date]
-    if row_index.empty:
+    found = open_row_index(x_file, y_file).find(date)
+    if found is None:
         return None
 
-    y_row = y_df.iloc[row_index[0]]
-    return {'Дата': format_date(date), **y_row.to_dict()}
+    _, offset = found
+    return {'Дата': format_date(date), **read_row(y_file, offset)}
 
 def get_data_by_date_yearly(date: date, folder: str) -> Optional[Dict[str, str]]:
     """Возвращает данные для указанной даты из годовых файлов."""
-    year_file = os.path.join(folder, f"{date.year}0101_{date.year}1231.csv")
-    if not os.path.exists(year_file):
+    partition = load_manifest(folder).locate(date)
+    if partition is None:
         print(f"Файл для {date.year} года не найден.")
         return None
 
-    df: pd.DataFrame = pd.read_csv(year_file, parse_dates=['Дата'])
-    df['Дата'] = df['Дата'].dt.date
-    row: pd.DataFrame = df[df['Дата'] == date]
-    if row.empty:
-        return None
-    data = row.iloc[0].to_dict()
-    data['Дата'] = format_date(data['Дата'])
-    return data
+    return find_row(frame_cache.get(os.path.join(folder, partition['file'])), date)
 
 def get_data_by_date_weekly(date: date, folder: str) -> Optional[Dict[str, str]]:
     """Возвращает данные для указанной даты из недельных файлов."""
-    files = [f for f in os.listdir(folder) if f.endswith('.csv')]
-    for file in files:
-        start_date, end_date = file.split('_')
-        start_date = pd.to_datetime(start_date).date()
-        end_date = pd.to_datetime(end_date.split('.')[0]).date()
-        if start_date <= date <= end_date:
-            file_path = os.path.join(folder, file)
-            df: pd.DataFrame = pd.read_csv(file_path, parse_dates=['Дата'])
-            df['Дата'] = df['Дата'].dt.date
-            row: pd.DataFrame = df[df['Дата'] == date]
-            if not row.empty:
-                data = row.iloc[0].to_dict()
-                data['Дата'] = format_date(data['Дата'])
-                return data
+    partition = load_manifest(folder).locate(date)
+    if partition is not None:
+        data = find_row(frame_cache.get(os.path.join(folder, partition['file'])), date)
+        if data is not None:
+            return data
 
     print(f"Данные для даты {format_date(date)} не найдены.")
     return None
 
 
+def get_data_by_date_stations(date: date, stations: Stations = None,
+                              store: Optional[StationStore] = None) -> pd.DataFrame:
+    """
+    Возвращает данные станций за дату из хранилища станций.
+
+    Все станции за дату читаются одним чтением файла месяца, а не поиском
+    в файле каждой станции.
+
+    Args:
+        date (date): Дата.
+        stations (Stations): Станция, список станций или None - все станции хранилища.
+        store (Optional[StationStore]): Хранилище (по умолчанию - dataset/stations).
+
+    Returns:
+        pd.DataFrame: Строка на станцию; пустой DataFrame, если данных нет.
+    """
+    return (store or station_store).read_range(date, date, stations)
+
+def get_station_data_for_range(start: date, end: date, stations: Stations = None,
+                               store: Optional[StationStore] = None) -> pd.DataFrame:
+    """Возвращает данные станций за интервал [start, end], упорядоченные по дате и станции."""
+    return (store or station_store).read_range(start, end, stations)
+
 class WeatherIterator:
-    """Итератор для перебора данных о погоде."""
+    """
+    Итератор для перебора данных о погоде.
+
+    Данные читаются с диска фрагментами по chunksize строк, поэтому итератор создается
+    мгновенно и не держит в памяти весь файл. Источником может быть CSV файл или папка
+    с недельными/годовыми файлами: файлы папки перебираются в порядке дат по манифесту.
+    Строки отдаются в порядке дат. Файл, строки которого уже упорядочены по дате
+    (это проверяется один раз, см. is_sorted_by_date), читается потоково; файл с
+    неупорядоченными строками читается целиком и сортируется.
+
+    С use_cache=True каждый файл целиком читается из бинарной копии (csv_cache) и
+    нарезается на блоки: так перебор в несколько раз быстрее, но файл занимает память целиком.
+    """
+
+    def __init__(self, input_file: str, start: Optional[date] = None, end: Optional[date] = None,
+                 chunksize: int = DEFAULT_CHUNK_SIZE, use_cache: bool = False):
+        """
+        Инициализирует WeatherIterator.
 
-    def __init__(self, input_file: str):
-        self.df: pd.DataFrame = pd.read_csv(input_file, parse_dates=['Дата'])
-        self.df['Дата'] = self.df['Дата'].dt.date
-        self.df = self.df.sort_values('Дата')
-        self.index: int = 0
+        Args:
+            input_file (str): Путь к CSV файлу или к папке с недельными/годовыми файлами.
+            start (Optional[date]): Первая дата (включительно).
+            end (Optional[date]): Последняя дата (включительно).
+            chunksize (int): Число строк, читаемых с диска за один раз.
+            use_cache (bool): Читать файлы через бинарные копии вместо потокового чтения CSV.
+        """
+        self.input_file = input_file
+        self.start = start
+        self.end = end
+        self.chunksize = chunksize
+        self.use_cache = use_cache
+        self._rows: Iterator[Tuple[str, Dict[str, str]]] = self._iter_rows()
 
     def __iter__(self) -> 'WeatherIterator':
         return self
 
     def __next__(self) -> Tuple[str, Dict[str, str]]:
-        if self.index >= len(self.df):
-            raise StopIteration
-        row: pd.Series = self.df.iloc[self.index]
-        self.index += 1
-        data = row.to_dict()
-        data['Дата'] = format_date(data['Дата'])
-        return data['Дата'], data
\ No newline at end of file
+        return next(self._rows)
+
+    def files(self) -> List[str]:
+        """Возвращает файлы, которые нужно прочитать для заданного диапазона дат."""
+        if not os.path.isdir(self.input_file):
+            return [self.input_file]
+        partitions = load_manifest(self.input_file).overlapping(self.start, self.end)
+        # В объединенном файле (partitions.csv) все разделы ссылаются на один и тот же файл
+        files = dict.fromkeys(partition['file'] for partition in partitions)
+        return [os.path.join(self.input_file, file) for file in files]
+
+    def iter_batches(self, batch_size: Optional[int] = None,
+                     as_arrays: bool = False) -> Iterator[Union[pd.DataFrame, Dict[str, np.ndarray]]]:
+        """
+        Перебирает данные блоками строк.
+
+        Args:
+            batch_size (Optional[int]): Наибольшее число строк в блоке (по умолчанию chunksize).
+            as_arrays (bool): Отдавать блок как словарь {столбец: np.ndarray} вместо DataFrame.
+
+        Yields:
+            Union[pd.DataFrame, Dict[str, np.ndarray]]: Очередной непустой блок строк,
+            столбец 'Дата' имеет тип datetime64, остальные - типы схемы (schema.py).
+        """
+        batch_size = batch_size or self.chunksize
+        start = pd.Timestamp(self.start) if self.start is not None else None
+        end = pd.Timestamp(self.end) if self.end is not None else None
+
+        for file_path in self.files():
+            for chunk in self._read_chunks(file_path, batch_size):
+                with span('dates.parse'):
+                    chunk['Дата'] = pd.to_datetime(chunk['Дата'], format='%Y-%m-%d', errors='coerce')
+                dates = chunk['Дата']
+                if not dates.is_monotonic_increasing:
+                    chunk = chunk.sort_values('Дата', kind='stable')
+                    dates = chunk['Дата']
+                if start is not None and dates.iloc[-1] < start:
+                    continue
+                if end is not None and dates.iloc[0] > end:
+                    break
+                if start is not None or end is not None:
+                    mask = np.ones(len(chunk), dtype=bool)
+                    if start is not None:
+                        mask &= (dates >= start).to_numpy()
+                    if end is not None:
+                        mask &= (dates <= end).to_numpy()
+                    chunk = chunk[mask]
+                if chunk.empty:
+                    continue
+                if as_arrays:
+                    yield {column: chunk[column].to_numpy() for column in chunk.columns}
+                else:
+                    yield chunk.reset_index(drop=True)
+
+    def _read_chunks(self, file_path: str, batch_size: int) -> Iterator[pd.DataFrame]:
+        """Отдает строки файла фрагментами, упорядоченными по дате и друг за другом."""
+        if not self.use_cache and is_sorted_by_date(file_path):
+            for chunk in pd.read_csv(file_path, chunksize=batch_size):
+                yield apply_schema(chunk)
+            return
+        df = read_csv_cached(file_path, compact=True, parse_dates=['Дата'])
+        if not df['Дата'].is_monotonic_increasing:
+            df = df.sort_values('Дата', kind='stable')
+        for offset in range(0, len(df), batch_size):
+            yield df.iloc[offset:offset + batch_size].copy()
+
+    def _iter_rows(self) -> Iterator[Tuple[str, Dict[str, str]]]:
+        for chunk in self.iter_batches():
+            chunk['Дата'] = chunk['Дата'].dt.strftime('%Y-%m-%d')
+            for data in chunk.to_dict('records'):
+                yield data['Дата'], data
@@ -0,0 +1,125 @@
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from csv_cache import read_csv_cached
+from profiling import span
+
+
+class IndexedFrame:
+    """
+    Данные CSV файла, отсортированные по дате, с индексом дат для бинарного поиска.
+
+    Индекс DataFrame сохраняет номера строк исходного файла, а сортировка устойчивая,
+    поэтому среди строк с одинаковой датой первой остается строка, стоящая в файле раньше.
+    """
+
+    def __init__(self, df: pd.DataFrame, date_column: Optional[str] = None) -> None:
+        """
+        Инициализирует IndexedFrame.
+
+        Args:
+            df (pd.DataFrame): Данные файла.
+            date_column (Optional[str]): Столбец с датами. Если не задан, строки не сортируются
+                и поиск по дате недоступен.
+        """
+        self.date_column = date_column
+        self.dates: Optional[np.ndarray] = None
+        if date_column is not None:
+            with span('dates.parse'):
+                df[date_column] = pd.to_datetime(df[date_column], errors='coerce')
+            with span('dates.sort'):
+                df = df.sort_values(date_column, kind='stable')
+                self.dates = df[date_column].to_numpy(dtype='datetime64[D]')
+        self.df = df
+        self._columns: Optional[List[Tuple[str, Any]]] = None
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def find(self, d: date) -> Optional[int]:
+        """Возвращает позицию первой строки с указанной датой или None, если такой строки нет."""
+        target = np.datetime64(d, 'D')
+        position = int(np.searchsorted(self.dates, target, side='left'))
+        if position < len(self.dates) and self.dates[position] == target:
+            return position
+        return None
+
+    def date_range(self, start: date, end: date) -> Tuple[int, int]:
+        """Возвращает границы [начало, конец) строк с датами из интервала [start, end]."""
+        left = int(np.searchsorted(self.dates, np.datetime64(start, 'D'), side='left'))
+        right = int(np.searchsorted(self.dates, np.datetime64(end, 'D'), side='right'))
+        return left, max(left, right)
+
+    def record(self, position: int) -> Dict[str, Any]:
+        """Возвращает строку в виде словаря, как df.iloc[position].to_dict(), но без создания Series."""
+        if self._columns is None:
+            self._columns = [
+                (name, self.df[name].array if pd.api.types.is_datetime64_any_dtype(self.df[name])
+                 else self.df[name].to_numpy())
+                for name in self.df.columns
+            ]
+        record = {}
+        for name, values in self._columns:
+            value = values[position]
+            record[name] = value.item() if isinstance(value, np.generic) else value
+        return record
+
+    def source_row(self, position: int) -> int:
+        """Возвращает номер строки исходного файла для позиции в отсортированных данных."""
+        return int(self.df.index[position])
+
+
+class FrameCache:
+    """
+    Кэш загруженных CSV файлов с вытеснением давно не использованных (LRU).
+
+    Запись считается устаревшей, если у файла изменились время модификации или размер.
+    """
+
+    def __init__(self, max_entries: int = 8) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Optional[str]], Tuple[Tuple[int, int], IndexedFrame]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, file_path: str, date_column: Optional[str] = 'Дата') -> IndexedFrame:
+        """
+        Возвращает данные файла из кэша, при необходимости загружая их заново.
+
+        Args:
+            file_path (str): Путь к CSV файлу.
+            date_column (Optional[str]): Столбец с датами для индекса.
+
+        Returns:
+            IndexedFrame: Данные файла с индексом дат.
+        """
+        key = (os.path.abspath(file_path), date_column)
+        stat = os.stat(file_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        frame = IndexedFrame(read_csv_cached(file_path, compact=True), date_column)
+
+        with self._lock:
+            self._entries[key] = (signature, frame)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return frame
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+frame_cache = FrameCache()
@@ -1,15 +1,11 @@
 import os
 from typing import Optional, Tuple
 from datetime import datetime
-from scraper import WeatherScraper
-from split_csv import split_csv,split_by_year,split_by_week
-from data_retrieval import (
-    get_data_by_date_original,
-    get_data_by_date_split,
-    get_data_by_date_yearly,
-    get_data_by_date_weekly,
-    WeatherIterator
-)
+
+# Скрапер и модули обработки (pandas, requests, BeautifulSoup) импортируются
+# в пунктах меню, которым они нужны, чтобы меню появлялось сразу
+
+
 def get_csv_file(folder: str = 'dataset') -> Optional[str]:
     """Запрашивает у пользователя выбор CSV файла из указанной папки."""
     if not os.path.exists(folder):
@@ -77,9 +73,13 @@ def main() -> None:
         choice: str = input("Выберите действие: ")
 
         if choice == '1':
+            from scraper import WeatherScraper
+
             scraper: WeatherScraper = WeatherScraper()
             scraper.run()
         elif choice in ['2', '3', '4']:
+            from split_csv import split_csv, split_by_year, split_by_week
+
             input_file: Optional[str] = get_csv_file()
             if input_file:
                 if choice == '2':
@@ -122,6 +122,13 @@ def main() -> None:
                 print("Неверный выбор типа данных")
                 continue
 
+            from data_retrieval import (
+                get_data_by_date_original,
+                get_data_by_date_split,
+                get_data_by_date_yearly,
+                get_data_by_date_weekly,
+            )
+
             date_str = input("Введите дату в формате YYYY-MM-DD: ")
             try:
                 date = datetime.strptime(date_str, "%Y-%m-%d").date()
@@ -144,6 +151,8 @@ def main() -> None:
             except ValueError as e:
                 print(f"Ошибка: {e}")
         elif choice == '6':
+            from data_retrieval import WeatherIterator
+
             input_file: Optional[str] = get_csv_file()
             if input_file:
                 iterator = WeatherIterator(input_file)
@@ -1,43 +1,43 @@
+from __future__ import annotations
+
 import sys
 import os
-from typing import Union, Optional
+from typing import TYPE_CHECKING, Any, Callable, Optional, Tuple, Union
 from datetime import datetime
-import pandas as pd
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout,
     QWidget, QFileDialog, QLabel, QFrame, QProgressBar, QMessageBox,
-    QTableWidgetItem, QLineEdit
+    QLineEdit, QSpinBox, QComboBox, QCheckBox, QPlainTextEdit
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont
-from data_preprocessing import preprocess_data
-from scraper import WeatherScraper
-from split_csv import split_csv, split_by_year, split_by_week
 from optimized_table import OptimizedTableWidget
-from annotation import create_annotation_file, read_annotation_file
-from date_widget import DateDataWidget
-
-
-class ScraperThread(QThread):
-    update_progress = pyqtSignal(int)
-    update_status = pyqtSignal(str)
-    scraping_finished = pyqtSignal(str)
-
-    def __init__(self, start_date: str, end_date: str):
-        super().__init__()
-        self.start_date = start_date
-        self.end_date = end_date
-
-    def run(self) -> None:
-        """Запускает поток скрапера."""
-        scraper = WeatherScraper()
-        filename = scraper.run(self.start_date, self.end_date, self.update_progress, self.update_status)
-        self.scraping_finished.emit(filename)
+from profiling import capture, enable, registry
+from tasks import JobsPanel, TaskContext, TaskRunner
+
+# pandas, скрапер (requests, BeautifulSoup) и модули обработки импортируются в действиях,
+# которым они нужны, чтобы окно появлялось без их загрузки (см. python benchmark.py startup)
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Варианты вывода данных за интервал: подпись и период query_rollups ('rows' - строки без агрегации)
+RANGE_MODES = [
+    ("Строки", 'rows'),
+    ("По дням", 'day'),
+    ("По неделям", 'week'),
+    ("По месяцам", 'month'),
+    ("По годам", 'year'),
+    ("За весь интервал", None),
+]
+# Файлы больше этого размера предобрабатываются по фрагментам прямо в выходной файл
+LARGE_FILE_BYTES = 100 * 1024 * 1024
+PREVIEW_ROWS = 1000
 
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
+        self.tasks = TaskRunner(parent=self)
         self.init_ui()
         self.current_file: Optional[str] = None
         self.preprocessed_data: Optional[pd.DataFrame] = None
@@ -80,6 +80,18 @@ class MainWindow(QMainWindow):
             button = self.create_button(text, callback, button_width)
             left_panel.addWidget(button)
 
+        # Замеры этапов и профилирование отдельного действия (profiling.py)
+        self.profile_checkbox = QCheckBox("Замер этапов")
+        self.profile_checkbox.setChecked(registry.enabled)
+        self.profile_checkbox.toggled.connect(enable)
+        left_panel.addWidget(self.profile_checkbox)
+
+        self.capture_checkbox = QCheckBox("Профилировать следующее действие")
+        left_panel.addWidget(self.capture_checkbox)
+
+        left_panel.addWidget(self.create_button("Отчет о производительности", self.show_profile_report, button_width))
+        left_panel.addWidget(self.create_button("Сохранить отчет (JSON)", self.save_profile_report, button_width))
+
         left_panel_widget = QWidget()
         left_panel_widget.setLayout(left_panel)
         left_panel_widget.setFixedWidth(240)
@@ -95,13 +107,40 @@ class MainWindow(QMainWindow):
         self.info_label.setFont(QFont("Arial", 12))
         right_panel.addWidget(self.info_label)
 
+        self.jobs_panel = JobsPanel(self.tasks)
+        right_panel.addWidget(self.jobs_panel)
+
+        self.profile_view = QPlainTextEdit()
+        self.profile_view.setReadOnly(True)
+        self.profile_view.setFont(QFont("Courier New", 9))
+        self.profile_view.setVisible(False)
+        self.tasks.task_done.connect(lambda _: self.refresh_profile_report())
+        right_panel.addWidget(self.profile_view)
+
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Фильтр, например: `Давление (вечер)` > 770 and `Облачность (вечер)-Пасмурно` == 1")
+        self.filter_input.returnPressed.connect(self.apply_filter)
+        right_panel.addWidget(self.filter_input)
+
         self.data_preview = OptimizedTableWidget()
+        self.data_preview.filter_failed.connect(
+            lambda message: self.info_label.setText(f"Ошибка в выражении фильтра: {message}"))
         right_panel.addWidget(self.data_preview)
 
         self.date_input = QLineEdit()
         self.date_input.setPlaceholderText("ГГГГ-ММ-ДД")
         right_panel.addWidget(self.date_input)
 
+        range_layout = QHBoxLayout()
+        self.range_end_input = QLineEdit()
+        self.range_end_input.setPlaceholderText("Конечная дата ГГГГ-ММ-ДД (необязательно)")
+        range_layout.addWidget(self.range_end_input)
+        self.range_mode_input = QComboBox()
+        for label, _ in RANGE_MODES:
+            self.range_mode_input.addItem(label)
+        range_layout.addWidget(self.range_mode_input)
+        right_panel.addLayout(range_layout)
+
         self.get_data_button = QPushButton("Получить данные")
         self.get_data_button.clicked.connect(self.get_data_for_date)
         right_panel.addWidget(self.get_data_button)
@@ -123,6 +162,61 @@ class MainWindow(QMainWindow):
         with open('styles.qss', 'r') as f:
             self.setStyleSheet(f.read())
 
+    def closeEvent(self, event: Any) -> None:
+        """Отменяет выполняющиеся задачи и дожидается их остановки перед закрытием окна."""
+        self.tasks.cancel_all()
+        self.tasks.wait()
+        super().closeEvent(event)
+
+    def run_task(self, name: str, func: Callable[[TaskContext], Any],
+                 on_success: Callable[[Any], None], **handlers: Any) -> None:
+        """
+        Запускает функцию в фоновом потоке и показывает ее в панели задач.
+
+        Ошибка и отмена по умолчанию выводятся в info_label.
+
+        Args:
+            name (str): Название задачи.
+            func (Callable[[TaskContext], Any]): Выполняемая функция.
+            on_success (Callable[[Any], None]): Получает результат в потоке GUI.
+            **handlers: Дополнительные обработчики TaskRunner.submit (on_failure, on_progress, ...).
+        """
+        handlers.setdefault('on_failure', lambda message: self.info_label.setText(f"{name}: ошибка: {message}"))
+        handlers.setdefault('on_cancel', lambda: self.info_label.setText(f"{name}: отменено"))
+        if self.capture_checkbox.isChecked():
+            self.capture_checkbox.setChecked(False)
+            func = self.captured(name, func)
+        self.tasks.submit(name, func, on_success, **handlers)
+
+    @staticmethod
+    def captured(name: str, func: Callable[[TaskContext], Any]) -> Callable[[TaskContext], Any]:
+        """Оборачивает функцию задачи так, чтобы она выполнялась под cProfile и tracemalloc."""
+        def run(context: TaskContext) -> Any:
+            with capture(name):
+                return func(context)
+        return run
+
+    def show_profile_report(self) -> None:
+        """Показывает или скрывает панель с замерами этапов и результатами профилирования."""
+        self.profile_view.setVisible(self.profile_view.isHidden())
+        self.refresh_profile_report()
+
+    def refresh_profile_report(self) -> None:
+        """Обновляет текст панели профиля, если она открыта."""
+        if self.profile_view.isHidden():
+            return
+        sections = [registry.report()]
+        for name, result in registry.captures().items():
+            sections.append(f"Профиль действия «{name}»\n{result.report()}")
+        self.profile_view.setPlainText('\n\n'.join(sections))
+
+    def save_profile_report(self) -> None:
+        """Сохраняет замеры и результаты профилирования в JSON файл."""
+        save_path, _ = QFileDialog.getSaveFileName(self, "Сохранить отчет", "", "JSON Files (*.json)")
+        if save_path:
+            registry.to_json(save_path)
+            self.info_label.setText(f"Отчет о производительности сохранен в {save_path}")
+
     def select_file(self) -> None:
         """Открывает диалоговое окно для выбора CSV файла."""
         file_path, _ = QFileDialog.getOpenFileName(self, "Выберите файл CSV", "", "CSV Files (*.csv)")
@@ -133,14 +227,50 @@ class MainWindow(QMainWindow):
 
     def preprocess_data(self) -> None:
         """Предобрабатывает выбранный файл данных."""
-        if self.current_file:
-            self.preprocessed_data = preprocess_data(self.current_file)
-            self.info_label.setText("Данные предобработаны")
-            self.load_data(self.preprocessed_data)
-            self.save_preprocessed_data()
+        if self.current_file and os.path.getsize(self.current_file) > LARGE_FILE_BYTES:
+            self.preprocess_large_file()
+        elif self.current_file:
+            file_path = self.current_file
+
+            def preprocess(context: TaskContext) -> pd.DataFrame:
+                from data_preprocessing import preprocess_data
+                return preprocess_data(file_path, progress_callback=context.progress)
+
+            self.run_task("Предобработка данных", preprocess, self.preprocessing_finished)
         else:
             self.info_label.setText("Сначала выберите файл")
 
+    def preprocessing_finished(self, df: pd.DataFrame) -> None:
+        """Показывает предобработанные данные и предлагает их сохранить."""
+        self.preprocessed_data = df
+        self.info_label.setText("Данные предобработаны")
+        self.load_data(self.preprocessed_data)
+        self.save_preprocessed_data()
+
+    def preprocess_large_file(self) -> None:
+        """Предобрабатывает большой файл по фрагментам, не загружая его в память целиком."""
+        save_path, _ = QFileDialog.getSaveFileName(self, "Сохранить предобработанные данные", "", "CSV Files (*.csv)")
+        if not save_path:
+            return
+
+        file_path = self.current_file
+
+        def preprocess(context: TaskContext) -> Tuple[int, pd.DataFrame]:
+            import pandas as pd
+            from data_preprocessing import preprocess_file_chunked
+
+            rows = preprocess_file_chunked(file_path, save_path, progress_callback=context.progress)
+            return rows, pd.read_csv(save_path, nrows=PREVIEW_ROWS)
+
+        def finished(result: Tuple[int, pd.DataFrame]) -> None:
+            rows, preview = result
+            self.preprocessed_data = None
+            self.load_data(preview)
+            self.info_label.setText(f"Предобработано строк: {rows}. Данные сохранены в {save_path} "
+                                    f"(показаны первые {PREVIEW_ROWS})")
+
+        self.run_task("Предобработка большого файла", preprocess, finished)
+
     def save_preprocessed_data(self) -> None:
         """Сохраняет предобработанные данные в CSV файл."""
         save_path, _ = QFileDialog.getSaveFileName(self, "Сохранить предобработанные данные", "", "CSV Files (*.csv)")
@@ -149,33 +279,53 @@ class MainWindow(QMainWindow):
             self.info_label.setText(f"Предобработанные данные сохранены в {save_path}")
 
     def load_data(self, data: Union[str, pd.DataFrame]) -> None:
-        """Загружает данные в таблицу предварительного просмотра."""
+        """Загружает данные в таблицу предварительного просмотра (файл читается в фоновом потоке)."""
         if isinstance(data, str):
-            try:
-                df = pd.read_csv(data)
-            except Exception as e:
-                self.info_label.setText(f"Ошибка при чтении файла: {str(e)}")
-                return
-        elif isinstance(data, pd.DataFrame):
-            df = data
+            def read(context: TaskContext) -> pd.DataFrame:
+                from csv_cache import read_csv_cached
+                return read_csv_cached(data, compact=True)
+
+            self.run_task("Чтение файла", read, self.show_data,
+                          on_failure=lambda message: self.info_label.setText(f"Ошибка при чтении файла: {message}"))
+            return
+
+        import pandas as pd
+        if isinstance(data, pd.DataFrame):
+            self.show_data(data)
         else:
             self.info_label.setText("Неподдерживаемый тип данных")
-            return
 
+    def show_data(self, df: pd.DataFrame) -> None:
+        """Показывает DataFrame в таблице предварительного просмотра."""
         self.data_preview.load_data(df)
+        self.filter_input.clear()
+
+    def apply_filter(self) -> None:
+        """Применяет выражение фильтра к таблице предварительного просмотра."""
+        self.data_preview.set_filter(self.filter_input.text())
 
     def create_annotation(self) -> None:
         """Создает файл аннотации для текущего набора данных."""
         if self.current_file:
-            output_path = self.current_file.rsplit('.', 1)[0] + '_annotation.csv'
-            create_annotation_file(self.current_file, output_path)
-            self.info_label.setText(f"Файл аннотации создан: {output_path}")
-            self.show_annotation(output_path)
+            file_path = self.current_file
+            output_path = file_path.rsplit('.', 1)[0] + '_annotation.csv'
+
+            def annotate(context: TaskContext) -> None:
+                from annotation import create_annotation_file
+                create_annotation_file(file_path, output_path, context.progress)
+
+            def finished(_: Any) -> None:
+                self.info_label.setText(f"Файл аннотации создан: {output_path}")
+                self.show_annotation(output_path)
+
+            self.run_task("Создание аннотации", annotate, finished)
         else:
             self.info_label.setText("Сначала выберите файл")
 
     def show_annotation(self, annotation_file: str) -> None:
         """Отображает содержимое файла аннотации."""
+        from annotation import read_annotation_file
+
         try:
             annotation_data = read_annotation_file(annotation_file)
             self.load_data(annotation_data)
@@ -184,38 +334,67 @@ class MainWindow(QMainWindow):
             self.info_label.setText(f"Ошибка при чтении файла аннотации: {str(e)}")
 
     def get_data_for_date(self) -> None:
-        """Извлекает и отображает данные для конкретной даты."""
+        """
+        Извлекает и отображает данные для конкретной даты или для интервала дат.
+
+        Строки ищутся бинарным поиском по загруженному один раз файлу (frame_cache),
+        а средние, минимумы, максимумы и доли по периодам берутся из сводных таблиц (rollups).
+        """
         if not self.current_file:
             self.info_label.setText("Сначала выберите файл")
             return
 
+        import pandas as pd
+
+        file_path = self.current_file
         date_str = self.date_input.text()
+        end_str = self.range_end_input.text().strip() or date_str
+        label, mode = RANGE_MODES[self.range_mode_input.currentIndex()]
         try:
-            input_date = pd.to_datetime(date_str).normalize()
-            df = pd.read_csv(self.current_file, parse_dates=['Дата'])
-            df['Дата'] = pd.to_datetime(df['Дата']).dt.normalize()
-
-            if input_date < df['Дата'].min() or input_date > df['Дата'].max():
-                self.info_label.setText(f"Дата {date_str} находится вне диапазона данных ({df['Дата'].min().date()} - {df['Дата'].max().date()})")
-                self.data_preview.clear()
-                return
-
-            data = df[df['Дата'] == input_date]
-
-            if not data.empty:
+            start_date = pd.to_datetime(date_str).date()
+            end_date = pd.to_datetime(end_str).date()
+        except ValueError as e:
+            self.info_label.setText(f"Ошибка в формате даты: {str(e)}. Используйте формат ГГГГ-ММ-ДД")
+            return
+        period_text = f"на {date_str}" if end_str == date_str else f"за {date_str} - {end_str}"
+
+        def find(context: TaskContext) -> Tuple[str, Optional[pd.DataFrame]]:
+            from data_retrieval import get_data_for_range
+            from frame_cache import frame_cache
+            from rollups import query_rollups
+
+            dates = frame_cache.get(file_path).dates
+            dates = dates[~pd.isna(dates)]
+            if len(dates) and (pd.Timestamp(end_date) < dates[0] or pd.Timestamp(start_date) > dates[-1]):
+                return (f"Даты {period_text} находятся вне диапазона данных "
+                        f"({pd.Timestamp(dates[0]).date()} - {pd.Timestamp(dates[-1]).date()})", None)
+
+            if mode != 'rows':
+                data = query_rollups(file_path, start_date, end_date, mode).reset_index()
+                if data.empty:
+                    return f"Нет данных {period_text}", None
+                return f"Сводка {label.lower()} {period_text}", data
+
+            data = get_data_for_range(start_date, end_date, file_path)
+            if data.empty:
+                return f"Нет данных {period_text}", None
+            return f"Данные {period_text}", data
+
+        def finished(result: Tuple[str, Optional[pd.DataFrame]]) -> None:
+            message, data = result
+            if data is not None:
                 self.load_data(data)
-                self.info_label.setText(f"Данные на {date_str}")
             else:
-                self.info_label.setText(f"Нет данных на {date_str}")
                 self.data_preview.clear()
+            self.info_label.setText(message)
 
-        except ValueError as e:
-            self.info_label.setText(f"Ошибка в формате даты: {str(e)}. Используйте формат ГГГГ-ММ-ДД")
-        except Exception as e:
-            self.info_label.setText(f"Ошибка при получении данных: {str(e)}")
+        self.run_task("Поиск по дате", find, finished,
+                      on_failure=lambda message: self.info_label.setText(f"Ошибка при получении данных: {message}"))
 
     def show_scraper_dialog(self) -> None:
         """Показывает диалоговое окно для сбора данных."""
+        from scraper import STATION_ID, available_parsers
+
         self.scraper_dialog = QWidget()
         self.scraper_dialog.setWindowTitle("Сбор данных с сайта")
         self.scraper_dialog.setGeometry(200, 200, 400, 200)
@@ -232,6 +411,30 @@ class MainWindow(QMainWindow):
         layout.addWidget(end_date_label)
         layout.addWidget(self.end_date_input)
 
+        stations_label = QLabel("Станции gismeteo через запятую (несколько - в хранилище станций):")
+        self.stations_input = QLineEdit(str(STATION_ID))
+        layout.addWidget(stations_label)
+        layout.addWidget(self.stations_input)
+
+        workers_label = QLabel("Число одновременных загрузок:")
+        self.workers_input = QSpinBox()
+        self.workers_input.setRange(1, 16)
+        self.workers_input.setValue(4)
+        layout.addWidget(workers_label)
+        layout.addWidget(self.workers_input)
+
+        parse_workers_label = QLabel("Процессов для разбора страниц (0 - без отдельных процессов):")
+        self.parse_workers_input = QSpinBox()
+        self.parse_workers_input.setRange(0, os.cpu_count() or 1)
+        layout.addWidget(parse_workers_label)
+        layout.addWidget(self.parse_workers_input)
+
+        parser_label = QLabel("Парсер HTML:")
+        self.parser_input = QComboBox()
+        self.parser_input.addItems(available_parsers())
+        layout.addWidget(parser_label)
+        layout.addWidget(self.parser_input)
+
         self.progress_bar = QProgressBar()
         layout.addWidget(self.progress_bar)
 
@@ -247,6 +450,9 @@ class MainWindow(QMainWindow):
 
     def start_scraping(self) -> None:
         """Запускает процесс сбора данных."""
+        from page_cache import PageCache
+        from scraper import STATION_ID, WeatherScraper
+
         start_date = self.start_date_input.text()
         end_date = self.end_date_input.text()
 
@@ -261,11 +467,31 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Ошибка", f"Неверный формат даты или диапазон дат: {str(e)}\nИспользуйте формат ММ.ГГГГ")
             return
 
-        self.scraper_thread = ScraperThread(start_date, end_date)
-        self.scraper_thread.update_progress.connect(self.update_progress_bar)
-        self.scraper_thread.update_status.connect(self.update_status_label)
-        self.scraper_thread.scraping_finished.connect(self.scraping_finished)
-        self.scraper_thread.start()
+        try:
+            stations = [int(station) for station in self.stations_input.text().replace(' ', '').split(',') if station]
+        except ValueError:
+            QMessageBox.warning(self, "Ошибка", "Номера станций должны быть целыми числами через запятую")
+            return
+        stations = stations or [STATION_ID]
+
+        scraper = WeatherScraper(max_workers=self.workers_input.value(), page_cache=PageCache(),
+                                 parse_workers=self.parse_workers_input.value(),
+                                 parser=self.parser_input.currentText(),
+                                 station_id=stations[0], stations=stations)
+        if len(stations) > 1:
+            self.run_task("Сбор данных станций",
+                          lambda context: scraper.run_stations(start_date, end_date, context.progress, context.status),
+                          self.stations_scraping_finished,
+                          on_failure=self.scraping_failed,
+                          on_progress=self.update_progress_bar,
+                          on_status=self.update_status_label)
+        else:
+            self.run_task("Сбор данных",
+                          lambda context: scraper.run(start_date, end_date, context.progress, context.status),
+                          self.scraping_finished,
+                          on_failure=self.scraping_failed,
+                          on_progress=self.update_progress_bar,
+                          on_status=self.update_status_label)
 
         self.status_label.setText("Начинается сбор данных...")
         self.progress_bar.setValue(0)
@@ -289,27 +515,62 @@ class MainWindow(QMainWindow):
         else:
             QMessageBox.warning(self, "Ошибка", "Не удалось собрать данные. Проверьте подключение к интернету и попробуйте снова.")
 
+    def scraping_failed(self, message: str) -> None:
+        """Сообщает об ошибке, прервавшей сбор данных."""
+        self.status_label.setText("Сбор данных прерван")
+        QMessageBox.warning(self, "Ошибка", f"Не удалось собрать данные: {message}\n"
+                                            "Проверьте подключение к интернету и попробуйте снова.")
+
+    def stations_scraping_finished(self, store_folder: str) -> None:
+        """Сообщает о завершении сбора данных нескольких станций в хранилище станций."""
+        full_path = os.path.join(os.getcwd(), store_folder)
+        QMessageBox.information(self, "Сбор данных завершен",
+                                f"Данные станций сохранены в хранилище:\n{full_path}")
+        self.scraper_dialog.close()
+        self.info_label.setText(f"Данные станций сохранены в {full_path} (по месяцам, все станции месяца в одном файле)")
+
     def split_by_week(self) -> None:
         """Разделяет данные текущего файла по неделям."""
         if self.current_file:
-            output_folder = split_by_week(self.current_file)
-            self.info_label.setText(f"Данные разделены по неделям. Результаты сохранены в {output_folder}")
+            file_path = self.current_file
+
+            def split(context: TaskContext) -> str:
+                from split_csv import split_by_week
+                return split_by_week(file_path, incremental=True, progress_callback=context.progress)
+
+            self.run_task("Разделение по неделям", split,
+                          lambda output_folder: self.info_label.setText(
+                              f"Данные разделены по неделям. Результаты сохранены в {output_folder}"))
         else:
             self.info_label.setText("Сначала выберите файл")
 
     def split_by_year(self) -> None:
         """Разделяет данные текущего файла по годам."""
         if self.current_file:
-            output_folder = split_by_year(self.current_file)
-            self.info_label.setText(f"Данные разделены по годам. Результаты сохранены в {output_folder}")
+            file_path = self.current_file
+
+            def split(context: TaskContext) -> str:
+                from split_csv import split_by_year
+                return split_by_year(file_path, incremental=True, progress_callback=context.progress)
+
+            self.run_task("Разделение по годам", split,
+                          lambda output_folder: self.info_label.setText(
+                              f"Данные разделены по годам. Результаты сохранены в {output_folder}"))
         else:
             self.info_label.setText("Сначала выберите файл")
 
     def split_csv(self) -> None:
         """Разделяет текущий файл на части X и Y."""
         if self.current_file:
-            output_folder = split_csv(self.current_file)
-            self.info_label.setText(f"Данные разделены на X и Y. Результаты сохранены в {output_folder}")
+            file_path = self.current_file
+
+            def split(context: TaskContext) -> str:
+                from split_csv import split_csv
+                return split_csv(file_path, context.progress)
+
+            self.run_task("Разделение на X и Y", split,
+                          lambda output_folder: self.info_label.setText(
+                              f"Данные разделены на X и Y. Результаты сохранены в {output_folder}"))
         else:
             self.info_label.setText("Сначала выберите файл")
 
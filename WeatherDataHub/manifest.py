@@ -0,0 +1,159 @@
+import bisect
+import hashlib
+import json
+import os
+import threading
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+MANIFEST_FILE = 'manifest.json'
+
+
+def file_checksum(file_path: str) -> str:
+    """Вычисляет SHA-256 содержимого файла."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_entry(file_path: str, start: date, end: date, rows: int, checksum: bool = False) -> dict:
+    """
+    Описывает один файл-раздел для манифеста.
+
+    Args:
+        file_path (str): Путь к файлу раздела.
+        start (date): Первая дата в разделе.
+        end (date): Последняя дата в разделе.
+        rows (int): Число строк данных.
+        checksum (bool): Вычислить ли SHA-256 содержимого.
+
+    Returns:
+        dict: Запись манифеста.
+    """
+    entry = {
+        'file': os.path.basename(file_path),
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'rows': rows,
+        'bytes': os.path.getsize(file_path),
+    }
+    if checksum:
+        entry['sha256'] = file_checksum(file_path)
+    return entry
+
+
+def manifest_content(entries: List[dict], source: str, partition: str) -> dict:
+    """Возвращает содержимое манифеста в том виде, в каком его записывает write_manifest."""
+    return {
+        'source': os.path.basename(source),
+        'partition': partition,
+        'partitions': sorted(entries, key=lambda entry: entry['start']),
+    }
+
+
+def write_manifest(folder: str, entries: List[dict], source: str, partition: str) -> str:
+    """
+    Записывает манифест разделов в папку.
+
+    Args:
+        folder (str): Папка с файлами-разделами.
+        entries (List[dict]): Записи, созданные make_entry.
+        source (str): Исходный файл, из которого получены разделы.
+        partition (str): Способ разделения ('week' или 'year').
+
+    Returns:
+        str: Путь к файлу манифеста.
+    """
+    manifest_path = os.path.join(folder, MANIFEST_FILE)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest_content(entries, source, partition), f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, manifest_path)
+    return manifest_path
+
+
+def read_manifest(folder: str) -> Optional[dict]:
+    """Читает манифест папки без кэширования; возвращает None, если манифеста нет или он поврежден."""
+    try:
+        with open(os.path.join(folder, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class PartitionManifest:
+    """Список разделов папки, упорядоченный по датам, с поиском раздела по дате."""
+
+    def __init__(self, entries: List[dict]) -> None:
+        self.entries = sorted(entries, key=lambda entry: entry['start'])
+        self.starts: List[date] = [date.fromisoformat(entry['start']) for entry in self.entries]
+        self.ends: List[date] = [date.fromisoformat(entry['end']) for entry in self.entries]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def locate(self, d: date) -> Optional[dict]:
+        """Возвращает раздел, в диапазон дат которого попадает дата, или None."""
+        position = bisect.bisect_right(self.starts, d) - 1
+        if position >= 0 and d <= self.ends[position]:
+            return self.entries[position]
+        return None
+
+    def overlapping(self, start: Optional[date], end: Optional[date]) -> List[dict]:
+        """Возвращает разделы, пересекающиеся с интервалом [start, end], в порядке дат."""
+        first = 0 if start is None else bisect.bisect_left(self.ends, start)
+        last = len(self.entries) if end is None else bisect.bisect_right(self.starts, end)
+        return self.entries[first:last]
+
+
+def scan_folder(folder: str) -> List[dict]:
+    """Строит записи манифеста по именам файлов вида ГГГГММДД_ГГГГММДД.csv (для папок без манифеста)."""
+    entries = []
+    for file in os.listdir(folder):
+        if not file.endswith('.csv'):
+            continue
+        try:
+            start, end = file[:-len('.csv')].split('_')
+            entries.append({
+                'file': file,
+                'start': datetime.strptime(start, '%Y%m%d').date().isoformat(),
+                'end': datetime.strptime(end, '%Y%m%d').date().isoformat(),
+            })
+        except ValueError:
+            continue
+    return entries
+
+
+_manifests: Dict[str, Tuple[Tuple[int, int], PartitionManifest]] = {}
+_manifests_lock = threading.Lock()
+
+
+def load_manifest(folder: str) -> PartitionManifest:
+    """
+    Загружает манифест папки с разделами.
+
+    Результат кэшируется до изменения файла манифеста. Если манифеста нет,
+    список разделов строится по именам файлов и кэшируется до изменения папки.
+    """
+    manifest_path = os.path.join(folder, MANIFEST_FILE)
+    stat_path = manifest_path if os.path.exists(manifest_path) else folder
+    stat = os.stat(stat_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    key = os.path.abspath(stat_path)
+
+    with _manifests_lock:
+        cached = _manifests.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+    if stat_path == manifest_path:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = PartitionManifest(json.load(f)['partitions'])
+    else:
+        manifest = PartitionManifest(scan_folder(folder))
+
+    with _manifests_lock:
+        _manifests[key] = (signature, manifest)
+    return manifest
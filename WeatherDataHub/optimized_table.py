@@ -1,27 +1,227 @@
-import pandas as pd
-from PyQt6.QtWidgets import QTableWidget, QTableWidgetItem
-from PyQt6.QtCore import Qt
-from typing import Any, Optional
+from __future__ import annotations
 
+from PyQt6.QtWidgets import QTableView, QHeaderView
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QThread, pyqtSignal
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple
+from profiling import span
 
-class OptimizedTableWidget(QTableWidget):
+# Пустая таблица создается вместе с окном, поэтому NumPy и pandas импортируются
+# только при обработке первых данных
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+
+class DataFrameModel(QAbstractTableModel):
+    """
+    Модель таблицы над столбцами DataFrame.
+
+    Значения хранятся массивами по столбцам (NumPy или pandas ExtensionArray) и
+    форматируются в строку только тогда, когда представление запрашивает ячейку,
+    поэтому в памяти нет объектов для невидимых строк.
+
+    Порядок строк задается массивом order (строка представления -> строка данных),
+    поэтому сортировка и фильтрация не трогают сами данные. Перестановки сортировки
+    по каждому столбцу вычисляются один раз и кэшируются.
+    """
+
+    def __init__(self, df: Optional[pd.DataFrame] = None, parent: Any = None) -> None:
+        """
+        Инициализирует DataFrameModel.
+
+        Args:
+            df (Optional[pd.DataFrame]): Данные для отображения.
+            parent: Родительский объект Qt.
+        """
+        super().__init__(parent)
+        self.headers: List[str] = []
+        self.columns: List[Any] = []
+        self.total_rows: int = 0
+        self.order: Optional[np.ndarray] = None
+        self.sort_cache: Dict[int, Tuple[np.ndarray, int]] = {}
+        if df is not None:
+            self.set_frame(df)
+
+    @staticmethod
+    def column_array(series: pd.Series) -> Any:
+        """
+        Возвращает столбец в виде массива для поэлементного доступа.
+
+        Даты и столбцы с типами pandas (category, Int8 и т.п.) остаются ExtensionArray,
+        чтобы str() значения совпадал с str(df.iloc[row, col]); остальные - массивы NumPy.
+        """
+        import numpy as np
+        import pandas as pd
+
+        if isinstance(series.dtype, np.dtype) and not pd.api.types.is_datetime64_any_dtype(series):
+            return series.to_numpy()
+        return series.array
+
+    def set_frame(self, df: pd.DataFrame) -> None:
+        """Заменяет данные модели."""
+        self.beginResetModel()
+        with span('table.fill'):
+            self.headers = [str(name) for name in df.columns]
+            self.columns = [self.column_array(df.iloc[:, col]) for col in range(len(df.columns))]
+        self.total_rows = len(df)
+        self.order = None
+        self.sort_cache = {}
+        self.endResetModel()
+
+    def clear(self) -> None:
+        """Удаляет все данные модели."""
+        self.beginResetModel()
+        self.headers = []
+        self.columns = []
+        self.total_rows = 0
+        self.order = None
+        self.sort_cache = {}
+        self.endResetModel()
+
+    def sort_permutation(self, column: int, descending: bool = False) -> np.ndarray:
+        """
+        Возвращает номера строк данных, упорядоченные по значениям столбца.
+
+        Устойчивая перестановка по возрастанию вычисляется один раз на столбец;
+        пустые значения всегда идут в конце, в том числе при сортировке по убыванию.
+        """
+        return self.sort_task(column, descending)()
+
+    def sort_task(self, column: int, descending: bool = False) -> Callable[[], np.ndarray]:
+        """
+        Возвращает функцию, вычисляющую sort_permutation для текущих данных модели.
+
+        Столбцы и кэш перестановок запоминаются в момент вызова, поэтому функцию можно
+        выполнить вне потока GUI: set_frame, выполненный до ее завершения, не подменит
+        данные и не получит в кэш перестановку от прежних данных.
+        """
+        columns, cache = self.columns, self.sort_cache
+        return lambda: self.permutation_for(columns, cache, column, descending)
+
+    @staticmethod
+    def permutation_for(columns: List[Any], cache: Dict[int, Tuple[np.ndarray, int]],
+                        column: int, descending: bool) -> np.ndarray:
+        """Вычисляет перестановку столбца columns[column], используя и пополняя cache."""
+        import numpy as np
+        import pandas as pd
+
+        if column not in cache:
+            values = pd.Series(columns[column], copy=False).array
+            with span('table.sort'):
+                permutation = np.asarray(values.argsort(kind='stable', na_position='last'), dtype=np.intp)
+                cache[column] = (permutation, int(len(values) - pd.isna(values).sum()))
+        permutation, valid = cache[column]
+        if descending:
+            return np.concatenate((permutation[:valid][::-1], permutation[valid:]))
+        return permutation
+
+    def set_order(self, order: Optional[np.ndarray]) -> None:
+        """Задает отображаемые строки данных и их порядок (None - все строки по порядку)."""
+        self.beginResetModel()
+        self.order = order
+        self.endResetModel()
+
+    def source_row(self, row: int) -> int:
+        """Возвращает номер строки данных для строки представления."""
+        return row if self.order is None else int(self.order[row])
+
+    def visible_rows(self) -> int:
+        """Возвращает число строк, видимых после фильтрации."""
+        return self.total_rows if self.order is None else len(self.order)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self.visible_rows()
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        return str(self.columns[index.column()][self.source_row(index.row())])
+
+    def headerData(self, section: int, orientation: Qt.Orientation,
+                   role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.headers[section] if section < len(self.headers) else None
+        return str(self.source_row(section) + 1)
+
+
+class IndexTask(QThread):
+    """Поток, вычисляющий перестановку сортировки или маску фильтра вне потока GUI."""
+
+    index_ready = pyqtSignal(str, int, object)
+    index_failed = pyqtSignal(str, int, str)
+
+    def __init__(self, kind: str, token: int, compute: Callable[[], Any]) -> None:
+        """
+        Инициализирует IndexTask.
+
+        Args:
+            kind (str): Вид результата ('sort' или 'filter').
+            token (int): Номер запроса; устаревшие результаты отбрасываются по нему.
+            compute (Callable[[], Any]): Функция, вычисляющая результат.
+        """
+        super().__init__()
+        self.kind = kind
+        self.token = token
+        self.compute = compute
+
+    def run(self) -> None:
+        """Вычисляет результат и передает его сигналом."""
+        try:
+            self.index_ready.emit(self.kind, self.token, self.compute())
+        except Exception as e:
+            self.index_failed.emit(self.kind, self.token, str(e))
+
+
+class OptimizedTableWidget(QTableView):
     """
     Оптимизированный виджет таблицы для отображения больших объемов данных.
+
+    Ячейки не создаются заранее: представление запрашивает у DataFrameModel только
+    видимые строки, а фиксированная высота строк избавляет от измерения каждой строки
+    при прокрутке.
+
+    Щелчок по заголовку столбца сортирует таблицу, а set_filter оставляет строки,
+    удовлетворяющие выражению над столбцами. Перестановка и маска вычисляются
+    векторно в отдельном потоке (IndexTask), а представление показывает строки
+    через них, не копируя данные.
     """
 
+    view_changed = pyqtSignal(int)
+    filter_failed = pyqtSignal(str)
+
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         """
         Инициализирует OptimizedTableWidget.
 
         Args:
-            *args: Позиционные аргументы для QTableWidget.
-            **kwargs: Именованные аргументы для QTableWidget.
+            *args: Позиционные аргументы для QTableView.
+            **kwargs: Именованные аргументы для QTableView.
         """
         super().__init__(*args, **kwargs)
-        self.chunk_size: int = 100
-        self.current_chunk: int = 0
-        self.total_rows: int = 0
+        self.data_model = DataFrameModel(parent=self)
+        self.setModel(self.data_model)
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
         self.df: Optional[pd.DataFrame] = None
+        self.permutation: Optional[np.ndarray] = None
+        self.filter_mask: Optional[np.ndarray] = None
+        self.latest: Dict[str, int] = {'sort': 0, 'filter': 0}
+        self.next_token: int = 0
+        self.tasks: Set[IndexTask] = set()
+
+        header = self.horizontalHeader()
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        header.sortIndicatorChanged.connect(self.sort_by_column)
+
+    @property
+    def total_rows(self) -> int:
+        return self.data_model.total_rows
 
     def load_data(self, df: pd.DataFrame) -> None:
         """
@@ -30,65 +230,129 @@ class OptimizedTableWidget(QTableWidget):
         Args:
             df (pd.DataFrame): DataFrame для отображения.
         """
+        self.reset_indexes()
         self.df = df
-        self.total_rows = len(df)
-        self.setRowCount(self.total_rows)
-        self.setColumnCount(len(df.columns))
-        self.setHorizontalHeaderLabels(df.columns)
-        self.current_chunk = 0
-        self.load_chunk()
+        self.data_model.set_frame(df)
+        self.scrollToTop()
+        self.view_changed.emit(self.data_model.visible_rows())
+
+    def reset_indexes(self) -> None:
+        """Сбрасывает сортировку и фильтр и отменяет еще не примененные результаты потоков."""
+        self.permutation = None
+        self.filter_mask = None
+        self.latest = {'sort': self.issue_token(), 'filter': self.issue_token()}
+        header = self.horizontalHeader()
+        header.blockSignals(True)
+        header.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        header.blockSignals(False)
+
+    def issue_token(self) -> int:
+        self.next_token += 1
+        return self.next_token
+
+    def start_task(self, kind: str, compute: Callable[[], Any]) -> None:
+        """Запускает вычисление в отдельном потоке; применен будет только последний запрос каждого вида."""
+        token = self.issue_token()
+        self.latest[kind] = token
+        task = IndexTask(kind, token, compute)
+        task.index_ready.connect(self.apply_index)
+        task.index_failed.connect(self.report_failure)
+        task.finished.connect(lambda: self.tasks.discard(task))
+        self.tasks.add(task)
+        task.start()
+
+    def sort_by_column(self, column: int, order: Qt.SortOrder) -> None:
+        """
+        Сортирует таблицу по столбцу.
+
+        Args:
+            column (int): Номер столбца (-1 - исходный порядок строк).
+            order (Qt.SortOrder): Направление сортировки.
+        """
+        if column < 0 or column >= self.data_model.columnCount():
+            self.latest['sort'] = self.issue_token()
+            self.permutation = None
+            self.update_view()
+            return
+        descending = order == Qt.SortOrder.DescendingOrder
+        # Данные фиксируются при запуске; если таблицу перезагрузят раньше, чем поток закончит,
+        # load_data выдаст новый номер запроса и результат будет отброшен
+        self.start_task('sort', self.data_model.sort_task(column, descending))
 
-    def load_chunk(self) -> None:
+    def set_filter(self, expression: str) -> None:
         """
-        Загружает следующий фрагмент данных в таблицу.
+        Оставляет в таблице строки, для которых выражение истинно.
+
+        Выражение вычисляется через DataFrame.eval, имена столбцов с пробелами
+        записываются в обратных кавычках, например:
+        `Давление (вечер)` > 770 and `Облачность (вечер)-Пасмурно` == 1
+
+        Args:
+            expression (str): Выражение фильтра; пустая строка снимает фильтр.
         """
-        if self.df is None:
+        df = self.df
+        if df is None or not expression.strip():
+            self.latest['filter'] = self.issue_token()
+            self.filter_mask = None
+            self.update_view()
             return
 
-        start: int = self.current_chunk * self.chunk_size
-        end: int = min(start + self.chunk_size, self.total_rows)
-        
-        for row in range(start, end):
-            for col in range(len(self.df.columns)):
-                item = QTableWidgetItem(str(self.df.iloc[row, col]))
-                self.setItem(row, col, item)
-        
-        self.current_chunk += 1
+        def compute_mask() -> np.ndarray:
+            import pandas as pd
+
+            mask = df.eval(expression)
+            if not isinstance(mask, pd.Series) or len(mask) != len(df):
+                raise ValueError("Выражение фильтра должно давать логическое значение для каждой строки")
+            return mask.fillna(False).to_numpy(dtype=bool)
+
+        self.start_task('filter', compute_mask)
+
+    def apply_index(self, kind: str, token: int, result: np.ndarray) -> None:
+        """Применяет результат потока, если за это время не было более нового запроса."""
+        if self.latest.get(kind) != token:
+            return
+        if kind == 'sort':
+            self.permutation = result
+        else:
+            self.filter_mask = result
+        self.update_view()
+
+    def report_failure(self, kind: str, token: int, message: str) -> None:
+        """Сообщает об ошибке вычисления, если запрос еще актуален."""
+        if self.latest.get(kind) == token and kind == 'filter':
+            self.filter_failed.emit(message)
+
+    def update_view(self) -> None:
+        """Передает модели порядок строк, составленный из перестановки сортировки и маски фильтра."""
+        order = self.permutation
+        if self.filter_mask is not None:
+            import numpy as np
+
+            rows = order if order is not None else np.arange(self.data_model.total_rows)
+            order = rows[self.filter_mask[rows]]
+        self.data_model.set_order(order)
+        self.view_changed.emit(self.data_model.visible_rows())
 
     def clear(self) -> None:
         """
         Очищает таблицу и сбрасывает все связанные переменные.
         """
-        self.setRowCount(0)
-        self.setColumnCount(0)
+        self.reset_indexes()
+        self.data_model.clear()
         self.df = None
-        self.total_rows = 0
-        self.current_chunk = 0
-
-    def scrollContentsBy(self, dx: int, dy: int) -> None:
-        """
-        Обрабатывает событие прокрутки и загружает новые данные при необходимости.
-
-        Args:
-            dx (int): Изменение по горизонтали.
-            dy (int): Изменение по вертикали.
-        """
-        super().scrollContentsBy(dx, dy)
-        if self.verticalScrollBar().value() == self.verticalScrollBar().maximum():
-            if self.current_chunk * self.chunk_size < self.total_rows:
-                self.load_chunk()
 
 
 if __name__ == "__main__":
     import sys
+    import pandas as pd
     from PyQt6.QtWidgets import QApplication
-    
+
     app = QApplication(sys.argv)
     table = OptimizedTableWidget()
-    
+
     # Пример использования
     df = pd.DataFrame({'A': range(1000), 'B': range(1000, 2000)})
     table.load_data(df)
     table.show()
-    
-    sys.exit(app.exec())
\ No newline at end of file
+
+    sys.exit(app.exec())
@@ -0,0 +1,175 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+DEFAULT_CACHE_DIR = os.path.join('dataset', '.page_cache')
+INDEX_FILE = 'index.json'
+
+
+def month_end_timestamp(year: int, month: int) -> float:
+    """Возвращает момент начала следующего месяца (локальное время) в секундах с эпохи."""
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return datetime(next_year, next_month, 1).timestamp()
+
+
+class PageCache:
+    """
+    Дисковый кэш исходных страниц дневника погоды.
+
+    Страницы хранятся по ключу (станция, год, месяц) вместе с заголовками ETag и
+    Last-Modified для условных запросов. Страница, загруженная после окончания месяца,
+    больше не меняется и не устаревает; страницы текущего месяца живут current_month_ttl
+    секунд. При превышении max_bytes удаляются давно не использованные страницы.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = 256 * 1024 * 1024,
+                 current_month_ttl: float = 3600.0) -> None:
+        """
+        Инициализирует PageCache.
+
+        Args:
+            cache_dir (str): Папка для хранения страниц и индекса.
+            max_bytes (int): Максимальный суммарный размер страниц в кэше.
+            current_month_ttl (float): Время жизни (в секундах) страниц незавершенного месяца.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.current_month_ttl = current_month_ttl
+        self._lock = threading.Lock()
+        self._dirty = False
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index: Dict[str, dict] = self._load_index()
+
+    @staticmethod
+    def make_key(station: int, year: int, month: int) -> str:
+        return f"{station}_{year}{month:02d}"
+
+    @property
+    def total_bytes(self) -> int:
+        """Суммарный размер страниц, хранящихся в кэше."""
+        with self._lock:
+            return sum(entry['size'] for entry in self._index.values())
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, station: int, year: int, month: int) -> Optional[Tuple[bytes, dict]]:
+        """
+        Возвращает тело страницы и ее метаданные или None, если страницы нет в кэше.
+
+        Returns:
+            Optional[Tuple[bytes, dict]]: Тело страницы и словарь с полями
+            etag, last_modified, fetched_at, size.
+        """
+        key = self.make_key(station, year, month)
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            try:
+                with open(os.path.join(self.cache_dir, entry['file']), 'rb') as f:
+                    body = f.read()
+            except OSError:
+                del self._index[key]
+                self._dirty = True
+                return None
+            entry['last_access'] = time.time()
+            self._dirty = True
+            return body, dict(entry)
+
+    def is_fresh(self, meta: dict, year: int, month: int, now: Optional[float] = None) -> bool:
+        """Проверяет, можно ли отдать страницу из кэша без обращения к сайту."""
+        now = time.time() if now is None else now
+        if meta['fetched_at'] >= month_end_timestamp(year, month):
+            return True
+        return now - meta['fetched_at'] < self.current_month_ttl
+
+    def conditional_headers(self, meta: dict) -> Dict[str, str]:
+        """Формирует заголовки условного запроса по метаданным страницы."""
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def put(self, station: int, year: int, month: int, body: bytes,
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Сохраняет страницу в кэш и при необходимости вытесняет старые записи."""
+        key = self.make_key(station, year, month)
+        filename = f"{key}.html"
+        tmp_path = os.path.join(self.cache_dir, f"{filename}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, os.path.join(self.cache_dir, filename))
+
+        now = time.time()
+        with self._lock:
+            self._index[key] = {
+                'file': filename,
+                'size': len(body),
+                'etag': etag,
+                'last_modified': last_modified,
+                'fetched_at': now,
+                'last_access': now,
+            }
+            self._evict()
+            self._write_index()
+
+    def touch(self, station: int, year: int, month: int) -> None:
+        """Отмечает страницу как подтвержденную сайтом (ответ 304 Not Modified)."""
+        key = self.make_key(station, year, month)
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is not None:
+                entry['fetched_at'] = entry['last_access'] = time.time()
+                self._write_index()
+
+    def flush(self) -> None:
+        """Сохраняет на диск изменения индекса (время последнего обращения к страницам)."""
+        with self._lock:
+            if self._dirty:
+                self._write_index()
+
+    def clear(self) -> None:
+        """Удаляет все страницы из кэша."""
+        with self._lock:
+            for entry in self._index.values():
+                self._remove_file(entry['file'])
+            self._index.clear()
+            self._write_index()
+
+    def _evict(self) -> None:
+        total = sum(entry['size'] for entry in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for key in sorted(self._index, key=lambda k: self._index[k]['last_access']):
+            entry = self._index.pop(key)
+            self._remove_file(entry['file'])
+            total -= entry['size']
+            if total <= self.max_bytes:
+                break
+
+    def _remove_file(self, filename: str) -> None:
+        try:
+            os.remove(os.path.join(self.cache_dir, filename))
+        except OSError:
+            pass
+
+    def _load_index(self) -> Dict[str, dict]:
+        try:
+            with open(os.path.join(self.cache_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self) -> None:
+        index_path = os.path.join(self.cache_dir, INDEX_FILE)
+        tmp_path = index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, index_path)
+        self._dirty = False
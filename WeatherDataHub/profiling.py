@@ -0,0 +1,237 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Переменная окружения, включающая сбор замеров при запуске (например, WEATHERDATAHUB_PROFILE=1)
+PROFILE_ENV = 'WEATHERDATAHUB_PROFILE'
+CAPTURE_TOP = 25
+# Пустой контекст, который span возвращает при выключенном сборе: без создания объектов и вызова часов
+NULL_SPAN = nullcontext()
+
+
+class ProfileRegistry:
+    """
+    Замеры этапов в пределах процесса: число вызовов, время по часам и процессорное время.
+
+    Сбор выключен по умолчанию; span при выключенном сборе возвращает пустой контекст,
+    поэтому размеченные места почти ничего не стоят. Процессорное время считается для
+    потока, выполнившего этап (time.thread_time): работа пулов потоков внутри этапа
+    в него не входит, но входит во время по часам.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        """
+        Инициализирует ProfileRegistry.
+
+        Args:
+            enabled (bool): Собирать ли замеры сразу.
+        """
+        self.enabled = enabled
+        self._stages: Dict[str, List[float]] = {}
+        self._captures: Dict[str, 'Capture'] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, wall: float, cpu: float) -> None:
+        """Добавляет один вызов этапа name."""
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                self._stages[name] = [1, wall, cpu, wall]
+            else:
+                stage[0] += 1
+                stage[1] += wall
+                stage[2] += cpu
+                stage[3] = max(stage[3], wall)
+
+    def add_capture(self, name: str, capture: 'Capture') -> None:
+        """Сохраняет результат capture для действия name (заменяя прежний)."""
+        with self._lock:
+            self._captures[name] = capture
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Возвращает копию замеров: для каждого этапа count, wall_seconds, cpu_seconds, max_wall_seconds."""
+        with self._lock:
+            return {
+                name: {'count': int(count), 'wall_seconds': wall, 'cpu_seconds': cpu, 'max_wall_seconds': longest}
+                for name, (count, wall, cpu, longest) in sorted(self._stages.items())
+            }
+
+    def captures(self) -> Dict[str, 'Capture']:
+        with self._lock:
+            return dict(self._captures)
+
+    def reset(self) -> None:
+        """Удаляет все замеры и результаты capture."""
+        with self._lock:
+            self._stages.clear()
+            self._captures.clear()
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        """
+        Возвращает замеры и результаты capture в виде JSON и, если задан path, записывает их в файл.
+
+        Args:
+            path (Optional[str]): Путь к JSON файлу.
+
+        Returns:
+            str: Текст JSON.
+        """
+        text = json.dumps({
+            'stages': self.snapshot(),
+            'captures': {name: capture.as_dict() for name, capture in self.captures().items()},
+        }, ensure_ascii=False, indent=2)
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
+
+    def report(self) -> str:
+        """Возвращает замеры таблицей: этап, число вызовов, суммарное, процессорное и наибольшее время."""
+        stages = self.snapshot()
+        if not stages:
+            return "Замеров нет" if self.enabled else "Сбор замеров выключен"
+        width = max(len(name) for name in stages)
+        lines = [f"{'Этап':<{width}} {'вызовов':>8} {'всего, с':>10} {'ЦП, с':>10} {'макс, с':>10}"]
+        for name, stage in sorted(stages.items(), key=lambda item: -item[1]['wall_seconds']):
+            lines.append(f"{name:<{width}} {stage['count']:>8} {stage['wall_seconds']:>10.3f} "
+                         f"{stage['cpu_seconds']:>10.3f} {stage['max_wall_seconds']:>10.3f}")
+        return '\n'.join(lines)
+
+
+registry = ProfileRegistry(enabled=bool(os.environ.get(PROFILE_ENV)))
+
+
+class Span:
+    """Контекст замера одного вызова этапа; создается функцией span только при включенном сборе."""
+
+    __slots__ = ('name', 'wall_started', 'cpu_started')
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> 'Span':
+        self.cpu_started = time.thread_time()
+        self.wall_started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        wall = time.perf_counter() - self.wall_started
+        registry.record(self.name, wall, time.thread_time() - self.cpu_started)
+
+
+def span(name: str) -> Any:
+    """
+    Возвращает контекст замера этапа name, например: with span('csv.read'): ...
+
+    Имена этапов составляются из части программы и действия через точку
+    ('preprocess.wind', 'split.write'), чтобы отчет группировался по частям.
+    """
+    return Span(name) if registry.enabled else NULL_SPAN
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """Декоратор: каждый вызов функции замеряется как этап name."""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not registry.enabled:
+                return func(*args, **kwargs)
+            with Span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def enable(enabled: bool = True) -> None:
+    """Включает или выключает сбор замеров."""
+    registry.enabled = enabled
+
+
+class Capture:
+    """Результат capture: статистика cProfile и пиковая память по tracemalloc."""
+
+    def __init__(self) -> None:
+        self.seconds: float = 0.0
+        self.profile_text: str = ''
+        self.peak_bytes: Optional[int] = None
+        self.top_allocations: List[str] = []
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'seconds': self.seconds,
+            'peak_bytes': self.peak_bytes,
+            'top_allocations': self.top_allocations,
+            'profile': self.profile_text,
+        }
+
+    def report(self) -> str:
+        """Возвращает результат в виде текста для панели профиля."""
+        lines = [f"Время: {self.seconds:.3f} с"]
+        if self.peak_bytes is not None:
+            lines.append(f"Пиковая память (tracemalloc): {self.peak_bytes / 1024 / 1024:.1f} МБ")
+            lines.append("Память, занятая к концу действия, по строкам кода:")
+            lines.extend(self.top_allocations)
+        if self.profile_text:
+            lines.append(self.profile_text)
+        return '\n'.join(lines)
+
+
+_capture_lock = threading.Lock()
+
+
+@contextmanager
+def capture(name: str, profile: bool = True, memory: bool = True) -> Iterator[Capture]:
+    """
+    Профилирует одно действие через cProfile и tracemalloc и сохраняет результат в registry.
+
+    cProfile видит только поток, в котором выполняется блок; tracemalloc учитывает
+    выделения памяти всех потоков. Одновременно выполняется только один capture:
+    если другой уже идет, блок выполняется без профилирования.
+
+    Args:
+        name (str): Название действия в отчете.
+        profile (bool): Собирать ли статистику cProfile.
+        memory (bool): Отслеживать ли выделения памяти.
+
+    Yields:
+        Capture: Результат; заполняется после выхода из блока.
+    """
+    result = Capture()
+    if not _capture_lock.acquire(blocking=False):
+        yield result
+        return
+
+    profiler = cProfile.Profile() if profile else None
+    tracing = memory and not tracemalloc.is_tracing()
+    try:
+        if tracing:
+            tracemalloc.start()
+        started = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield result
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            result.seconds = time.perf_counter() - started
+            if tracing:
+                snapshot = tracemalloc.take_snapshot()
+                result.peak_bytes = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                result.top_allocations = [str(stat) for stat in snapshot.statistics('lineno')[:10]]
+            if profiler is not None:
+                stream = io.StringIO()
+                pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(CAPTURE_TOP)
+                result.profile_text = stream.getvalue()
+            registry.add_capture(name, result)
+    finally:
+        _capture_lock.release()
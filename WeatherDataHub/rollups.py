@@ -0,0 +1,258 @@
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from csv_cache import CACHE_DIR_NAME, CACHE_SUFFIX, file_signature, load_cached, read_csv_cached, store_cached
+from data_preprocessing import preprocess_frame
+from schema import DATE_COLUMN, LABEL_DTYPE, apply_schema, column_dtype, parse_measurement
+
+PERIODS = ('day', 'week', 'month', 'year')
+# Коды периодов pandas (to_period); неделя - с понедельника по воскресенье, как в split_by_week
+PERIOD_CODES = {'day': 'D', 'week': 'W', 'month': 'M', 'year': 'Y'}
+# Версия формата таблиц: при изменении расчета старые копии на диске пересчитываются
+ROLLUP_VERSION = 2
+
+Tables = Dict[str, pd.DataFrame]
+
+
+def rollup_path_for(file_path: str) -> str:
+    """Возвращает путь к сохраненным сводным таблицам файла (в папке __cache__ рядом с ним)."""
+    folder, name = os.path.split(os.path.abspath(file_path))
+    return os.path.join(folder, CACHE_DIR_NAME, f"{name}.rollups{CACHE_SUFFIX}")
+
+
+def measurement_values(values: pd.Series) -> pd.Series:
+    """
+    Преобразует столбец измерения исходного файла в числа, сохраняя пропуски.
+
+    Разбор тот же, что у компактной схемы (schema.parse_measurement): пустые значения,
+    «−» и «Неизвестно» остаются NaN и не попадают в минимум, среднее и число значений.
+    """
+    return parse_measurement(values)
+
+
+def numeric_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Приводит исходный или предобработанный файл к числовому виду с датой.
+
+    В исходном файле облачность и ветер - текст; он раскладывается на индикаторы
+    и скорость ветра той же векторизованной предобработкой, что и кнопка «Предобработка».
+    Температура и давление берутся из исходных значений, а скорость ветра пустой строки
+    ветра остается NaN: предобработка заменяет пропуски нулями, а сводка должна их пропускать.
+    """
+    if any(column_dtype(column) == LABEL_DTYPE for column in df.columns):
+        measures = {column: measurement_values(df[column]) for column in df.columns
+                    if 'Температура' in column or 'Давление' in column}
+        processed = preprocess_frame(df)
+        for column in [column for column in df.columns if 'Ветер' in column]:
+            speed = f"{column} (м/с)"
+            measures[speed] = processed[speed].where(df[column].notna())
+        df = apply_schema(processed.assign(**measures))
+    df = df.assign(**{DATE_COLUMN: pd.to_datetime(df[DATE_COLUMN], errors='coerce').dt.normalize()})
+    return df[df[DATE_COLUMN].notna()]
+
+
+def split_columns(columns: List[str]) -> Tuple[List[str], List[str]]:
+    """Делит столбцы на измерения (температура, давление, скорость ветра) и индикаторы (облачность, направление)."""
+    measures, flags = [], []
+    for column in columns:
+        dtype = column_dtype(column)
+        if dtype is None:
+            continue
+        (flags if '-' in column and ('Облачность' in column or 'Ветер' in column) else measures).append(column)
+    return measures, flags
+
+
+def combine(tables: Tables, keys: pd.Index) -> Tables:
+    """
+    Сворачивает строки таблиц по ключам: суммы и счетчики складываются, минимумы и максимумы
+    берутся по группе. Так любой период собирается из таблиц более мелкого периода.
+    """
+    return {
+        'sum': tables['sum'].groupby(keys).sum(),
+        'count': tables['count'].groupby(keys).sum(),
+        'min': tables['min'].groupby(keys).min(),
+        'max': tables['max'].groupby(keys).max(),
+        'rows': tables['rows'].groupby(keys).sum(),
+    }
+
+
+def period_starts(index: pd.DatetimeIndex, period: str) -> pd.DatetimeIndex:
+    """Возвращает первый календарный день периода для каждой даты."""
+    return index.to_period(PERIOD_CODES[period]).start_time
+
+
+def period_ends(starts: pd.DatetimeIndex, period: str) -> pd.DatetimeIndex:
+    """Возвращает последний календарный день периодов, начинающихся в starts."""
+    return starts.to_period(PERIOD_CODES[period]).end_time.normalize()
+
+
+def build_rollups(df: pd.DataFrame) -> Dict[str, Tables]:
+    """
+    Вычисляет сводные таблицы по дням, неделям, месяцам и годам.
+
+    Для каждого периода хранятся суммы, число непустых значений, минимумы и максимумы
+    измерений, суммы индикаторов облачности и направления ветра (число дней с признаком)
+    и число строк ('rows'). Средние и доли получаются делением при запросе, поэтому
+    таблицы можно объединять без потери точности.
+
+    Args:
+        df (pd.DataFrame): Данные исходного или предобработанного файла.
+
+    Returns:
+        Dict[str, Tables]: Таблицы для каждого периода из PERIODS, индекс - начало периода.
+    """
+    df = numeric_frame(df)
+    measures, flags = split_columns([column for column in df.columns if column != DATE_COLUMN])
+    dates = pd.DatetimeIndex(df[DATE_COLUMN])
+    values = df[measures].astype('float64').set_axis(dates)
+
+    daily = {
+        'sum': pd.concat([values, df[flags].astype('float64').set_axis(dates)], axis=1),
+        'count': values.notna().astype('int64'),
+        'min': values,
+        'max': values,
+        'rows': pd.Series(1, index=dates, dtype='int64'),
+    }
+    rollups = {'day': combine(daily, dates)}
+    for period in PERIODS[1:]:
+        day_index = pd.DatetimeIndex(rollups['day']['rows'].index)
+        rollups[period] = combine(rollups['day'], period_starts(day_index, period))
+    return rollups
+
+
+def summarize(tables: Tables, frequencies: bool = True) -> pd.DataFrame:
+    """
+    Преобразует сводные таблицы в показатели: среднее, минимум и максимум каждого измерения
+    и доля дней с каждым признаком облачности и направления ветра.
+    """
+    rows = tables['rows']
+    count = tables['count']
+    measures = list(count.columns)
+    columns = {'Дней': rows}
+    for column in measures:
+        columns[f"{column} (среднее)"] = tables['sum'][column] / count[column].replace(0, np.nan)
+        columns[f"{column} (мин)"] = tables['min'][column]
+        columns[f"{column} (макс)"] = tables['max'][column]
+    if frequencies:
+        for column in tables['sum'].columns.difference(measures, sort=False):
+            columns[f"{column} (доля)"] = tables['sum'][column] / rows
+    result = pd.DataFrame(columns, index=rows.index)
+    result.index.name = DATE_COLUMN
+    return result
+
+
+class RollupStore:
+    """
+    Сводные таблицы файлов: в памяти (LRU) и на диске в папке __cache__.
+
+    Таблицы вычисляются один раз при первом запросе к файлу и сохраняются рядом
+    с бинарными копиями csv_cache. Копия считается устаревшей, если у CSV файла
+    изменились время модификации или размер.
+    """
+
+    def __init__(self, max_entries: int = 8) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], Dict[str, Tables]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, file_path: str) -> Dict[str, Tables]:
+        """Возвращает сводные таблицы файла, при необходимости вычисляя и сохраняя их."""
+        key = os.path.abspath(file_path)
+        signature = file_signature(file_path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        cache_path = rollup_path_for(file_path)
+        stored = load_cached(cache_path, signature)
+        if isinstance(stored, dict) and stored.get('version') == ROLLUP_VERSION:
+            rollups = stored['tables']
+        else:
+            # Исходные строки: компактная схема превратила бы «−5» в NaN до разбора
+            rollups = build_rollups(read_csv_cached(file_path, dtype=str))
+            store_cached(cache_path, signature, {'version': ROLLUP_VERSION, 'tables': rollups})
+
+        with self._lock:
+            self._entries[key] = (signature, rollups)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return rollups
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+rollup_store = RollupStore()
+
+
+def slice_tables(tables: Tables, start: Optional[pd.Timestamp], end: Optional[pd.Timestamp]) -> Tables:
+    """Оставляет строки таблиц с индексом из интервала [start, end]."""
+    index = tables['rows'].index
+    left = 0 if start is None else int(index.searchsorted(start, side='left'))
+    right = len(index) if end is None else int(index.searchsorted(end, side='right'))
+    return {name: table.iloc[left:right] for name, table in tables.items()}
+
+
+def query_rollups(file_path: str, start: Optional[date] = None, end: Optional[date] = None,
+                  period: Optional[str] = 'month', columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Возвращает показатели за интервал дат по периодам или за весь интервал.
+
+    Периоды, целиком лежащие в интервале, берутся из готовых таблиц. Неполные периоды
+    на краях интервала (например, месяц, начинающийся с середины) собираются из дневной
+    таблицы, поэтому их значения учитывают только дни внутри интервала.
+
+    Args:
+        file_path (str): Путь к исходному или предобработанному CSV файлу.
+        start (Optional[date]): Первая дата (включительно).
+        end (Optional[date]): Последняя дата (включительно).
+        period (Optional[str]): 'day', 'week', 'month', 'year' или None - одна строка за весь интервал.
+        columns (Optional[List[str]]): Столбцы результата (по умолчанию - все).
+
+    Returns:
+        pd.DataFrame: Строка на период, индекс - первый день периода (или первая дата интервала).
+    """
+    if period is not None and period not in PERIODS:
+        raise ValueError(f"Неизвестный период: {period}. Доступны: {', '.join(PERIODS)}")
+
+    rollups = rollup_store.get(file_path)
+    first = pd.Timestamp(start) if start is not None else None
+    last = pd.Timestamp(end) if end is not None else None
+    daily = slice_tables(rollups['day'], first, last)
+
+    if period is None:
+        if daily['rows'].empty:
+            tables = combine(daily, pd.DatetimeIndex([]))
+        else:
+            tables = combine(daily, pd.DatetimeIndex(np.repeat(daily['rows'].index[0], len(daily['rows']))))
+    elif period == 'day':
+        tables = daily
+    else:
+        starts = period_starts(pd.DatetimeIndex(daily['rows'].index), period)
+        ends = period_ends(starts, period)
+        partial = np.zeros(len(starts), dtype=bool)
+        if first is not None:
+            partial |= (starts < first)
+        if last is not None:
+            partial |= (ends > last)
+
+        if partial.all():
+            complete = {name: table.iloc[:0] for name, table in rollups[period].items()}
+        else:
+            complete = slice_tables(rollups[period], starts[~partial].min(), starts[~partial].max())
+        edges = combine({name: table[partial] for name, table in daily.items()}, starts[partial])
+        tables = {name: pd.concat([complete[name], edges[name]]).sort_index() for name in complete}
+
+    result = summarize(tables)
+    return result if columns is None else result[columns]
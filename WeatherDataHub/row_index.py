@@ -0,0 +1,167 @@
+import csv
+import io
+import os
+import struct
+import threading
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from csv_cache import read_csv_cached
+
+INDEX_SUFFIX = '.idx'
+MAGIC = b'WDHIDX1\0'
+# Заголовок: сигнатура, время изменения и размер X.csv и Y.csv, число записей
+HEADER = struct.Struct('<8s5q')
+RECORD_DTYPE = np.dtype([('date', '<i8'), ('row', '<i8'), ('offset', '<i8')])
+SCAN_BLOCK_SIZE = 64 * 1024 * 1024
+
+
+def index_path_for(y_file: str) -> str:
+    return y_file + INDEX_SUFFIX
+
+
+def file_signature(file_path: str) -> Tuple[int, int]:
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def line_offsets(file_path: str) -> np.ndarray:
+    """Возвращает смещения (в байтах) начала каждой строки файла, читая его блоками."""
+    offsets = [np.zeros(1, dtype=np.int64)]
+    position = 0
+    with open(file_path, 'rb') as f:
+        while True:
+            block = f.read(SCAN_BLOCK_SIZE)
+            if not block:
+                break
+            newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord('\n'))
+            offsets.append(newlines.astype(np.int64) + position + 1)
+            position += len(block)
+    offsets = np.concatenate(offsets)
+    # Последний перевод строки завершает файл, после него новой строки нет
+    return offsets[offsets < position]
+
+
+def build_row_index(x_file: str, y_file: str) -> str:
+    """
+    Строит бинарный индекс Y.csv: для каждой даты из X.csv - номер строки и ее смещение в Y.csv.
+
+    Записи отсортированы по дате (устойчиво, поэтому среди одинаковых дат первой идет
+    строка, стоящая в файле раньше) и хранятся после заголовка как массив RECORD_DTYPE,
+    который можно открыть через np.memmap.
+
+    Args:
+        x_file (str): Путь к X.csv.
+        y_file (str): Путь к Y.csv.
+
+    Returns:
+        str: Путь к файлу индекса.
+    """
+    dates = pd.to_datetime(read_csv_cached(x_file).iloc[:, 0], errors='coerce').to_numpy(dtype='datetime64[D]')
+    offsets = line_offsets(y_file)[1:]
+    if len(offsets) != len(dates):
+        raise ValueError(f"Число строк в {x_file} ({len(dates)}) и {y_file} ({len(offsets)}) не совпадает")
+
+    records = np.empty(len(dates), dtype=RECORD_DTYPE)
+    records['date'] = dates.astype(np.int64)
+    records['row'] = np.arange(len(dates))
+    records['offset'] = offsets
+    records = records[np.argsort(records['date'], kind='stable')]
+
+    index_path = index_path_for(y_file)
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, *file_signature(x_file), *file_signature(y_file), len(records)))
+        f.write(records.tobytes())
+    os.replace(tmp_path, index_path)
+    return index_path
+
+
+class RowIndex:
+    """Отображенный в память индекс строк Y.csv по датам."""
+
+    def __init__(self, index_path: str, count: int) -> None:
+        if count:
+            self.records = np.memmap(index_path, dtype=RECORD_DTYPE, mode='r', offset=HEADER.size, shape=(count,))
+        else:
+            self.records = np.empty(0, dtype=RECORD_DTYPE)
+        self.dates = self.records['date']
+
+    def find(self, d: date) -> Optional[Tuple[int, int]]:
+        """Возвращает номер строки и смещение в Y.csv для даты или None, если даты нет в X.csv."""
+        target = np.datetime64(d, 'D').astype(np.int64)
+        position = int(np.searchsorted(self.dates, target, side='left'))
+        if position < len(self.dates) and self.dates[position] == target:
+            record = self.records[position]
+            return int(record['row']), int(record['offset'])
+        return None
+
+
+def read_header(index_path: str) -> Optional[tuple]:
+    try:
+        with open(index_path, 'rb') as f:
+            header = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return None
+    return header if header[0] == MAGIC else None
+
+
+_indexes: Dict[str, Tuple[tuple, RowIndex]] = {}
+_indexes_lock = threading.Lock()
+
+
+def open_row_index(x_file: str, y_file: str) -> RowIndex:
+    """
+    Открывает индекс строк Y.csv, перестраивая его, если X.csv или Y.csv изменились.
+
+    Args:
+        x_file (str): Путь к X.csv.
+        y_file (str): Путь к Y.csv.
+
+    Returns:
+        RowIndex: Индекс, готовый к поиску.
+    """
+    index_path = index_path_for(y_file)
+    signature = (*file_signature(x_file), *file_signature(y_file))
+
+    with _indexes_lock:
+        cached = _indexes.get(index_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+    header = read_header(index_path)
+    if header is None or tuple(header[1:5]) != signature:
+        with _indexes_lock:
+            _indexes.pop(index_path, None)
+        build_row_index(x_file, y_file)
+        header = read_header(index_path)
+
+    row_index = RowIndex(index_path, header[5])
+    with _indexes_lock:
+        _indexes[index_path] = (signature, row_index)
+    return row_index
+
+
+def parse_value(text: str) -> object:
+    """Преобразует поле CSV в int или float, если это число; пустое поле - в NaN."""
+    if text == '':
+        return float('nan')
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+
+def read_row(y_file: str, offset: int) -> Dict[str, object]:
+    """Читает из CSV файла заголовок и одну строку, начинающуюся со смещения offset."""
+    with open(y_file, 'rb') as f:
+        header = f.readline()
+        f.seek(offset)
+        line = f.readline()
+    columns, values = csv.reader(io.StringIO((header + line).decode('utf-8')))
+    return {column: parse_value(value) for column, value in zip(columns, values)}
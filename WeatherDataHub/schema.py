@@ -0,0 +1,103 @@
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+DATE_COLUMN = 'Дата'
+# Столбцы исходного файла в порядке, в котором их записывает WeatherScraper
+RAW_COLUMNS = [
+    DATE_COLUMN, 'Температура (день)', 'Давление (день)', 'Облачность (день)', 'Ветер (день)',
+    'Температура (вечер)', 'Давление (вечер)', 'Облачность (вечер)', 'Ветер (вечер)'
+]
+
+MEASUREMENT_DTYPE = 'float32'
+# Измерение, все значения которого целые (давление в мм рт. ст.)
+WHOLE_MEASUREMENT_DTYPE = 'int16'
+FLAG_DTYPE = 'int8'
+LABEL_DTYPE = 'category'
+# Версия правил приведения типов: входит в ключ компактных копий csv_cache,
+# поэтому копии, сохраненные по прежним правилам, создаются заново
+SCHEMA_VERSION = 2
+# Типографский минус, которым записаны отрицательные температуры на сайте («−5»)
+TYPOGRAPHIC_MINUS = '−'
+
+
+def column_dtype(column: str) -> Optional[str]:
+    """
+    Возвращает компактный тип столбца исходного или предобработанного файла.
+
+    Температура, давление и скорость ветра - float32; индикаторы облачности и направления
+    ветра из предобработанных файлов («Облачность (день)-Ясно», «Ветер (день)-СЗ») - int8;
+    текстовые облачность и ветер исходных файлов - category. Для даты и неизвестных
+    столбцов возвращается None: их тип не меняется.
+    """
+    if column == DATE_COLUMN:
+        return None
+    if 'Облачность' in column or 'Ветер' in column:
+        if column.endswith('(м/с)'):
+            return MEASUREMENT_DTYPE
+        return FLAG_DTYPE if '-' in column else LABEL_DTYPE
+    if 'Температура' in column or 'Давление' in column:
+        return MEASUREMENT_DTYPE
+    return None
+
+
+def schema_for(columns: List[str]) -> Dict[str, str]:
+    """Возвращает компактные типы для тех столбцов, которые описаны схемой."""
+    return {column: dtype for column in columns if (dtype := column_dtype(column)) is not None}
+
+
+def parse_measurement(values: pd.Series) -> pd.Series:
+    """
+    Преобразует столбец измерения в числа.
+
+    «+5» и «−3» (с типографским минусом) становятся числами, а пустые и нечисловые
+    значения («−» вместо давления, «Неизвестно») - NaN.
+    """
+    if not pd.api.types.is_numeric_dtype(values):
+        values = values.astype(object).str.replace(TYPOGRAPHIC_MINUS, '-', regex=False)
+    return pd.to_numeric(values, errors='coerce')
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Приводит столбцы DataFrame к компактным типам схемы.
+
+    Измерения разбираются parse_measurement: «−5» становится -5, а нечисловые значения
+    (например, «−» вместо давления) - NaN.
+    Столбец индикаторов с пропусками остается float32, так как int8 не хранит NaN.
+
+    Args:
+        df (pd.DataFrame): Данные исходного или предобработанного файла.
+
+    Returns:
+        pd.DataFrame: Новый DataFrame с теми же столбцами и компактными типами.
+    """
+    columns = {}
+    for column, dtype in schema_for(list(df.columns)).items():
+        values = df[column]
+        if dtype == LABEL_DTYPE:
+            columns[column] = values.astype(LABEL_DTYPE)
+            continue
+        values = parse_measurement(values)
+        if dtype == FLAG_DTYPE and values.isna().any():
+            dtype = MEASUREMENT_DTYPE
+        columns[column] = values.astype(dtype)
+    return df.assign(**columns) if columns else df
+
+
+def memory_report(df: pd.DataFrame) -> Dict[str, Dict[str, int]]:
+    """
+    Сравнивает занимаемую память до и после приведения к схеме.
+
+    Args:
+        df (pd.DataFrame): Данные с типами, определенными pandas при чтении.
+
+    Returns:
+        Dict[str, Dict[str, int]]: Для каждого столбца и для итога ('Всего') - байты
+        до ('before') и после ('after') приведения.
+    """
+    before = df.memory_usage(deep=True, index=False)
+    after = apply_schema(df).memory_usage(deep=True, index=False)
+    report = {column: {'before': int(before[column]), 'after': int(after[column])} for column in df.columns}
+    report['Всего'] = {'before': int(before.sum()), 'after': int(after.sum())}
+    return report
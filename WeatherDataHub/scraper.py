@@ -1,8 +1,34 @@
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import csv
+import json
 import os
-from datetime import datetime, timedelta
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+from page_cache import PageCache
+from profiling import registry, span, timed
+from schema import RAW_COLUMNS
+from station_store import StationStore, rows_to_csv_bytes
+
+BASE_URL = "https://www.gismeteo.ru/diary"
+STATION_ID = 4618
+# Имена станций для названий файлов; остальные станции называются по номеру (station_27612)
+STATION_NAMES = {4618: 'samara'}
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+DATASET_FOLDER = 'dataset'
+CHECKPOINT_SUFFIX = '.checkpoint'
+# Сколько записанных месяцев хранилища станций накапливается до обновления манифеста
+MANIFEST_FLUSH_MONTHS = 12
+CSV_HEADER = RAW_COLUMNS
 
 CLOUDINESS = {
     'sun.png': 'Ясно',
@@ -11,90 +37,564 @@ CLOUDINESS = {
     'dull.png': 'Пасмурно'
 }
 
-class WeatherScraper:
-    def get_weather_data(self, year, month):
-        url = f"https://www.gismeteo.ru/diary/4618/{year}/{month:02d}/"
-        headers = {"User-Agent": "Mozilla/5.0"}
-        
+
+def station_name(station: int) -> str:
+    """Возвращает имя станции для названия файла."""
+    return STATION_NAMES.get(station, f"station_{station}")
+
+
+def month_range(start_date: datetime, end_date: datetime) -> List[Tuple[int, int]]:
+    """Возвращает список пар (год, месяц) от начальной до конечной даты включительно."""
+    months = []
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def available_parsers() -> List[str]:
+    """Возвращает список установленных парсеров HTML для BeautifulSoup."""
+    parsers = ['html.parser']
+    try:
+        import lxml  # noqa: F401
+        parsers.append('lxml')
+    except ImportError:
+        pass
+    return parsers
+
+
+def get_cloudiness(cell):
+    img = cell.find('img', class_='screen_icon')
+    if img and 'src' in img.attrs:
+        src = img['src'].split('/')[-1]
+        return CLOUDINESS.get(src, 'Неизвестно')
+    return 'Нет данных'
+
+
+def parse_weather_page(content, year, month, parser='html.parser'):
+    """
+    Извлекает строки таблицы погоды из HTML страницы дневника.
+
+    Функция не зависит от состояния WeatherScraper, поэтому может выполняться
+    в отдельном процессе.
+
+    Returns:
+        Optional[list]: Список строк или None, если таблица не найдена.
+    """
+    soup = BeautifulSoup(content, parser)
+    table = soup.find('table', attrs={"align": "center", "valign": "top", "border": "0"})
+
+    if not table:
+        return None
+
+    data = []
+    rows = table.find_all('tr')[2:]
+    for row in rows:
+        cols = row.find_all('td')
+        if len(cols) >= 11:
+            date = f"{year}-{month:02d}-{cols[0].text.strip()}"
+            temp_day = cols[1].text.strip()
+            pressure_day = cols[2].text.strip()
+            cloudiness_day = get_cloudiness(cols[3])
+            wind_day = cols[5].text.strip().split('\n')[-1]
+            temp_evening = cols[6].text.strip()
+            pressure_evening = cols[7].text.strip()
+            cloudiness_evening = get_cloudiness(cols[8])
+            wind_evening = cols[10].text.strip().split('\n')[-1]
+            data.append([
+                date, temp_day, pressure_day, cloudiness_day, wind_day,
+                temp_evening, pressure_evening, cloudiness_evening, wind_evening
+            ])
+
+    return data
+
+
+def timed_parse_weather_page(content, year, month, parser='html.parser'):
+    """Вызывает parse_weather_page и возвращает результат вместе со временем разбора в секундах."""
+    started = time.perf_counter()
+    data = parse_weather_page(content, year, month, parser)
+    return data, time.perf_counter() - started
+
+
+def load_checkpoint(checkpoint_path: str, filepath: str) -> Optional[dict]:
+    """Читает контрольную точку сбора. Возвращает None, если продолжить сбор нельзя."""
+    try:
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if os.path.getsize(filepath) >= checkpoint['offset']:
+            return checkpoint
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+
+def save_checkpoint(checkpoint_path: str, checkpoint: dict) -> None:
+    """Атомарно записывает контрольную точку сбора."""
+    tmp_path = checkpoint_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+class RateLimiter:
+    """
+    Ограничивает частоту запросов к каждому хосту.
+
+    Запросы к одному хосту распределяются с интервалом не меньше 1 / requests_per_second
+    секунд, даже если их отправляют несколько потоков одновременно.
+    """
+
+    def __init__(self, requests_per_second: float) -> None:
+        self.interval: float = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}
+
+    def wait(self, host: str) -> None:
+        """Блокирует поток до момента, когда к хосту можно отправить следующий запрос."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class StageStats:
+    """Счетчики одной стадии конвейера: число элементов, объем данных и суммарное время работы."""
+
+    def __init__(self, name: str, workers: int = 1) -> None:
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.bytes = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float, nbytes: int = 0) -> None:
+        with self._lock:
+            self.items += 1
+            self.bytes += nbytes
+            self.busy_seconds += seconds
+
+    def describe(self, elapsed: float) -> str:
+        """
+        Формирует строку с пропускной способностью стадии.
+
+        Загрузка показывает долю времени, в течение которой были заняты все исполнители
+        стадии; стадия с наибольшей загрузкой ограничивает скорость конвейера.
+        """
+        rate = self.items / elapsed if elapsed > 0 else 0.0
+        utilization = self.busy_seconds / (elapsed * self.workers) if elapsed > 0 else 0.0
+        volume = f", {self.bytes / 1024:.0f} КБ" if self.bytes else ""
+        return f"{self.name}: {self.items} стр., {rate:.1f} стр/с{volume}, загрузка {utilization:.0%}"
+
+
+class ScrapePipeline:
+    """
+    Конвейер «загрузка -> разбор -> запись».
+
+    Потоки-загрузчики получают страницы и кладут их в ограниченную очередь, откуда
+    диспетчер передает их в пул процессов-парсеров. Результаты отдаются единственному
+    потребителю (записи в файл) строго в порядке месяцев. Одновременно в конвейере
+    находится не более queue_size месяцев.
+    """
+
+    def __init__(self, scraper: 'WeatherScraper', parse_workers: int, queue_size: int) -> None:
+        self.scraper = scraper
+        self.parse_workers = max(1, parse_workers)
+        self.queue_size = max(1, queue_size)
+        self.fetch_stats = StageStats("Загрузка", scraper.max_workers)
+        self.parse_stats = StageStats("Разбор", self.parse_workers)
+        self.write_stats = StageStats("Запись")
+        self.elapsed = 0.0
+
+    def report(self) -> List[str]:
+        """Возвращает отчет о пропускной способности каждой стадии."""
+        return [stats.describe(self.elapsed) for stats in (self.fetch_stats, self.parse_stats, self.write_stats)]
+
+    def _fetch(self, index: int, year: int, month: int, raw_queue: queue.Queue,
+               results: Dict[int, Future], ready: threading.Condition) -> None:
+        """
+        Загружает страницу и передает ее диспетчеру.
+
+        Любая ошибка загрузки (кроме сетевых, которые fetch_page обрабатывает сам)
+        сохраняется как результат месяца index, чтобы запись не ждала его бесконечно.
+        """
         try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-        except requests.RequestException as e:
-            print(f"Ошибка при запросе URL {url}: {e}")
-            return []
+            started = time.perf_counter()
+            content = self.scraper.fetch_page(year, month)
+            self.fetch_stats.add(time.perf_counter() - started, len(content) if content else 0)
+        except Exception as e:
+            future = Future()
+            future.set_exception(e)
+            with ready:
+                results[index] = future
+                ready.notify_all()
+            return
+        raw_queue.put((index, year, month, content))
 
-        soup = BeautifulSoup(response.content, 'html.parser')
-        table = soup.find('table', attrs={"align": "center", "valign": "top", "border": "0"})
+    def _dispatch(self, raw_queue: queue.Queue, parse_pool: ProcessPoolExecutor,
+                  results: Dict[int, Future], ready: threading.Condition) -> None:
+        while True:
+            item = raw_queue.get()
+            if item is None:
+                return
+            index, year, month, content = item
+            if content is None:
+                future = Future()
+                future.set_result(([], 0.0))
+            else:
+                try:
+                    future = parse_pool.submit(timed_parse_weather_page, content, year, month, self.scraper.parser)
+                except Exception as e:
+                    future = Future()
+                    future.set_exception(e)
+            with ready:
+                results[index] = future
+                ready.notify_all()
 
-        if not table:
-            print(f"Таблица с данными не найдена на странице {url}")
-            return []
+    def run(self, months: List[Tuple[int, int]]) -> Iterator[Tuple[int, int, list]]:
+        """Отдает данные за месяцы в исходном порядке, засекая время работы каждой стадии."""
+        started = time.perf_counter()
+        raw_queue: queue.Queue = queue.Queue(maxsize=self.queue_size + 1)
+        results: Dict[int, Future] = {}
+        ready = threading.Condition()
+
+        with ThreadPoolExecutor(max_workers=self.scraper.max_workers) as fetch_pool, \
+                ProcessPoolExecutor(max_workers=self.parse_workers) as parse_pool:
+            dispatcher = threading.Thread(target=self._dispatch, args=(raw_queue, parse_pool, results, ready),
+                                          daemon=True)
+            dispatcher.start()
+            try:
+                for index, (year, month) in enumerate(months[:self.queue_size]):
+                    fetch_pool.submit(self._fetch, index, year, month, raw_queue, results, ready)
+
+                for index, (year, month) in enumerate(months):
+                    with ready:
+                        ready.wait_for(lambda: index in results)
+                        future = results.pop(index)
+                    month_data, parse_seconds = future.result()
+                    if month_data is None:
+                        print(f"Таблица с данными не найдена на странице {self.scraper.get_url(year, month)}")
+                        month_data = []
+                    self.parse_stats.add(parse_seconds)
+                    if registry.enabled:
+                        # Разбор идет в другом процессе: его время известно только из результата
+                        registry.record('scraper.parse', parse_seconds, parse_seconds)
+
+                    next_index = index + self.queue_size
+                    if next_index < len(months):
+                        fetch_pool.submit(self._fetch, next_index, *months[next_index], raw_queue, results, ready)
+
+                    write_started = time.perf_counter()
+                    yield year, month, month_data
+                    self.write_stats.add(time.perf_counter() - write_started)
+            finally:
+                fetch_pool.shutdown(wait=True, cancel_futures=True)
+                raw_queue.put(None)
+                dispatcher.join()
+                self.elapsed = time.perf_counter() - started
+
+
+class WeatherScraper:
+    def __init__(self, max_workers: int = 4, requests_per_second: float = 2.0,
+                 max_retries: int = 3, backoff_factor: float = 0.5, timeout: float = 30.0,
+                 base_url: str = BASE_URL, station_id: int = STATION_ID,
+                 page_cache: Optional[PageCache] = None, parser: str = 'html.parser',
+                 parse_workers: int = 0, queue_size: int = 32, stations: Optional[List[int]] = None):
+        """
+        Инициализирует WeatherScraper.
+
+        Args:
+            max_workers (int): Максимальное число одновременно загружаемых страниц.
+                При значении 1 месяцы загружаются последовательно.
+            requests_per_second (float): Ограничение частоты запросов к одному хосту.
+                Значение 0 отключает ограничение.
+            max_retries (int): Число повторных попыток при сетевых ошибках и ответах 429/5xx.
+            backoff_factor (float): Базовая задержка между попытками (удваивается с каждой попыткой).
+            timeout (float): Таймаут одного запроса в секундах.
+            base_url (str): Адрес дневника погоды (можно подменить локальным сервером).
+            station_id (int): Идентификатор метеостанции gismeteo.
+            page_cache (Optional[PageCache]): Кэш страниц. Если не задан, страницы
+                всегда загружаются с сайта.
+            parser (str): Парсер HTML для BeautifulSoup ('html.parser' или 'lxml', если установлен).
+            parse_workers (int): Число процессов для разбора страниц. При значении 0 страницы
+                разбираются в потоках загрузки.
+            queue_size (int): Максимальное число месяцев, одновременно находящихся в конвейере
+                загрузки и разбора.
+            stations (Optional[List[int]]): Станции для run_stations (по умолчанию - station_id).
+                Страницы всех станций загружаются общим пулом из max_workers соединений.
+        """
+        if parser not in available_parsers():
+            raise ValueError(f"Парсер {parser} не установлен. Доступные парсеры: {', '.join(available_parsers())}")
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.base_url = base_url.rstrip('/')
+        self.station_id = station_id
+        self.stations: List[int] = list(stations) if stations else [station_id]
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.page_cache = page_cache
+        self.parser = parser
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+        self.pipeline: Optional[ScrapePipeline] = None
+
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get_url(self, year, month, station: Optional[int] = None):
+        station = self.station_id if station is None else station
+        return f"{self.base_url}/{station}/{year}/{month:02d}/"
 
-        data = []
-        rows = table.find_all('tr')[2:]
-        for row in rows:
-            cols = row.find_all('td')
-            if len(cols) >= 11:
-                date = f"{year}-{month:02d}-{cols[0].text.strip()}"
-                temp_day = cols[1].text.strip()
-                pressure_day = cols[2].text.strip()
-                cloudiness_day = self.get_cloudiness(cols[3])
-                wind_day = cols[5].text.strip().split('\n')[-1]
-                temp_evening = cols[6].text.strip()
-                pressure_evening = cols[7].text.strip()
-                cloudiness_evening = self.get_cloudiness(cols[8])
-                wind_evening = cols[10].text.strip().split('\n')[-1]
-                data.append([
-                    date, temp_day, pressure_day, cloudiness_day, wind_day,
-                    temp_evening, pressure_evening, cloudiness_evening, wind_evening
-                ])
+    @timed('scraper.fetch')
+    def fetch_page(self, year, month, station: Optional[int] = None) -> Optional[bytes]:
+        """
+        Загружает страницу дневника за месяц с повторными попытками. Возвращает None при ошибке.
 
+        Актуальная страница из кэша отдается без обращения к сайту; для устаревшей
+        отправляется условный запрос, и при ответе 304 используется копия из кэша.
+        """
+        station = self.station_id if station is None else station
+        url = self.get_url(year, month, station)
+        host = urlsplit(url).netloc
+
+        cached = None
+        headers = {}
+        if self.page_cache is not None:
+            cached = self.page_cache.get(station, year, month)
+            if cached is not None:
+                body, meta = cached
+                if self.page_cache.is_fresh(meta, year, month):
+                    return body
+                headers = self.page_cache.conditional_headers(meta)
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.wait(host)
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+                if response.status_code == 304 and cached is not None:
+                    self.page_cache.touch(station, year, month)
+                    return cached[0]
+                response.raise_for_status()
+                if self.page_cache is not None:
+                    self.page_cache.put(station, year, month, response.content,
+                                        response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                return response.content
+            except requests.RequestException as e:
+                status = e.response.status_code if e.response is not None else None
+                if attempt == self.max_retries or (status is not None and status not in RETRY_STATUSES):
+                    print(f"Ошибка при запросе URL {url}: {e}")
+                    return None
+                time.sleep(self.backoff_factor * 2 ** attempt)
+        return None
+
+    def get_weather_data(self, year, month, station: Optional[int] = None):
+        content = self.fetch_page(year, month, station)
+        if content is None:
+            return []
+        return self.parse_page(content, year, month, station)
+
+    def parse_page(self, content, year, month, station: Optional[int] = None):
+        with span('scraper.parse'):
+            data = parse_weather_page(content, year, month, self.parser)
+        if data is None:
+            print(f"Таблица с данными не найдена на странице {self.get_url(year, month, station)}")
+            return []
         return data
 
     def get_cloudiness(self, cell):
-        img = cell.find('img', class_='screen_icon')
-        if img and 'src' in img.attrs:
-            src = img['src'].split('/')[-1]
-            return CLOUDINESS.get(src, 'Неизвестно')
-        return 'Нет данных'
+        return get_cloudiness(cell)
+
+    def fetch_months(self, months: List[Tuple[int, int]]) -> Iterator[Tuple[int, int, list]]:
+        """
+        Загружает данные за указанные месяцы и отдает их строго в порядке месяцев.
+
+        Одновременно в работе находится не более 2 * max_workers страниц, поэтому
+        в памяти хранятся только уже загруженные, но еще не отданные месяцы.
+        """
+        pages = self.fetch_pages((self.station_id, year, month) for year, month in months)
+        for _, year, month, month_data in pages:
+            yield year, month, month_data
+
+    def fetch_pages(self, pages: Iterable[Tuple[int, int, int]]) -> Iterator[Tuple[int, int, int, list]]:
+        """
+        Загружает страницы (станция, год, месяц) и отдает данные строго в исходном порядке.
+
+        Все страницы, в том числе разных станций, загружаются одним пулом из max_workers
+        потоков, а сессия держит не больше max_workers соединений: это общий бюджет
+        соединений. Одновременно в работе находится не более 2 * max_workers страниц.
+        """
+        if self.max_workers == 1:
+            for station, year, month in pages:
+                yield station, year, month, self.get_weather_data(year, month, station)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pages_iter = iter(pages)
+            pending = deque(
+                (station, year, month, executor.submit(self.get_weather_data, year, month, station))
+                for station, year, month in islice(pages_iter, self.max_workers * 2)
+            )
+            while pending:
+                station, year, month, future = pending.popleft()
+                month_data = future.result()
+                for next_station, next_year, next_month in islice(pages_iter, 1):
+                    pending.append((next_station, next_year, next_month,
+                                    executor.submit(self.get_weather_data, next_year, next_month, next_station)))
+                yield station, year, month, month_data
 
     def run(self, start_date, end_date, progress_callback, status_callback):
+        """
+        Собирает данные за период и построчно записывает их в CSV файл.
+
+        Строки каждого месяца дописываются в файл сразу после загрузки, а в файл
+        контрольной точки (<файл>.checkpoint) записывается последний завершенный месяц
+        и размер файла после него. Если предыдущий запуск за тот же период был прерван,
+        сбор продолжается со следующего месяца.
+
+        progress_callback получает процент собранных месяцев, status_callback - строку
+        состояния. Исключение из них прерывает сбор после записанного месяца, и
+        следующий запуск продолжит его с контрольной точки.
+        """
         start_date = datetime.strptime(start_date, "%m.%Y")
         end_date = datetime.strptime(end_date, "%m.%Y")
-        
-        all_data = []
-        current_date = start_date
-        total_months = (end_date.year - start_date.year) * 12 + end_date.month - start_date.month + 1
-        processed_months = 0
-
-        while current_date <= end_date:
-            year = current_date.year
-            month = current_date.month
-            status_callback.emit(f"Получение данных за {month:02d}.{year}")
-            month_data = self.get_weather_data(year, month)
-            all_data.extend(month_data)
-            current_date += timedelta(days=32)
-            current_date = current_date.replace(day=1)
-            
-            processed_months += 1
-            progress = int((processed_months / total_months) * 100)
-            progress_callback.emit(progress)
-
-        filename = f'samara_weather_{start_date.strftime("%Y%m")}-{end_date.strftime("%Y%m")}.csv'
-        self.save_to_csv(all_data, filename)
+
+        filename = (f'{station_name(self.station_id)}_weather_'
+                    f'{start_date.strftime("%Y%m")}-{end_date.strftime("%Y%m")}.csv')
+        os.makedirs(DATASET_FOLDER, exist_ok=True)
+        filepath = os.path.join(DATASET_FOLDER, filename)
+        checkpoint_path = filepath + CHECKPOINT_SUFFIX
+
+        months = month_range(start_date, end_date)
+        total_months = len(months)
+        checkpoint = load_checkpoint(checkpoint_path, filepath)
+        if checkpoint is not None:
+            processed_months = checkpoint['months_completed']
+            status_callback(f"Продолжение сбора после {checkpoint['last_month']}")
+        else:
+            processed_months = 0
+        remaining = months[processed_months:]
+
+        with open(filepath, 'r+b' if checkpoint is not None else 'wb') as csvfile:
+            if checkpoint is not None:
+                csvfile.truncate(checkpoint['offset'])
+                csvfile.seek(checkpoint['offset'])
+            else:
+                csvfile.write(rows_to_csv_bytes([CSV_HEADER]))
+
+            status_callback(f"Получение данных за {len(remaining)} мес. ({self.max_workers} потоков)")
+            if self.parse_workers > 0:
+                self.pipeline = ScrapePipeline(self, self.parse_workers, self.queue_size)
+                monthly_data = self.pipeline.run(remaining)
+            else:
+                monthly_data = self.fetch_months(remaining)
+            for year, month, month_data in monthly_data:
+                status_callback(f"Получены данные за {month:02d}.{year}")
+                with span('scraper.write'):
+                    csvfile.write(rows_to_csv_bytes(month_data))
+                    csvfile.flush()
+                    os.fsync(csvfile.fileno())
+
+                processed_months += 1
+                save_checkpoint(checkpoint_path, {
+                    'last_month': f"{year}-{month:02d}",
+                    'months_completed': processed_months,
+                    'offset': csvfile.tell(),
+                })
+                progress = int((processed_months / total_months) * 100)
+                progress_callback(progress)
+
+        if self.page_cache is not None:
+            self.page_cache.flush()
+
+        if self.pipeline is not None:
+            report = self.pipeline.report()
+            status_callback('; '.join(report))
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
         return filename
 
+    def run_stations(self, start_date, end_date, progress_callback, status_callback,
+                     store: Optional[StationStore] = None) -> str:
+        """
+        Собирает данные станций self.stations за период в хранилище станций.
+
+        Страницы всех станций загружаются одновременно в пределах общего бюджета
+        соединений (fetch_pages): месяц за месяцем, внутри месяца - станция за станцией.
+        Как только получены все станции месяца, он записывается в StationStore одним
+        файлом. Манифест хранилища обновляется раз в MANIFEST_FLUSH_MONTHS месяцев и при
+        завершении (в том числе при ошибке или отмене), а не после каждого месяца.
+        Месяцы, уже записанные для станции, пропускаются, поэтому прерванный
+        сбор продолжается с места остановки. Месяцы, за которые данных не получено,
+        не записываются и загружаются заново при следующем запуске.
+
+        Args:
+            start_date (str): Начальная дата (ММ.ГГГГ).
+            end_date (str): Конечная дата (ММ.ГГГГ).
+            progress_callback: Получает процент обработанных страниц.
+            status_callback: Получает строку состояния.
+            store (Optional[StationStore]): Хранилище (по умолчанию - dataset/stations).
+
+        Returns:
+            str: Папка хранилища.
+        """
+        store = store or StationStore()
+        months = month_range(datetime.strptime(start_date, "%m.%Y"), datetime.strptime(end_date, "%m.%Y"))
+        pages = [(station, year, month) for year, month in months for station in self.stations
+                 if not store.has(station, year, month)]
+        total = len(months) * len(self.stations)
+        done = total - len(pages)
+        status_callback(f"Получение данных: станций {len(self.stations)}, страниц {len(pages)} "
+                        f"({self.max_workers} потоков)")
+
+        remaining: Dict[Tuple[int, int], int] = {}
+        for _, year, month in pages:
+            remaining[(year, month)] = remaining.get((year, month), 0) + 1
+        month_rows: Dict[int, list] = {}
+        unflushed = 0
+
+        try:
+            for station, year, month, month_data in self.fetch_pages(pages):
+                if month_data:
+                    month_rows[station] = month_data
+                remaining[(year, month)] -= 1
+                if not remaining[(year, month)]:
+                    # Получены все станции месяца: месяц записывается одним файлом
+                    if month_rows:
+                        with span('scraper.write'):
+                            store.write_month(year, month, month_rows)
+                        unflushed += 1
+                    if unflushed >= MANIFEST_FLUSH_MONTHS:
+                        with span('scraper.manifest'):
+                            store.flush()
+                        unflushed = 0
+                    month_rows = {}
+                    status_callback(f"Получены данные за {month:02d}.{year}")
+                done += 1
+                progress_callback(int(done / total * 100))
+        finally:
+            # Записанные месяцы попадают в манифест и при отмене: следующий запуск их не загружает
+            with span('scraper.manifest'):
+                store.flush()
+
+        if self.page_cache is not None:
+            self.page_cache.flush()
+        return store.root
+
     def save_to_csv(self, data, filename):
-        dataset_folder = 'dataset'
-        if not os.path.exists(dataset_folder):
-            os.makedirs(dataset_folder)
-        
-        filepath = os.path.join(dataset_folder, filename)
-        
+        os.makedirs(DATASET_FOLDER, exist_ok=True)
+        filepath = os.path.join(DATASET_FOLDER, filename)
+
         with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
             writer = csv.writer(csvfile)
-            writer.writerow([
-                'Дата', 'Температура (день)', 'Давление (день)', 'Облачность (день)', 'Ветер (день)',
-                'Температура (вечер)', 'Давление (вечер)', 'Облачность (вечер)', 'Ветер (вечер)'
-            ])
-            writer.writerows(data)
\ No newline at end of file
+            writer.writerow(CSV_HEADER)
+            writer.writerows(data)
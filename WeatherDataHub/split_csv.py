@@ -1,92 +1,343 @@
+import hashlib
 import pandas as pd
+import numpy as np
 import os
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from csv_cache import read_csv_cached, remove_cached
+from profiling import span
+from manifest import file_checksum, make_entry, manifest_content, read_manifest, scan_folder, write_manifest
+from row_index import build_row_index
 
-def split_csv(input_file: str) -> None:
+PARTITIONS_FILE = 'partitions.csv'
+DEFAULT_WRITERS = min(8, os.cpu_count() or 1)
+
+def split_csv(input_file: str, progress_callback: Optional[Callable[[int], None]] = None) -> Optional[str]:
     """
     Разделяет исходный CSV файл на X.csv (даты) и Y.csv (данные).
+
+    Рядом создается бинарный индекс Y.csv.idx (дата -> номер и смещение строки в Y.csv)
+    для поиска по дате без чтения файлов целиком.
     
     Args:
         input_file (str): Путь к исходному CSV файлу.
+        progress_callback (Optional[Callable[[int], None]]): Получает процент выполнения
+            после каждого записанного файла.
+
+    Returns:
+        Optional[str]: Папка с созданными файлами или None при ошибке.
     """
     if not os.path.exists(input_file):
         print(f"Файл {input_file} не найден.")
-        return
+        return None
 
     file_name = os.path.splitext(os.path.basename(input_file))[0]
     output_folder = os.path.join('dataset', 'split_csv', file_name)
     os.makedirs(output_folder, exist_ok=True)
 
-    df: pd.DataFrame = pd.read_csv(input_file)
+    df: pd.DataFrame = read_csv_cached(input_file)
 
     if not pd.to_datetime(df.iloc[:, 0], format='%Y-%m-%d', errors='coerce').notna().all():
         print("Первый столбец не содержит корректные даты в формате ISO 8601.")
-        return
+        return None
 
     X: pd.Series = df.iloc[:, 0]
     Y: pd.DataFrame = df.iloc[:, 1:]
 
-    X.to_csv(os.path.join(output_folder, 'X.csv'), index=False, header=['Date'])
-    Y.to_csv(os.path.join(output_folder, 'Y.csv'), index=False)
+    with span('split.write'):
+        X.to_csv(os.path.join(output_folder, 'X.csv'), index=False, header=['Date'])
+    if progress_callback is not None:
+        progress_callback(30)
+    with span('split.write'):
+        Y.to_csv(os.path.join(output_folder, 'Y.csv'), index=False)
+    if progress_callback is not None:
+        progress_callback(80)
+    with span('split.row_index'):
+        build_row_index(os.path.join(output_folder, 'X.csv'), os.path.join(output_folder, 'Y.csv'))
 
     print(f"Файлы X.csv и Y.csv успешно созданы в папке {output_folder}.")
+    return output_folder
+
+def week_keys(dates: np.ndarray) -> np.ndarray:
+    """Возвращает номер недели (с понедельника по воскресенье, как to_period('W')) для каждой даты."""
+    # 1970-01-01 - четверг, поэтому его неделя начинается на три дня раньше
+    return (dates.astype(np.int64) + 3) // 7
 
-def split_by_week(input_file: str) -> None:
+def year_keys(dates: np.ndarray) -> np.ndarray:
+    """Возвращает год для каждой даты."""
+    return dates.astype('datetime64[Y]').astype(np.int64)
+
+def partition_bounds(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Возвращает начала и концы (не включительно) серий одинаковых ключей в отсортированном массиве."""
+    starts = np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1))
+    stops = np.append(starts[1:], len(keys))
+    return starts, stops
+
+def render_partitions(df: pd.DataFrame, starts: np.ndarray, stops: np.ndarray) -> Tuple[bytes, List[bytes]]:
     """
-    Разделяет исходный CSV файл на отдельные файлы по неделям.
-    
+    Преобразует разделы DataFrame в строки CSV: заголовок и по блоку байтов на раздел.
+
+    Весь DataFrame форматируется одним вызовом to_csv, а блоки разделов вырезаются
+    по границам строк без копирования. Если в данных есть поля с переводом строки
+    (границы строк не совпадают с числом записей), разделы форматируются по отдельности.
+    """
+    text = df.to_csv(index=False).encode('utf-8')
+    line_ends = np.flatnonzero(np.frombuffer(text, dtype=np.uint8) == ord('\n')) + 1
+    if len(line_ends) == len(df) + 1:
+        view = memoryview(text)
+        return text[:line_ends[0]], [view[line_ends[start]:line_ends[stop]] for start, stop in zip(starts, stops)]
+
+    header = df.iloc[:0].to_csv(index=False).encode('utf-8')
+    return header, [df.iloc[start:stop].to_csv(index=False, header=False).encode('utf-8')
+                    for start, stop in zip(starts, stops)]
+
+def block_digest(header: bytes, block: bytes) -> str:
+    """Возвращает SHA-256 файла раздела, состоящего из заголовка и блока строк."""
+    digest = hashlib.sha256(header)
+    digest.update(block)
+    return digest.hexdigest()
+
+def unchanged_on_disk(filepath: str, size: int, digest: str, previous: Optional[dict]) -> bool:
+    """
+    Проверяет, совпадает ли файл на диске с новым содержимым раздела.
+
+    Сначала сравнивается размер; хэш берется из прежней записи манифеста,
+    а если его там нет - вычисляется по файлу.
+    """
+    if not os.path.exists(filepath) or os.path.getsize(filepath) != size:
+        return False
+    if previous is not None and previous.get('bytes') == size and 'sha256' in previous:
+        return previous['sha256'] == digest
+    return file_checksum(filepath) == digest
+
+def write_partitions(df: pd.DataFrame, keys: np.ndarray, dates: np.ndarray, output_folder: str,
+                     checksum: bool = False, consolidated: bool = False, incremental: bool = False,
+                     max_workers: int = DEFAULT_WRITERS,
+                     progress_callback: Optional[Callable[[int], None]] = None) -> Tuple[List[dict], List[str]]:
+    """
+    Записывает строки df в файлы-разделы по ключу раздела.
+
+    Строки упорядочиваются по ключу одной устойчивой сортировкой, поэтому внутри раздела
+    сохраняется исходный порядок строк (как у groupby). Границы разделов и их диапазоны
+    дат вычисляются за один проход по массивам, весь CSV форматируется один раз
+    (render_partitions), а файлы записываются в пуле потоков. Строки без даты пропускаются.
+
+    С consolidated=True вместо отдельных файлов создается один файл partitions.csv:
+    разделы идут в нем подряд под общим заголовком, а запись манифеста каждого раздела
+    хранит смещение ('offset') и длину ('bytes') его строк в файле.
+
+    С incremental=True для каждого файла вычисляется SHA-256 нового содержимого, и файл
+    перезаписывается, только если он отсутствует или отличается от файла на диске.
+    Хэши сохраняются в манифест, чтобы следующий запуск сравнивал их без чтения файлов.
+
     Args:
-        input_file (str): Путь к исходному CSV файлу.
+        df (pd.DataFrame): Данные.
+        keys (np.ndarray): Ключ раздела для каждой строки.
+        dates (np.ndarray): Даты строк (datetime64[D]).
+        output_folder (str): Папка для файлов.
+        checksum (bool): Записать ли в манифест SHA-256 каждого раздела.
+        consolidated (bool): Записать все разделы в один файл.
+        incremental (bool): Перезаписывать только новые и измененные файлы.
+        max_workers (int): Число потоков записи.
+        progress_callback (Optional[Callable[[int], None]]): Получает процент обработанных
+            разделов; вызывается в потоке, вызвавшем write_partitions.
+
+    Returns:
+        Tuple[List[dict], List[str]]: Записи манифеста для всех разделов и имена
+        файлов, которые были записаны.
     """
-    if not os.path.exists(input_file):
-        print(f"Файл {input_file} не найден.")
-        return
+    positions = np.flatnonzero(~np.isnat(dates))
+    if not len(positions):
+        return [], []
+    with span('split.partition'):
+        positions = positions[np.argsort(keys[positions], kind='stable')]
+        sorted_dates = dates[positions]
 
-    df: pd.DataFrame = pd.read_csv(input_file, parse_dates=['Дата'])
-    df['Week'] = df['Дата'].dt.to_period('W')
-    grouped: pd.DataFrameGroupBy = df.groupby('Week')
+        starts, stops = partition_bounds(keys[positions])
+        first_dates = np.minimum.reduceat(sorted_dates, starts).astype(object)
+        last_dates = np.maximum.reduceat(sorted_dates, starts).astype(object)
+    with span('split.render'):
+        header, blocks = render_partitions(df.take(positions), starts, stops)
 
-    file_name: str = os.path.splitext(os.path.basename(input_file))[0]
-    output_folder: str = os.path.join('dataset', 'weekly_data', file_name)
-    os.makedirs(output_folder, exist_ok=True)
+    previous: Dict[str, dict] = {}
+    if incremental:
+        manifest = read_manifest(output_folder) or {}
+        previous = {entry['file']: entry for entry in manifest.get('partitions', [])}
+
+    if consolidated:
+        filepath = os.path.join(output_folder, PARTITIONS_FILE)
+        entries = []
+        offset = len(header)
+        for i, block in enumerate(blocks):
+            entries.append({
+                'file': PARTITIONS_FILE,
+                'start': first_dates[i].isoformat(),
+                'end': last_dates[i].isoformat(),
+                'rows': int(stops[i] - starts[i]),
+                'offset': offset,
+                'bytes': len(block),
+            })
+            if checksum:
+                entries[-1]['sha256'] = hashlib.sha256(block).hexdigest()
+            offset += len(block)
 
-    for week, group in grouped:
-        start_date: str = group['Дата'].min().strftime('%Y%m%d')
-        end_date: str = group['Дата'].max().strftime('%Y%m%d')
-        filename: str = f'{start_date}_{end_date}.csv'
-        filepath: str = os.path.join(output_folder, filename)
-        group.drop('Week', axis=1).to_csv(filepath, index=False)
-        print(f"Создан файл: {filename}")
+        if incremental:
+            digest = hashlib.sha256(header)
+            for block in blocks:
+                digest.update(block)
+            if unchanged_on_disk(filepath, offset, digest.hexdigest(), None):
+                return entries, []
 
-    print(f"Файлы по неделям созданы в папке {output_folder}.")
+        with span('split.write'), open(filepath, 'wb') as f:
+            f.write(header)
+            for block in blocks:
+                f.write(block)
+        return entries, [PARTITIONS_FILE]
 
-def split_by_year(input_file: str) -> None:
+    def write(i: int) -> Tuple[dict, bool]:
+        filename = f"{first_dates[i].strftime('%Y%m%d')}_{last_dates[i].strftime('%Y%m%d')}.csv"
+        filepath = os.path.join(output_folder, filename)
+        rows = int(stops[i] - starts[i])
+        if incremental:
+            digest = block_digest(header, blocks[i])
+            size = len(header) + len(blocks[i])
+            written = not unchanged_on_disk(filepath, size, digest, previous.get(filename))
+        else:
+            written = True
+        if written:
+            with open(filepath, 'wb') as f:
+                f.write(header)
+                f.write(blocks[i])
+        entry = make_entry(filepath, first_dates[i], last_dates[i], rows, checksum and not incremental)
+        if incremental:
+            entry['sha256'] = digest
+        return entry, written
+
+    results = []
+    with span('split.write'), ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for result in pool.map(write, range(len(blocks))):
+            results.append(result)
+            if progress_callback is not None:
+                progress_callback(len(results) * 100 // len(blocks))
+    return [entry for entry, _ in results], [entry['file'] for entry, written in results if written]
+
+def remove_stale_partitions(output_folder: str, entries: List[dict]) -> List[str]:
     """
-    Разделяет исходный CSV файл на отдельные файлы по годам.
-    
+    Удаляет из папки файлы-разделы, которых нет среди записей нового манифеста.
+
+    Удаляются только файлы с именами разделов (ГГГГММДД_ГГГГММДД.csv и partitions.csv)
+    и их бинарные копии; остальные файлы папки не трогаются.
+
+    Returns:
+        List[str]: Имена удаленных файлов.
+    """
+    keep = {entry['file'] for entry in entries}
+    candidates = {entry['file'] for entry in scan_folder(output_folder)} | {PARTITIONS_FILE}
+    removed = []
+    for file in sorted(candidates - keep):
+        filepath = os.path.join(output_folder, file)
+        if os.path.exists(filepath):
+            os.remove(filepath)
+            remove_cached(filepath)
+            removed.append(file)
+    return removed
+
+def split_by_period(input_file: str, period: str, checksum: bool = False, consolidated: bool = False,
+                    incremental: bool = False, max_workers: int = DEFAULT_WRITERS,
+                    progress_callback: Optional[Callable[[int], None]] = None) -> Optional[str]:
+    """
+    Разделяет исходный CSV файл на файлы по неделям ('week') или годам ('year').
+
+    Рядом с файлами записывается манифест с диапазоном дат, числом строк и размером
+    каждого файла, по которому поиск по дате находит нужный файл без просмотра папки.
+
+    В режиме incremental записываются только новые и измененные разделы, а файлы
+    разделов, которых больше нет, удаляются. Если ничего не изменилось, папка
+    (включая манифест) остается нетронутой.
+
     Args:
         input_file (str): Путь к исходному CSV файлу.
+        period (str): 'week' или 'year'.
+        checksum (bool): Записать ли в манифест SHA-256 каждого файла.
+        consolidated (bool): Записать все разделы в один файл partitions.csv (см. write_partitions).
+        incremental (bool): Перезаписывать только изменившиеся разделы.
+        max_workers (int): Число потоков записи.
+        progress_callback (Optional[Callable[[int], None]]): Получает процент записанных разделов.
+
+    Returns:
+        Optional[str]: Папка с созданными файлами или None, если исходный файл не найден.
     """
     if not os.path.exists(input_file):
         print(f"Файл {input_file} не найден.")
-        return
+        return None
 
-    df: pd.DataFrame = pd.read_csv(input_file, parse_dates=['Дата'])
-    grouped: pd.DataFrameGroupBy = df.groupby(df['Дата'].dt.year)
+    df: pd.DataFrame = read_csv_cached(input_file, parse_dates=['Дата'])
+    dates = df['Дата'].to_numpy(dtype='datetime64[D]')
+    with span('split.keys'):
+        keys = week_keys(dates) if period == 'week' else year_keys(dates)
 
     file_name: str = os.path.splitext(os.path.basename(input_file))[0]
-    output_folder: str = os.path.join('dataset', 'yearly_data', file_name)
+    folder_name: str = 'weekly_data' if period == 'week' else 'yearly_data'
+    output_folder: str = os.path.join('dataset', folder_name, file_name)
     os.makedirs(output_folder, exist_ok=True)
 
-    for year, group in grouped:
-        start_date: str = group['Дата'].min().strftime('%Y%m%d')
-        end_date: str = group['Дата'].max().strftime('%Y%m%d')
-        filename: str = f'{start_date}_{end_date}.csv'
-        filepath: str = os.path.join(output_folder, filename)
-        group.to_csv(filepath, index=False)
-        print(f"Создан файл: {filename}")
+    entries, written = write_partitions(df, keys, dates, output_folder, checksum, consolidated,
+                                        incremental, max_workers, progress_callback)
+    if not incremental:
+        write_manifest(output_folder, entries, input_file, period)
+        print(f"Создано разделов: {len(entries)}")
+        return output_folder
+
+    removed = remove_stale_partitions(output_folder, entries)
+    previous = read_manifest(output_folder)
+    if written or removed or previous is None or previous != manifest_content(entries, input_file, period):
+        write_manifest(output_folder, entries, input_file, period)
+    print(f"Разделов: {len(entries)}, записано: {len(written)}, удалено: {len(removed)}")
+    return output_folder
 
-    print(f"Файлы по годам созданы в папке {output_folder}.")
+def split_by_week(input_file: str, checksum: bool = False, consolidated: bool = False,
+                  incremental: bool = False,
+                  progress_callback: Optional[Callable[[int], None]] = None) -> Optional[str]:
+    """
+    Разделяет исходный CSV файл на отдельные файлы по неделям.
+
+    Args:
+        input_file (str): Путь к исходному CSV файлу.
+        checksum (bool): Записать ли в манифест SHA-256 каждого файла.
+        consolidated (bool): Записать все недели в один файл partitions.csv.
+        incremental (bool): Записать только новые и измененные файлы и удалить устаревшие.
+        progress_callback (Optional[Callable[[int], None]]): Получает процент записанных файлов.
+
+    Returns:
+        Optional[str]: Папка с созданными файлами или None, если исходный файл не найден.
+    """
+    output_folder = split_by_period(input_file, 'week', checksum, consolidated, incremental,
+                                    progress_callback=progress_callback)
+    if output_folder is not None:
+        print(f"Файлы по неделям созданы в папке {output_folder}.")
+    return output_folder
+
+def split_by_year(input_file: str, checksum: bool = False, consolidated: bool = False,
+                  incremental: bool = False,
+                  progress_callback: Optional[Callable[[int], None]] = None) -> Optional[str]:
+    """
+    Разделяет исходный CSV файл на отдельные файлы по годам.
+
+    Args:
+        input_file (str): Путь к исходному CSV файлу.
+        checksum (bool): Записать ли в манифест SHA-256 каждого файла.
+        consolidated (bool): Записать все годы в один файл partitions.csv.
+        incremental (bool): Записать только новые и измененные файлы и удалить устаревшие.
+        progress_callback (Optional[Callable[[int], None]]): Получает процент записанных файлов.
+
+    Returns:
+        Optional[str]: Папка с созданными файлами или None, если исходный файл не найден.
+    """
+    output_folder = split_by_period(input_file, 'year', checksum, consolidated, incremental,
+                                    progress_callback=progress_callback)
+    if output_folder is not None:
+        print(f"Файлы по годам созданы в папке {output_folder}.")
+    return output_folder
 
 if __name__ == "__main__":
     input_file: str = input("Введите путь к исходному CSV файлу: ")
@@ -0,0 +1,289 @@
+import csv
+import io
+import os
+import threading
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from csv_cache import read_csv_cached
+from manifest import MANIFEST_FILE, read_manifest, write_manifest
+from schema import DATE_COLUMN, RAW_COLUMNS, apply_schema
+
+STORE_FOLDER = os.path.join('dataset', 'stations')
+STATION_COLUMN = 'Станция'
+PARTITION = 'station-month'
+
+Stations = Union[int, Sequence[int], None]
+
+
+def station_list(stations: Stations) -> Optional[List[int]]:
+    """Приводит станцию или список станций к списку; None означает все станции."""
+    if stations is None:
+        return None
+    if isinstance(stations, (int, np.integer)):
+        return [int(stations)]
+    return [int(station) for station in stations]
+
+
+def month_key(year: int, month: int) -> str:
+    return f"{year}{month:02d}"
+
+
+def file_month(file: str) -> str:
+    """Возвращает ключ месяца (ГГГГММ) по имени файла месяца («2013/201303.2.csv»)."""
+    return os.path.basename(file)[:6]
+
+
+def rows_to_csv_bytes(rows: Iterable[list]) -> bytes:
+    """Форматирует строки в CSV и возвращает их в кодировке UTF-8."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+
+class StationStore:
+    """
+    Хранилище данных многих станций, разделенное по станциям и месяцам.
+
+    Все станции за один месяц лежат в одном файле <ГГГГ>/<ГГГГММ>.<поколение>.csv в формате
+    исходного файла скрапера: общий заголовок и подряд блоки строк станций.
+    Манифест (manifest.json) хранит для каждой пары (станция, месяц) файл, смещение и
+    длину блока, диапазон дат и число строк. Поэтому данные одной станции читаются
+    с диска без остального файла, а данные всех станций за дату - одним чтением
+    одного файла вместо просмотра файла каждой станции.
+
+    Записанный файл месяца не перезаписывается: новая запись месяца создает файл следующего
+    поколения, а манифест переключается на него в flush - одной атомарной заменой для всех
+    месяцев, записанных с прошлого flush. Пока манифест не заменен, он ссылается на прежние
+    файлы, и смещения в нем остаются верными при любом сбое; файлы, на которые манифест
+    больше не ссылается, удаляются после замены.
+    """
+
+    def __init__(self, root: str = STORE_FOLDER) -> None:
+        """
+        Инициализирует StationStore.
+
+        Args:
+            root (str): Папка хранилища.
+        """
+        self.root = root
+        self._lock = threading.Lock()
+        self._entries: Optional[Tuple[Tuple[int, int], Dict[str, List[dict]]]] = None
+        # Месяцы, записанные после последнего flush, и файлы, которые flush удалит
+        self._pending: Dict[str, List[dict]] = {}
+        self._obsolete: Set[str] = set()
+
+    def new_month_file(self, year: int, month: int) -> str:
+        """Возвращает путь (относительно папки хранилища) для нового поколения файла месяца."""
+        key = month_key(year, month)
+        generations = [0]
+        for name in os.listdir(os.path.join(self.root, str(year))):
+            parts = name.split('.')
+            if len(parts) == 3 and parts[0] == key and parts[1].isdigit():
+                generations.append(int(parts[1]))
+        return f"{year}/{key}.{max(generations) + 1}.csv"
+
+    def months(self) -> Dict[str, List[dict]]:
+        """
+        Возвращает записи хранилища, сгруппированные по месяцам (ключ - ГГГГММ).
+
+        Записи месяца ссылаются на один файл и упорядочены по смещению, то есть в порядке
+        блоков. Месяцы, записанные после последнего flush, уже видны.
+        """
+        published = self.published()
+        with self._lock:
+            if not self._pending:
+                return published
+            return {**published, **self._pending}
+
+    def published(self) -> Dict[str, List[dict]]:
+        """Возвращает записи манифеста по месяцам; результат кэшируется до изменения манифеста."""
+        manifest_path = os.path.join(self.root, MANIFEST_FILE)
+        try:
+            stat = os.stat(manifest_path)
+        except OSError:
+            return {}
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if self._entries is not None and self._entries[0] == signature:
+                return self._entries[1]
+
+        months: Dict[str, List[dict]] = {}
+        for entry in (read_manifest(self.root) or {}).get('partitions', []):
+            months.setdefault(file_month(entry['file']), []).append(entry)
+        for entries in months.values():
+            entries.sort(key=lambda entry: entry['offset'])
+
+        with self._lock:
+            self._entries = (signature, months)
+        return months
+
+    def stations(self) -> List[int]:
+        """Возвращает станции, данные которых есть в хранилище."""
+        return sorted({entry['station'] for entries in self.months().values() for entry in entries})
+
+    def has(self, station: int, year: int, month: int) -> bool:
+        """Проверяет, записан ли месяц станции."""
+        return any(entry['station'] == station for entry in self.months().get(month_key(year, month), []))
+
+    def write_month(self, year: int, month: int, rows_by_station: Dict[int, List[list]]) -> str:
+        """
+        Записывает месяц для нескольких станций в новый файл месяца.
+
+        Блоки станций, уже записанных за этот месяц, сохраняются (кроме перезаписываемых).
+        Манифест не меняется до flush: после сбоя хранилище остается в состоянии
+        последнего flush, а месяцы, записанные позже, загружаются заново.
+
+        Args:
+            year (int): Год.
+            month (int): Месяц.
+            rows_by_station (Dict[int, List[list]]): Строки скрапера для каждой станции
+                (номера станций - int).
+
+        Returns:
+            str: Путь к файлу месяца.
+        """
+        key = month_key(year, month)
+        os.makedirs(os.path.join(self.root, str(year)), exist_ok=True)
+        file = self.new_month_file(year, month)
+        path = os.path.join(self.root, file)
+
+        current = self.months().get(key, [])
+        blocks: Dict[int, bytes] = {}
+        previous = [entry for entry in current if entry['station'] not in rows_by_station]
+        if previous:
+            with open(os.path.join(self.root, previous[0]['file']), 'rb') as f:
+                for entry in previous:
+                    f.seek(entry['offset'])
+                    blocks[entry['station']] = f.read(entry['bytes'])
+        for station, rows in rows_by_station.items():
+            blocks[station] = rows_to_csv_bytes(rows)
+
+        header = rows_to_csv_bytes([RAW_COLUMNS])
+        kept = {entry['station']: entry for entry in previous}
+        entries = []
+        offset = len(header)
+        with open(path, 'wb') as f:
+            f.write(header)
+            for station in sorted(blocks):
+                block = blocks[station]
+                if station in rows_by_station:
+                    dates = [row[0] for row in rows_by_station[station]]
+                    parsed = pd.to_datetime(pd.Series(dates, dtype=object), format='%Y-%m-%d', errors='coerce')
+                    first = parsed.min().date().isoformat() if parsed.notna().any() else f"{year}-{month:02d}-01"
+                    last = parsed.max().date().isoformat() if parsed.notna().any() else first
+                    rows = len(rows_by_station[station])
+                else:
+                    first, last, rows = kept[station]['start'], kept[station]['end'], kept[station]['rows']
+                entries.append({'file': file, 'station': station, 'start': first, 'end': last,
+                                'rows': rows, 'offset': offset, 'bytes': len(block)})
+                f.write(block)
+                offset += len(block)
+
+        published = [entry['file'] for entry in self.published().get(key, [])[:1]]
+        with self._lock:
+            self._pending[key] = entries
+            self._obsolete.update(published)
+        # Файлы месяца, на которые не ссылается ни манифест, ни новая запись (прежние записи
+        # после последнего flush, остатки прерванных запусков), никому не нужны
+        for name in os.listdir(os.path.join(self.root, str(year))):
+            stale = f"{year}/{name}"
+            if name.startswith(key) and name.endswith('.csv') and stale not in (file, *published):
+                os.remove(os.path.join(self.root, stale))
+        return path
+
+    def flush(self) -> None:
+        """
+        Записывает в манифест месяцы, записанные после последнего flush, одной заменой файла
+        и удаляет файлы месяцев, на которые манифест больше не ссылается.
+        """
+        with self._lock:
+            pending = dict(self._pending)
+            obsolete = set(self._obsolete)
+        if not pending:
+            return
+
+        months = {**self.published(), **pending}
+        write_manifest(self.root, [entry for month_entries in months.values() for entry in month_entries],
+                       'gismeteo', PARTITION)
+        with self._lock:
+            for key, entries in pending.items():
+                if self._pending.get(key) is entries:
+                    del self._pending[key]
+            self._obsolete -= obsolete
+
+        referenced = {entries[0]['file'] for entries in months.values() if entries}
+        for file in obsolete - referenced:
+            try:
+                os.remove(os.path.join(self.root, file))
+            except OSError:
+                pass
+
+    def read_file(self, file: str, stations: Optional[List[int]] = None) -> pd.DataFrame:
+        """
+        Читает файл месяца целиком или блоки выбранных станций.
+
+        Номер станции каждой строки восстанавливается по числу строк блоков из манифеста,
+        поэтому в самом файле столбца станции нет.
+        """
+        all_entries = [entry for entry in self.months().get(file_month(file), []) if entry['file'] == file]
+        entries = all_entries
+        path = os.path.join(self.root, file)
+        if stations is not None:
+            wanted = set(stations)
+            entries = [entry for entry in entries if entry['station'] in wanted]
+            if not entries:
+                return pd.DataFrame(columns=[STATION_COLUMN, *RAW_COLUMNS])
+
+        if stations is None or len(entries) == len(all_entries):
+            df = read_csv_cached(path, compact=True)
+        else:
+            # Заголовок и блоки нужных станций читаются одним проходом по файлу
+            with open(path, 'rb') as f:
+                parts = [f.readline()]
+                for entry in entries:
+                    f.seek(entry['offset'])
+                    parts.append(f.read(entry['bytes']))
+            df = apply_schema(pd.read_csv(io.BytesIO(b''.join(parts))))
+
+        counts = [entry['rows'] for entry in entries]
+        if sum(counts) != len(df):
+            raise ValueError(f"Файл {path} не соответствует манифесту хранилища станций")
+        df.insert(0, STATION_COLUMN, np.repeat([entry['station'] for entry in entries], counts))
+        df[DATE_COLUMN] = pd.to_datetime(df[DATE_COLUMN], format='%Y-%m-%d', errors='coerce')
+        return df
+
+    def files_for_range(self, start: date, end: date) -> List[str]:
+        """Возвращает файлы месяцев, пересекающиеся с интервалом [start, end], в порядке дат."""
+        first, last = month_key(start.year, start.month), month_key(end.year, end.month)
+        return [entries[0]['file'] for key, entries in sorted(self.months().items())
+                if entries and first <= key <= last]
+
+    def read_range(self, start: date, end: date, stations: Stations = None) -> pd.DataFrame:
+        """
+        Возвращает строки станций с датами из интервала [start, end].
+
+        Args:
+            start (date): Первая дата (включительно).
+            end (date): Последняя дата (включительно).
+            stations (Stations): Станция, список станций или None - все станции.
+
+        Returns:
+            pd.DataFrame: Столбец 'Станция' и столбцы исходного файла; строки упорядочены
+            по дате, внутри даты - по станции.
+        """
+        selected = station_list(stations)
+        frames = [self.read_file(file, selected) for file in self.files_for_range(start, end)]
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=[STATION_COLUMN, *RAW_COLUMNS])
+        df = pd.concat(frames, ignore_index=True)
+        dates = df[DATE_COLUMN]
+        df = df[(dates >= pd.Timestamp(start)) & (dates <= pd.Timestamp(end))]
+        return df.sort_values([DATE_COLUMN, STATION_COLUMN], kind='stable').reset_index(drop=True)
+
+
+station_store = StationStore()
@@ -0,0 +1,377 @@
+import copy
+import math
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from csv_cache import (CACHE_DIR_NAME, CACHE_SUFFIX, file_signature, load_cached, read_data, register_type,
+                       store_cached, write_data)
+from schema import DATE_COLUMN, apply_schema
+
+DEFAULT_PRECISION = 14
+DEFAULT_SAMPLE_SIZE = 5
+DEFAULT_CHUNK_SIZE = 100_000
+SKETCH_SUFFIX = '.sketch'
+# Версия формата сохраненной статистики: старые файлы с другой версией пересчитываются
+STATS_VERSION = 3
+
+
+def hash_values(values: np.ndarray) -> np.ndarray:
+    """Возвращает детерминированные 64-битные хэши значений (одинаковые между запусками)."""
+    return pd.util.hash_array(np.asarray(values, dtype=object) if values.dtype.kind not in 'biuf' else values)
+
+
+@register_type
+class HyperLogLog:
+    """
+    Приближенный счетчик различных значений (HyperLogLog).
+
+    Хранит 2**precision однобайтовых регистров (16 КБ при precision=14) независимо от
+    числа значений; относительная ошибка около 1.04 / sqrt(2**precision), для малых
+    количеств оценка близка к точной (линейный подсчет). Счетчики объединяются
+    поэлементным максимумом регистров.
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION) -> None:
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def __getstate__(self) -> dict:
+        # У небольших разделов (неделя, год) заполнена малая часть регистров:
+        # они сохраняются списком ненулевых позиций, а не всем массивом
+        nonzero = np.flatnonzero(self.registers)
+        if len(nonzero) * 5 < len(self.registers):
+            return {'precision': self.precision, 'index': nonzero.astype(np.uint32), 'rank': self.registers[nonzero]}
+        return {'precision': self.precision, 'registers': self.registers}
+
+    def __setstate__(self, state: dict) -> None:
+        self.precision = state['precision']
+        if 'registers' in state:
+            self.registers = state['registers']
+        else:
+            self.registers = np.zeros(1 << self.precision, dtype=np.uint8)
+            self.registers[state['index']] = state['rank']
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        """Добавляет значения по их 64-битным хэшам."""
+        if not len(hashes):
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        shift = np.uint64(64 - self.precision)
+        index = (hashes >> shift).astype(np.intp)
+        rest = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        # Номер первой единицы в оставшихся битах: 64 - precision - длина rest в битах + 1
+        _, exponent = np.frexp(rest.astype(np.float64))
+        rank = (64 - self.precision - exponent + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: 'HyperLogLog') -> None:
+        """Объединяет счетчик с другим счетчиком той же точности."""
+        if other.precision != self.precision:
+            raise ValueError("Нельзя объединить счетчики с разной точностью")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        """Возвращает оценку числа различных значений."""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+@register_type
+class BottomKSample:
+    """
+    Детерминированная выборка значений: k различных значений с наименьшими хэшами.
+
+    В отличие от случайной выборки, результат не меняется между запусками и не зависит
+    от разбиения файла на фрагменты, а выборки частей объединяются в выборку целого.
+    """
+
+    def __init__(self, size: int = DEFAULT_SAMPLE_SIZE) -> None:
+        self.size = size
+        self.items: Dict[int, Any] = {}
+
+    def add(self, values: np.ndarray, hashes: np.ndarray) -> None:
+        """Добавляет значения фрагмента с их хэшами."""
+        if not len(values):
+            return
+        # np.unique возвращает хэши по возрастанию и первое вхождение каждого значения
+        unique_hashes, positions = np.unique(hashes, return_index=True)
+        for key, position in zip(unique_hashes[:self.size], positions[:self.size]):
+            self.items.setdefault(int(key), values[position])
+        self._trim()
+
+    def merge(self, other: 'BottomKSample') -> None:
+        for key, value in other.items.items():
+            self.items.setdefault(key, value)
+        self._trim()
+
+    def _trim(self) -> None:
+        if len(self.items) > self.size:
+            self.items = {key: self.items[key] for key in sorted(self.items)[:self.size]}
+
+    def values(self) -> List[Any]:
+        """Возвращает выборку в порядке хэшей."""
+        return [self.items[key] for key in sorted(self.items)]
+
+
+@register_type
+class ColumnStats:
+    """
+    Статистика одного столбца, накапливаемая по фрагментам за один проход.
+
+    Для числовых столбцов хранятся минимум, максимум и моменты (число, среднее, сумма
+    квадратов отклонений), которые объединяются формулой Чана, поэтому среднее и
+    стандартное отклонение не зависят от размера фрагментов.
+    """
+
+    def __init__(self, name: str, precision: int = DEFAULT_PRECISION,
+                 sample_size: int = DEFAULT_SAMPLE_SIZE) -> None:
+        self.name = name
+        self.dtype: Optional[str] = None
+        self.rows = 0
+        self.nulls = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min: Optional[Any] = None
+        self.max: Optional[Any] = None
+        self.distinct = HyperLogLog(precision)
+        self.sample = BottomKSample(sample_size)
+
+    def update(self, series: pd.Series) -> None:
+        """Добавляет значения фрагмента."""
+        self.dtype = merge_dtypes(self.dtype, str(series.dtype))
+        self.rows += len(series)
+        present = series[series.notna()]
+        self.nulls += len(series) - len(present)
+        if present.empty:
+            return
+
+        values = present.to_numpy()
+        hashes = hash_values(values)
+        self.distinct.add_hashes(hashes)
+        self.sample.add(values, hashes)
+
+        if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            numbers = values.astype(np.float64)
+            self.merge_moments(len(numbers), float(numbers.mean()), float(((numbers - numbers.mean()) ** 2).sum()))
+            self.merge_bounds(float(numbers.min()), float(numbers.max()))
+        elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+            self.merge_bounds(present.min(), present.max())
+
+    def merge_moments(self, count: int, mean: float, m2: float) -> None:
+        if not count:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def merge_bounds(self, low: Any, high: Any) -> None:
+        self.min = low if self.min is None or low < self.min else self.min
+        self.max = high if self.max is None or high > self.max else self.max
+
+    def merge(self, other: 'ColumnStats') -> None:
+        """Объединяет статистику с статистикой того же столбца другой части данных."""
+        self.dtype = merge_dtypes(self.dtype, other.dtype)
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.merge_moments(other.count, other.mean, other.m2)
+        if other.min is not None:
+            self.merge_bounds(other.min, other.max)
+        self.distinct.merge(other.distinct)
+        self.sample.merge(other.sample)
+
+    @property
+    def std(self) -> Optional[float]:
+        """Выборочное стандартное отклонение (как pandas std) или None, если значений меньше двух."""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else None
+
+    def describe(self) -> str:
+        """Возвращает строку описания столбца для файла аннотации."""
+        parts = [f"Тип: {self.dtype}", f"Уникальных значений: {self.distinct.estimate()}", f"Пропусков: {self.nulls}"]
+        if self.count:
+            parts += [f"Мин: {format_number(self.min)}", f"Макс: {format_number(self.max)}",
+                      f"Среднее: {format_number(self.mean)}"]
+            if self.std is not None:
+                parts.append(f"Ст. отклонение: {format_number(self.std)}")
+        elif self.min is not None:
+            parts += [f"Мин: {self.min}", f"Макс: {self.max}"]
+        parts.append(f"Примеры: {', '.join(map(str, self.sample.values()))}")
+        return ', '.join(parts)
+
+
+def merge_dtypes(first: Optional[str], second: Optional[str]) -> Optional[str]:
+    """
+    Возвращает общий тип столбца для двух фрагментов.
+
+    Числовые типы повышаются как в NumPy (int8 и float32 дают float32), разные
+    нечисловые типы дают object.
+    """
+    if first is None or first == second:
+        return second if first is None else first
+    if second is None:
+        return first
+    try:
+        if np.dtype(first).kind in 'biuf' and np.dtype(second).kind in 'biuf':
+            return str(np.result_type(first, second))
+    except TypeError:
+        pass
+    return 'object'
+
+
+def format_number(value: Any) -> str:
+    """Форматирует число без лишних знаков после запятой."""
+    return f"{value:.6g}" if isinstance(value, float) else str(value)
+
+
+@register_type
+class DatasetStats:
+    """
+    Статистика набора данных, накапливаемая по фрагментам: число строк, диапазон дат
+    и ColumnStats для каждого столбца. Память не зависит от числа строк.
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, sample_size: int = DEFAULT_SAMPLE_SIZE) -> None:
+        self.precision = precision
+        self.sample_size = sample_size
+        self.rows = 0
+        self.columns: Dict[str, ColumnStats] = {}
+        self.first_date: Optional[pd.Timestamp] = None
+        self.last_date: Optional[pd.Timestamp] = None
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Добавляет фрагмент данных."""
+        self.rows += len(chunk)
+        for name in chunk.columns:
+            if name not in self.columns:
+                self.columns[name] = ColumnStats(name, self.precision, self.sample_size)
+            self.columns[name].update(chunk[name])
+        if DATE_COLUMN in chunk.columns:
+            dates = pd.to_datetime(chunk[DATE_COLUMN], format='%Y-%m-%d', errors='coerce').dropna()
+            if not dates.empty:
+                self.merge_dates(dates.min(), dates.max())
+
+    def merge_dates(self, first: Optional[pd.Timestamp], last: Optional[pd.Timestamp]) -> None:
+        if first is None:
+            return
+        self.first_date = first if self.first_date is None else min(self.first_date, first)
+        self.last_date = last if self.last_date is None else max(self.last_date, last)
+
+    def merge(self, other: 'DatasetStats') -> None:
+        """Объединяет статистику с статистикой другой части того же набора данных."""
+        self.rows += other.rows
+        for name, stats in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(stats)
+            else:
+                self.columns[name] = copy.deepcopy(stats)
+        self.merge_dates(other.first_date, other.last_date)
+
+
+def merge_stats(parts: Iterable[DatasetStats]) -> DatasetStats:
+    """
+    Объединяет статистику нескольких частей набора данных (например, годовых разделов).
+
+    Части не изменяются. Результат совпадает со статистикой, собранной по всем строкам
+    сразу: счетчики и моменты складываются точно, счетчики различных значений и
+    выборки объединяются без потери точности.
+    """
+    merged: Optional[DatasetStats] = None
+    for part in parts:
+        if merged is None:
+            merged = DatasetStats(part.precision, part.sample_size)
+        merged.merge(part)
+    return merged if merged is not None else DatasetStats()
+
+
+def collect_stats(chunks: Iterable[pd.DataFrame], precision: int = DEFAULT_PRECISION,
+                  sample_size: int = DEFAULT_SAMPLE_SIZE) -> DatasetStats:
+    """Собирает статистику по последовательности фрагментов за один проход."""
+    stats = DatasetStats(precision, sample_size)
+    for chunk in chunks:
+        stats.update(chunk)
+    return stats
+
+
+def file_stats(file_path: str, chunksize: int = DEFAULT_CHUNK_SIZE,
+               progress_callback: Optional[Callable[[int], None]] = None,
+               precision: int = DEFAULT_PRECISION, sample_size: int = DEFAULT_SAMPLE_SIZE) -> DatasetStats:
+    """
+    Собирает статистику CSV файла за один проход по фрагментам из chunksize строк.
+
+    Столбцы каждого фрагмента приводятся к компактным типам схемы (schema.py), как при
+    обычном чтении файла, поэтому типы в статистике совпадают с типами загруженных данных.
+
+    Args:
+        file_path (str): Путь к CSV файлу.
+        chunksize (int): Число строк в одном фрагменте.
+        progress_callback (Optional[Callable[[int], None]]): Получает процент прочитанного файла.
+        precision (int): Точность счетчиков различных значений.
+        sample_size (int): Число примеров значений для каждого столбца.
+
+    Returns:
+        DatasetStats: Статистика файла.
+    """
+    total_bytes = os.path.getsize(file_path) or 1
+    stats = DatasetStats(precision, sample_size)
+    with open(file_path, 'rb') as source:
+        for chunk in pd.read_csv(source, chunksize=chunksize, encoding='utf-8'):
+            stats.update(apply_schema(chunk))
+            if progress_callback is not None:
+                progress_callback(min(100, int(source.tell() * 100 / total_bytes)))
+    return stats
+
+
+def stats_path_for(file_path: str) -> str:
+    """Возвращает путь к сохраненной статистике CSV файла (в папке __cache__ рядом с ним)."""
+    folder, name = os.path.split(os.path.abspath(file_path))
+    return os.path.join(folder, CACHE_DIR_NAME, f"{name}.stats{CACHE_SUFFIX}")
+
+
+def cached_file_stats(file_path: str, chunksize: int = DEFAULT_CHUNK_SIZE,
+                      progress_callback: Optional[Callable[[int], None]] = None) -> DatasetStats:
+    """
+    Возвращает статистику CSV файла, собирая ее только если файл изменился.
+
+    Статистика хранится рядом с бинарными копиями csv_cache и считается устаревшей,
+    если у файла изменились время модификации или размер. Поэтому статистика разделов
+    (недельных и годовых файлов) собирается один раз, а затем только объединяется.
+    """
+    signature = file_signature(file_path)
+    path = stats_path_for(file_path)
+    stored = load_cached(path, signature)
+    if isinstance(stored, dict) and stored.get('version') == STATS_VERSION:
+        if progress_callback is not None:
+            progress_callback(100)
+        return stored['stats']
+    stats = file_stats(file_path, chunksize, progress_callback)
+    store_cached(path, signature, {'version': STATS_VERSION, 'stats': stats})
+    return stats
+
+
+def save_sketch(stats: DatasetStats, path: str) -> None:
+    """Атомарно сохраняет статистику в файл (набросок аннотации) в формате бинарных копий csv_cache."""
+    write_data(path, {'version': STATS_VERSION, 'stats': stats})
+
+
+def load_sketch(path: str) -> DatasetStats:
+    """
+    Читает статистику, сохраненную save_sketch.
+
+    Raises:
+        ValueError: Если файл поврежден или создан другой версией формата.
+    """
+    stored = read_data(path)
+    if not isinstance(stored, dict) or stored.get('version') != STATS_VERSION \
+            or not isinstance(stored.get('stats'), DatasetStats):
+        raise ValueError(f"Файл {path} создан другой версией формата статистики")
+    return stored['stats']
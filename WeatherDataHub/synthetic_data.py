@@ -0,0 +1,198 @@
+import argparse
+import math
+import os
+from datetime import date
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from schema import RAW_COLUMNS
+
+CLOUDINESS_VALUES = np.array(['Ясно', 'Малооблачно', 'Переменная облачность', 'Пасмурно',
+                              'Неизвестно', 'Нет данных'], dtype=object)
+# Частоты облачности примерно как в dataset/samara_weather_199901-202410.csv
+CLOUDINESS_WEIGHTS = np.array([0.40, 0.15, 0.15, 0.28, 0.005, 0.015])
+WIND_DIRECTIONS = ['С', 'СВ', 'В', 'ЮВ', 'Ю', 'ЮЗ', 'З', 'СЗ']
+WIND_WEIGHTS = np.array([0.08, 0.07, 0.15, 0.09, 0.08, 0.15, 0.25, 0.13])
+CALM = 'Ш'
+CALM_SHARE = 0.025
+MAX_WIND_SPEED = 7
+# Доля строк без вечерних наблюдений: температура, давление и ветер пустые, облачность «Неизвестно»
+MISSING_EVENING_SHARE = 0.002
+TEMPERATURE_RANGE = (-60, 60)
+DAYS_PER_CHUNK = 366
+
+
+def format_temperature(value: int) -> str:
+    """Записывает температуру так же, как на сайте: «+5», «0», «-12»."""
+    return f"+{value}" if value > 0 else str(value)
+
+
+TEMPERATURE_LABELS = np.array([format_temperature(value)
+                               for value in range(TEMPERATURE_RANGE[0], TEMPERATURE_RANGE[1] + 1)], dtype=object)
+WIND_LABELS = np.array([f"{direction} {speed}м/с"
+                        for direction in WIND_DIRECTIONS for speed in range(1, MAX_WIND_SPEED + 1)], dtype=object)
+
+
+def format_dates(days: np.ndarray) -> np.ndarray:
+    """Записывает даты как скрапер: месяц с ведущим нулем, день без него (2008-02-7)."""
+    index = pd.DatetimeIndex(days)
+    labels = [f"{year}-{month:02d}-{day}" for year, month, day in zip(index.year, index.month, index.day)]
+    return np.array(labels, dtype=object)
+
+
+def station_climate(stations: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """Возвращает для каждой станции сдвиг средней температуры и среднее давление."""
+    return rng.normal(0.0, 3.0, stations), rng.normal(748.0, 6.0, stations)
+
+
+def generate_frame(days: np.ndarray, stations: int, climate: Tuple[np.ndarray, np.ndarray],
+                   rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Создает строки исходного файла для дней days и станций 0..stations-1.
+
+    Строки упорядочены по дате, внутри даты - по станции, поэтому файл остается
+    хронологическим, как того ожидают разделение и WeatherIterator.
+
+    Args:
+        days (np.ndarray): Даты (datetime64[D]) по возрастанию.
+        stations (int): Число станций.
+        climate (Tuple[np.ndarray, np.ndarray]): Результат station_climate.
+        rng (np.random.Generator): Генератор случайных чисел.
+
+    Returns:
+        pd.DataFrame: Строки со столбцами RAW_COLUMNS; все значения - строки.
+    """
+    temperature_shift, pressure_mean = climate
+    rows = len(days) * stations
+    day_of_year = (days - days.astype('datetime64[Y]')).astype(np.int64)
+    # Годовой ход температуры: минимум в середине января, максимум в середине июля
+    seasonal = np.repeat(5.0 - 16.0 * np.cos(2 * np.pi * (day_of_year - 15) / 365.25), stations)
+    shift = np.tile(temperature_shift, len(days))
+    pressure = np.tile(pressure_mean, len(days))
+
+    def temperatures(offset: float) -> np.ndarray:
+        values = np.rint(seasonal + shift + offset + rng.normal(0.0, 4.0, rows)).astype(np.int64)
+        values = np.clip(values, *TEMPERATURE_RANGE)
+        return TEMPERATURE_LABELS[values - TEMPERATURE_RANGE[0]]
+
+    def pressures() -> np.ndarray:
+        return np.rint(pressure + rng.normal(0.0, 7.0, rows)).astype(np.int64).astype(str).astype(object)
+
+    def cloudiness() -> np.ndarray:
+        return CLOUDINESS_VALUES[rng.choice(len(CLOUDINESS_VALUES), rows, p=CLOUDINESS_WEIGHTS)]
+
+    def winds() -> np.ndarray:
+        direction = rng.choice(len(WIND_DIRECTIONS), rows, p=WIND_WEIGHTS)
+        speed = np.clip(rng.poisson(1.5, rows) + 1, 1, MAX_WIND_SPEED)
+        values = WIND_LABELS[direction * MAX_WIND_SPEED + speed - 1]
+        values[rng.random(rows) < CALM_SHARE] = CALM
+        return values
+
+    frame = pd.DataFrame({
+        RAW_COLUMNS[0]: np.repeat(format_dates(days), stations),
+        RAW_COLUMNS[1]: temperatures(0.0),
+        RAW_COLUMNS[2]: pressures(),
+        RAW_COLUMNS[3]: cloudiness(),
+        RAW_COLUMNS[4]: winds(),
+        RAW_COLUMNS[5]: temperatures(-2.0),
+        RAW_COLUMNS[6]: pressures(),
+        RAW_COLUMNS[7]: cloudiness(),
+        RAW_COLUMNS[8]: winds(),
+    })
+
+    missing = rng.random(rows) < MISSING_EVENING_SHARE
+    for column in (RAW_COLUMNS[5], RAW_COLUMNS[6], RAW_COLUMNS[8]):
+        frame.loc[missing, column] = ''
+    frame.loc[missing, RAW_COLUMNS[7]] = 'Неизвестно'
+    return frame
+
+
+def generate_dataset(output_path: str, start_year: int, end_year: int, stations: int = 1,
+                     max_rows: Optional[int] = None, seed: int = 0) -> int:
+    """
+    Записывает синтетический исходный файл в формате WeatherScraper.save_to_csv.
+
+    Значения похожи на реальные: сезонный ход температуры, свой климат у каждой станции,
+    штиль («Ш»), облачность «Неизвестно» и «Нет данных», изредка пустые вечерние
+    наблюдения. Файл пишется по годам, поэтому память не зависит от его размера;
+    при одном seed содержимое всегда одинаково.
+
+    Args:
+        output_path (str): Путь к создаваемому CSV файлу.
+        start_year (int): Первый год.
+        end_year (int): Последний год (включительно).
+        stations (int): Число станций; строки станций за один день идут подряд.
+        max_rows (Optional[int]): Наибольшее число строк данных.
+        seed (int): Начальное значение генератора случайных чисел.
+
+    Returns:
+        int: Число записанных строк данных.
+    """
+    rng = np.random.default_rng(seed)
+    climate = station_climate(stations, rng)
+    days = np.arange(np.datetime64(f"{start_year}-01-01"), np.datetime64(f"{end_year + 1}-01-01"))
+    limit = len(days) * stations if max_rows is None else min(max_rows, len(days) * stations)
+
+    folder = os.path.dirname(output_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    written = 0
+    with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
+        # csv.writer в save_to_csv завершает строки символами \r\n
+        pd.DataFrame(columns=RAW_COLUMNS).to_csv(csvfile, index=False, lineterminator='\r\n')
+        for first in range(0, len(days), DAYS_PER_CHUNK):
+            if written >= limit:
+                break
+            frame = generate_frame(days[first:first + DAYS_PER_CHUNK], stations, climate, rng)
+            frame = frame.iloc[:limit - written]
+            frame.to_csv(csvfile, index=False, header=False, lineterminator='\r\n')
+            written += len(frame)
+    return written
+
+
+def layout_for_rows(rows: int, start_year: int = 1970, max_years: int = 50) -> Tuple[int, int, int]:
+    """
+    Подбирает годы и число станций для файла из rows строк.
+
+    Сначала добавляются годы (до max_years), затем станции, поэтому небольшие файлы
+    содержат одну станцию, а файлы в миллионы строк - несколько десятилетий многих станций.
+
+    Returns:
+        Tuple[int, int, int]: Первый год, последний год и число станций.
+    """
+    days_per_year = 365.25
+    years = min(max_years, max(1, math.ceil(rows / days_per_year)))
+    end_year = start_year + years - 1
+    days = (date(end_year + 1, 1, 1) - date(start_year, 1, 1)).days
+    return start_year, end_year, max(1, math.ceil(rows / days))
+
+
+def generate_rows(output_path: str, rows: int, start_year: int = 1970, seed: int = 0) -> int:
+    """Записывает синтетический файл ровно из rows строк (см. layout_for_rows)."""
+    first_year, last_year, stations = layout_for_rows(rows, start_year)
+    return generate_dataset(output_path, first_year, last_year, stations, max_rows=rows, seed=seed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Синтетический исходный файл в формате WeatherScraper")
+    parser.add_argument('output', help="путь к создаваемому CSV файлу")
+    parser.add_argument('--start-year', type=int, default=1970, help="первый год")
+    parser.add_argument('--end-year', type=int, help="последний год (по умолчанию - по --rows или start-year)")
+    parser.add_argument('--stations', type=int, default=1, help="число станций")
+    parser.add_argument('--rows', type=int, help="число строк; без --end-year годы и станции подбираются сами")
+    parser.add_argument('--seed', type=int, default=0, help="начальное значение генератора")
+    args = parser.parse_args()
+
+    if args.end_year is None and args.rows is not None:
+        written = generate_rows(args.output, args.rows, args.start_year, args.seed)
+    else:
+        end_year = args.end_year if args.end_year is not None else args.start_year
+        written = generate_dataset(args.output, args.start_year, end_year, args.stations, args.rows, args.seed)
+    print(f"Записано строк: {written} в файл {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import threading
+from PyQt6.QtWidgets import QHBoxLayout, QLabel, QProgressBar, QPushButton, QVBoxLayout, QWidget
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from typing import Any, Callable, Dict, Optional
+
+
+class TaskCancelled(Exception):
+    """Исключение, которым задача прерывается после запроса отмены."""
+
+
+class TaskContext:
+    """
+    Связь выполняющейся функции с задачей: прогресс, статус и проверка отмены.
+
+    Отмена кооперативная: progress и check_cancelled выбрасывают TaskCancelled,
+    если задачу попросили остановиться, поэтому функции, принимающие
+    progress_callback, прерываются на ближайшем отчете о прогрессе.
+    """
+
+    def __init__(self, signals: 'TaskSignals') -> None:
+        """
+        Инициализирует TaskContext.
+
+        Args:
+            signals (TaskSignals): Сигналы задачи.
+        """
+        self.signals = signals
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        """Выбрасывает TaskCancelled, если задачу попросили остановиться."""
+        if self.cancel_event.is_set():
+            raise TaskCancelled()
+
+    def progress(self, percent: int) -> None:
+        """Сообщает процент выполнения (0-100)."""
+        self.check_cancelled()
+        self.signals.progress.emit(int(percent))
+
+    def status(self, text: str) -> None:
+        """Сообщает текущее состояние задачи."""
+        self.check_cancelled()
+        self.signals.status.emit(text)
+
+
+class TaskSignals(QObject):
+    """Сигналы задачи; QRunnable не является QObject и не может объявлять их сам."""
+
+    progress = pyqtSignal(int)
+    status = pyqtSignal(str)
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    done = pyqtSignal()
+
+
+class Task(QRunnable):
+    """
+    Задача для QThreadPool.
+
+    Функция задачи получает TaskContext и возвращает результат, который передается
+    сигналом succeeded. Исключение передается сигналом failed, отмена - сигналом
+    cancelled; в любом случае в конце испускается done.
+    """
+
+    def __init__(self, name: str, func: Callable[[TaskContext], Any]) -> None:
+        """
+        Инициализирует Task.
+
+        Args:
+            name (str): Название задачи для панели задач.
+            func (Callable[[TaskContext], Any]): Выполняемая функция.
+        """
+        super().__init__()
+        self.setAutoDelete(False)
+        self.name = name
+        self.func = func
+        self.signals = TaskSignals()
+        self.context = TaskContext(self.signals)
+
+    def cancel(self) -> None:
+        """Просит задачу остановиться при следующей проверке отмены."""
+        self.context.cancel_event.set()
+
+    def run(self) -> None:
+        """Выполняет функцию задачи в потоке пула."""
+        try:
+            self.context.check_cancelled()
+            result = self.func(self.context)
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.succeeded.emit(result)
+        finally:
+            self.signals.done.emit()
+
+
+class TaskRunner(QObject):
+    """Запускает независимые задачи в QThreadPool и хранит список выполняющихся задач."""
+
+    task_started = pyqtSignal(object)
+    task_done = pyqtSignal(object)
+
+    def __init__(self, max_threads: Optional[int] = None, parent: Optional[QObject] = None) -> None:
+        """
+        Инициализирует TaskRunner.
+
+        Args:
+            max_threads (Optional[int]): Число одновременно выполняемых задач
+                (по умолчанию - число ядер).
+            parent (Optional[QObject]): Родительский объект Qt.
+        """
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        if max_threads is not None:
+            self.pool.setMaxThreadCount(max_threads)
+        self.active: Dict[int, Task] = {}
+
+    def submit(self, name: str, func: Callable[[TaskContext], Any],
+               on_success: Optional[Callable[[Any], None]] = None,
+               on_failure: Optional[Callable[[str], None]] = None,
+               on_cancel: Optional[Callable[[], None]] = None,
+               on_progress: Optional[Callable[[int], None]] = None,
+               on_status: Optional[Callable[[str], None]] = None) -> Task:
+        """
+        Ставит задачу в очередь пула.
+
+        Обработчики подключаются до запуска задачи и вызываются в потоке GUI,
+        поэтому в них можно обновлять виджеты.
+
+        Args:
+            name (str): Название задачи.
+            func (Callable[[TaskContext], Any]): Выполняемая функция.
+            on_success (Optional[Callable[[Any], None]]): Получает результат функции.
+            on_failure (Optional[Callable[[str], None]]): Получает текст ошибки.
+            on_cancel (Optional[Callable[[], None]]): Вызывается, если задача отменена.
+            on_progress (Optional[Callable[[int], None]]): Получает процент выполнения.
+            on_status (Optional[Callable[[str], None]]): Получает строку состояния.
+
+        Returns:
+            Task: Созданная задача.
+        """
+        task = Task(name, func)
+        if on_success is not None:
+            task.signals.succeeded.connect(on_success)
+        if on_failure is not None:
+            task.signals.failed.connect(on_failure)
+        if on_cancel is not None:
+            task.signals.cancelled.connect(on_cancel)
+        if on_progress is not None:
+            task.signals.progress.connect(on_progress)
+        if on_status is not None:
+            task.signals.status.connect(on_status)
+        task.signals.done.connect(lambda: self.finish(task))
+        self.active[id(task)] = task
+        self.task_started.emit(task)
+        self.pool.start(task)
+        return task
+
+    def finish(self, task: Task) -> None:
+        self.active.pop(id(task), None)
+        self.task_done.emit(task)
+
+    def cancel_all(self) -> None:
+        """Просит остановиться все выполняющиеся и ожидающие задачи."""
+        for task in list(self.active.values()):
+            task.cancel()
+
+    def wait(self, msecs: int = -1) -> bool:
+        """Ждет завершения всех задач пула."""
+        return self.pool.waitForDone(msecs)
+
+
+class JobsPanel(QWidget):
+    """Панель выполняющихся задач: название, статус, прогресс и кнопка отмены для каждой."""
+
+    def __init__(self, runner: TaskRunner, parent: Optional[QWidget] = None) -> None:
+        """
+        Инициализирует JobsPanel.
+
+        Args:
+            runner (TaskRunner): Исполнитель, задачи которого отображаются.
+            parent (Optional[QWidget]): Родительский виджет.
+        """
+        super().__init__(parent)
+        self.rows: Dict[int, QWidget] = {}
+        self.jobs_layout = QVBoxLayout()
+        self.jobs_layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(self.jobs_layout)
+        runner.task_started.connect(self.add_task)
+        runner.task_done.connect(self.remove_task)
+        self.setVisible(False)
+
+    def add_task(self, task: Task) -> None:
+        """Добавляет строку задачи."""
+        row = QWidget()
+        row_layout = QHBoxLayout()
+        row_layout.setContentsMargins(0, 0, 0, 0)
+
+        status_label = QLabel(task.name)
+        progress_bar = QProgressBar()
+        progress_bar.setRange(0, 0)
+        cancel_button = QPushButton("Отмена")
+
+        def update_progress(value: int) -> None:
+            progress_bar.setRange(0, 100)
+            progress_bar.setValue(value)
+
+        def cancel() -> None:
+            task.cancel()
+            cancel_button.setEnabled(False)
+            status_label.setText(f"{task.name}: отмена...")
+
+        task.signals.progress.connect(update_progress)
+        task.signals.status.connect(lambda text: status_label.setText(f"{task.name}: {text}"))
+        cancel_button.clicked.connect(cancel)
+
+        row_layout.addWidget(status_label, 2)
+        row_layout.addWidget(progress_bar, 1)
+        row_layout.addWidget(cancel_button)
+        row.setLayout(row_layout)
+        self.jobs_layout.addWidget(row)
+        self.rows[id(task)] = row
+        self.setVisible(True)
+
+    def remove_task(self, task: Task) -> None:
+        """Удаляет строку завершенной задачи."""
+        row = self.rows.pop(id(task), None)
+        if row is not None:
+            self.jobs_layout.removeWidget(row)
+            row.deleteLater()
+        self.setVisible(bool(self.rows))